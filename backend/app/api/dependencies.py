@@ -12,6 +12,7 @@
    - get_current_active_user: Ensure user is active
    - get_user_with_subscription: Load user with subscription
    - check_dream_limit: Verify daily limits
+   - get_openai_service: OpenAI service bound to the shared client
 🚫 forbidden_changes: Do not bypass security checks
 🧪 tests: test_dependencies.py
 """
@@ -30,6 +31,7 @@ from app.core.database import get_db
 from app.core.redis import get_redis
 from app.models.db import User, Subscription
 from app.services.auth_service import AuthService
+from app.services.ai import OpenAIService
 
 
 # Security scheme
@@ -141,6 +143,11 @@ async def increment_dream_count(
         logger.error(f"Failed to increment dream count: {e}")
 
 
+def get_openai_service() -> OpenAIService:
+    """Get OpenAI service using the process-wide pooled client"""
+    return OpenAIService()
+
+
 # Optional dependencies for endpoints that work with/without auth
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
@@ -164,7 +171,7 @@ def get_pagination(
     page: int = 1,
     limit: int = 20
 ) -> PaginationParams:
-    """Get pagination parameters"""
+    """Get pagination parameters (offset fallback of cursor pagination)"""
     return PaginationParams(page=page, limit=limit)
 
 
@@ -0,0 +1,174 @@
+# ai_context_v3
+"""
+🎯 main_goal: Streaming audio uploads for voice dreams
+⚡ critical_requirements:
+   - multipart/form-data (field "audio") or a raw audio/* request body
+   - Spooled to a temporary file, memory stays flat for any clip length
+   - MAX_UPLOAD_SIZE enforced while reading, not after
+   - Format checked against ALLOWED_AUDIO_FORMATS
+📥 inputs_outputs: HTTP request body -> AudioUpload (file object + format)
+🔧 functions_list:
+   - read_audio_upload: Spool the request audio and validate it
+   - AudioUpload: Uploaded clip ready for transcription
+🚫 forbidden_changes: Do not read the whole body into memory
+🧪 tests: test_uploads.py with oversized and wrong format bodies
+"""
+
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, Optional
+
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from app.core.config import settings
+
+# Clips up to this size stay in memory, larger ones roll over to disk
+SPOOL_MAX_MEMORY = 1024 * 1024
+# Boundaries and part headers around the audio in a multipart body
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Content types of the allowed formats, for raw bodies and unnamed parts
+AUDIO_CONTENT_TYPES = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/ogg": "ogg",
+    "audio/mp4": "m4a",
+    "audio/m4a": "m4a",
+    "audio/x-m4a": "m4a",
+    "audio/webm": "webm",
+}
+
+
+class UploadTooLarge(Exception):
+    """Request body grew past the allowed size"""
+
+
+@dataclass(slots=True)
+class AudioUpload:
+    """Uploaded clip; the caller closes file when done"""
+    file: BinaryIO
+    format: str
+    size: int
+
+    @property
+    def filename(self) -> str:
+        # Whisper detects the container from the extension
+        return f"audio.{self.format}"
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def read_audio_upload(request: Request) -> AudioUpload:
+    """
+    Spool the audio of a voice request to a temporary file.
+    Raises 413 past MAX_UPLOAD_SIZE, 415 for other formats, 400 for bad bodies.
+    """
+    content_type = request.headers.get("content-type", "")
+    media_type = content_type.split(";")[0].strip().lower()
+    multipart = media_type == "multipart/form-data"
+    if not multipart and not media_type.startswith("audio/"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send audio as multipart/form-data or an audio/* body"
+        )
+
+    limit = settings.MAX_UPLOAD_SIZE + (MULTIPART_OVERHEAD if multipart else 0)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise _too_large()
+
+    try:
+        if multipart:
+            upload = await _read_multipart(request, limit)
+        else:
+            upload = await _read_raw(request, media_type, limit)
+    except UploadTooLarge:
+        raise _too_large()
+
+    if upload.size > settings.MAX_UPLOAD_SIZE:
+        upload.close()
+        raise _too_large()
+    if upload.size == 0:
+        upload.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Audio file is empty"
+        )
+    if upload.format not in settings.ALLOWED_AUDIO_FORMATS:
+        upload.close()
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Audio format must be one of: {', '.join(settings.ALLOWED_AUDIO_FORMATS)}"
+        )
+
+    upload.file.seek(0)
+    return upload
+
+
+async def _read_raw(request: Request, media_type: str, limit: int) -> AudioUpload:
+    """Raw audio/* body, format from the content type"""
+    file = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    size = 0
+    try:
+        async for chunk in _limited(request.stream(), limit):
+            file.write(chunk)
+            size += len(chunk)
+    except BaseException:
+        file.close()
+        raise
+    return AudioUpload(file=file, format=AUDIO_CONTENT_TYPES.get(media_type, media_type), size=size)
+
+
+async def _read_multipart(request: Request, limit: int) -> AudioUpload:
+    """Multipart body with the clip in the "audio" field"""
+    parser = MultiPartParser(request.headers, _limited(request.stream(), limit), max_files=1, max_fields=10)
+    try:
+        form = await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+
+    audio = form.get("audio")
+    if not isinstance(audio, UploadFile):
+        await form.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Multipart body must contain an "audio" file'
+        )
+    return AudioUpload(file=audio.file, format=_part_format(audio), size=audio.size or 0)
+
+
+def _part_format(audio: UploadFile) -> str:
+    """Extension of the uploaded filename, or the part content type"""
+    extension: Optional[str] = None
+    if audio.filename and "." in audio.filename:
+        extension = audio.filename.rsplit(".", 1)[1].lower()
+    if extension:
+        return extension
+    media_type = (audio.content_type or "").split(";")[0].strip().lower()
+    return AUDIO_CONTENT_TYPES.get(media_type, media_type)
+
+
+async def _limited(stream: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    """Pass the body through, raising UploadTooLarge once it exceeds limit"""
+    received = 0
+    async for chunk in stream:
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLarge()
+        yield chunk
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Audio file must not exceed {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+    )
@@ -9,67 +9,80 @@
 📥 inputs_outputs: Dream text/audio -> Interpretation
 🔧 functions_list:
    - interpret_dream: Submit and interpret new dream
+   - interpret_dream_stream: Interpret new dream with SSE streaming
+   - interpret_voice_dream: Interpret a dream from an uploaded audio clip
+   - get_interpretation_job: Poll an asynchronous interpretation job
+   - wait_interpretation_job: Wait for an asynchronous interpretation job (SSE)
    - get_dreams: List user's dreams
    - get_dream: Get specific dream
+   - get_popular_symbols: Most frequent symbols across all journals
+   - get_symbol: Symbol statistics with related symbols
    - save_dream: Save interpretation to journal
    - delete_dream: Delete dream
+   - generate_tts: Streamed and stored TTS audio of an interpretation
 🚫 forbidden_changes: Do not bypass rate limits
 🧪 tests: test_dreams.py with AI mock tests
 """
 
-from typing import Annotated, Optional, List
+from typing import Annotated, Optional, List, Tuple
 from uuid import UUID
 from datetime import datetime
 import base64
+import json
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 from loguru import logger
 
+from app.core import database
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import TTS_CACHE_REQUESTS
 from app.core.redis import get_redis
-from app.models.db import User, Dream, DreamInterpretation as DreamInterpretationDB
+from app.models.db import User, Dream
 from app.models.schemas.dream import (
     DreamInterpretRequest,
     DreamInterpretResponse,
+    DreamJobResponse,
     DreamResponse,
     DreamCreate,
     DreamUpdate
 )
-from app.models.schemas.common import PaginatedResponse, SuccessResponse
+from app.models.schemas.common import PaginatedResponse, PaginationParams, SuccessResponse, SymbolResponse
 from app.api.dependencies import (
     get_current_active_user,
     check_dream_limit,
     increment_dream_count,
     get_pagination,
-    get_optional_user
+    get_optional_user,
+    get_openai_service
 )
+from app.api.uploads import AudioUpload, read_audio_upload
 from app.services.ai import DreamInterpreter, EmbeddingService, OpenAIService
+from app.services.ai.rate_governor import UpstreamBudgetTimeout
+from app.services.ai.similarity_context import similarity_context_store
+from app.services.ai.symbol_lexicon import symbol_lexicon
+from app.services.ai.tts_storage import tts_storage
+from app.services.ai.user_vector_cache import user_vector_cache
+from app.services.dream_service import DreamService
+from app.services.interpret_jobs import interpret_job_store
+from app.services.interpretation_flow import interpret_and_save, store_dream_embedding
+from app.services.symbol_stats import symbol_stats_store
+from app.worker.tasks import interpret_dream_job
 
 router = APIRouter()
 
 
-@router.post("/interpret", response_model=DreamInterpretResponse)
-async def interpret_dream(
+async def _resolve_dream_text(
     request: DreamInterpretRequest,
-    user: Annotated[User, Depends(check_dream_limit)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-    redis = Depends(get_redis)
-):
-    """
-    Interpret a dream using AI
-    
-    This endpoint:
-    1. Validates the dream text/audio
-    2. Checks user's daily limit
-    3. Processes with GPT-4
-    4. Returns interpretation
-    5. Optionally saves to journal
-    """
+    openai_service: OpenAIService
+) -> str:
+    """Get dream text from request, transcribing voice input if provided"""
     
-    # Process voice input if provided
+    # Process voice input if provided (deprecated, see POST /interpret/voice)
     dream_text = request.text
     if request.voice_data:
         try:
@@ -77,7 +90,6 @@ async def interpret_dream(
             audio_data = base64.b64decode(request.voice_data)
             
             # Transcribe using Whisper
-            openai_service = OpenAIService()
             dream_text = await openai_service.transcribe_audio(
                 audio_data,
                 language=request.language
@@ -92,8 +104,41 @@ async def interpret_dream(
                 detail="Failed to process voice input"
             )
     
-    # Validate dream text length
-    if len(dream_text) < 20:
+    return _validate_dream_text(dream_text)
+
+
+async def _transcribe_upload(
+    upload: AudioUpload,
+    language: str,
+    openai_service: OpenAIService
+) -> str:
+    """Dream text of an uploaded clip; the spooled file goes to Whisper as is"""
+    
+    try:
+        dream_text = await openai_service.transcribe_audio(
+            upload.file,
+            language=language,
+            filename=upload.filename
+        )
+        logger.info(f"Transcribed voice upload: {upload.size} bytes, {len(dream_text)} chars")
+    except Exception as e:
+        logger.error(f"Voice transcription error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to process voice input"
+        )
+    finally:
+        upload.close()
+    
+    return _validate_dream_text(dream_text)
+
+
+def _validate_dream_text(dream_text: str) -> str:
+    """Reject dream texts that are too short or too long"""
+    
+    # Validate dream text length; short texts naming one lexicon symbol
+    # ("змея", "выпадают зубы") are the dreams the fast path answers
+    if len(dream_text) < 20 and not symbol_lexicon.match(dream_text):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Dream description must be at least 20 characters"
@@ -105,120 +150,182 @@ async def interpret_dream(
             detail="Dream description must not exceed 4000 characters"
         )
     
+    return dream_text
+
+
+async def _get_daily_limit_remaining(user: User, redis) -> int:
+    """Calculate remaining daily limit after the current dream"""
+    active_sub = user.active_subscription
+    daily_limit = active_sub.daily_limit if active_sub else 1
+    today_key = f"dream_count:{user.id}:{datetime.now().date()}"
+    dreams_today_str = await redis.get(today_key)
+    dreams_today = int(dreams_today_str) if dreams_today_str else 1
+    return max(0, daily_limit - dreams_today)
+
+
+def _get_subscription_type(user: User) -> str:
+    """Subscription type used as upstream AI priority"""
+    active_sub = user.active_subscription
+    return active_sub.type if active_sub else "free"
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post(
+    "/interpret",
+    response_model=DreamInterpretResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": DreamJobResponse}}
+)
+async def interpret_dream(
+    request: DreamInterpretRequest,
+    user: Annotated[User, Depends(check_dream_limit)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    openai_service: Annotated[OpenAIService, Depends(get_openai_service)],
+    background_tasks: BackgroundTasks,
+    redis = Depends(get_redis),
+    run_async: bool = Query(False, alias="async", description="Queue a job and return 202 with its id")
+):
+    """
+    Interpret a dream using AI
+    
+    This endpoint:
+    1. Validates the dream text/audio
+    2. Checks user's daily limit
+    3. Processes with GPT-4
+    4. Returns interpretation
+    5. Optionally saves to journal
+    
+    With async=true the dream is queued for a worker after validation and quota
+    reservation; the result is read from GET /jobs/{job_id} or /jobs/{job_id}/wait.
+    """
+    
+    dream_text = await _resolve_dream_text(request, openai_service)
+    
+    return await _interpret_text(
+        dream_text,
+        request.language,
+        request.include_similar,
+        user,
+        db,
+        openai_service,
+        background_tasks,
+        redis,
+        run_async
+    )
+
+
+@router.post(
+    "/interpret/voice",
+    response_model=DreamInterpretResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": DreamJobResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"audio": {"type": "string", "format": "binary"}},
+                        "required": ["audio"]
+                    }
+                },
+                "audio/*": {"schema": {"type": "string", "format": "binary"}}
+            }
+        }
+    }
+)
+async def interpret_voice_dream(
+    http_request: Request,
+    user: Annotated[User, Depends(check_dream_limit)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    openai_service: Annotated[OpenAIService, Depends(get_openai_service)],
+    background_tasks: BackgroundTasks,
+    redis = Depends(get_redis),
+    language: str = Query("ru", max_length=10),
+    include_similar: bool = Query(True, description="Include similar dreams in analysis"),
+    run_async: bool = Query(False, alias="async", description="Queue a job and return 202 with its id")
+):
+    """
+    Interpret a dream told as a voice note
+    
+    The clip is sent as multipart/form-data in the "audio" field or as a raw
+    audio/* body. It is spooled to a temporary file while it arrives, limited to
+    MAX_UPLOAD_SIZE, and handed to Whisper as a file; the response is the same
+    as for POST /interpret.
+    """
+    
+    upload = await read_audio_upload(http_request)
+    dream_text = await _transcribe_upload(upload, language, openai_service)
+    
+    return await _interpret_text(
+        dream_text,
+        language,
+        include_similar,
+        user,
+        db,
+        openai_service,
+        background_tasks,
+        redis,
+        run_async
+    )
+
+
+async def _interpret_text(
+    dream_text: str,
+    language: str,
+    include_similar: bool,
+    user: User,
+    db: AsyncSession,
+    openai_service: OpenAIService,
+    background_tasks: BackgroundTasks,
+    redis,
+    run_async: bool
+):
+    """Interpret validated dream text now, or queue it as a job"""
+    
+    if run_async:
+        return await _enqueue_interpretation(dream_text, language, include_similar, user, redis)
+    
     try:
-        # Create dream interpreter
-        interpreter = DreamInterpreter()
-        
-        # Get user context for better interpretation
-        user_context = None
-        if request.include_similar:
-            # Get user's recent dreams for context
-            recent_dreams = await db.execute(
-                select(Dream)
-                .where(and_(
-                    Dream.user_id == user.id,
-                    Dream.is_deleted == False
-                ))
-                .order_by(Dream.created_at.desc())
-                .limit(5)
-            )
-            recent_themes = []
-            for dream in recent_dreams.scalars():
-                if dream.interpretation and dream.interpretation.main_symbol:
-                    recent_themes.append(dream.interpretation.main_symbol)
-            
-            if recent_themes:
-                user_context = {
-                    "recent_themes": list(set(recent_themes)),
-                    "total_dreams": len(recent_themes)
-                }
-        
-        # Interpret the dream
-        interpretation = await interpreter.interpret_dream(
-            dream_text=dream_text,
-            user_context=user_context,
-            language=request.language,
-            include_similar=request.include_similar
-        )
-        
-        # Create dream record
-        dream = Dream(
+        result = await interpret_and_save(
+            db,
+            openai_service,
             user_id=user.id,
-            text=dream_text,
-            language=request.language
-        )
-        db.add(dream)
-        await db.flush()  # Get the ID
-        
-        # Save interpretation
-        interpretation.dream_id = dream.id
-        interpretation_db = DreamInterpretationDB(
-            dream_id=dream.id,
-            main_symbol=interpretation.main_symbol,
-            main_symbol_emoji=interpretation.main_symbol_emoji,
-            interpretation=interpretation.interpretation,
-            emotions=interpretation.emotions,
-            advice=interpretation.advice,
-            ai_model=interpretation.ai_model,
-            prompt_version=interpretation.prompt_version,
-            processing_time_ms=interpretation.processing_time_ms
+            dream_text=dream_text,
+            language=language,
+            include_similar=include_similar,
+            subscription_type=_get_subscription_type(user)
         )
-        db.add(interpretation_db)
-        
-        # Save dream embedding for similarity search
-        if request.include_similar:
-            embedding_service = EmbeddingService()
-            await embedding_service.update_dream_embedding(
-                dream_id=dream.id,
-                dream_text=dream_text,
-                db_session=db
-            )
+        if result.deferred:
+            background_tasks.add_task(result.deferred)
         
         # Increment user's daily count
         await increment_dream_count(user.id, redis)
         
-        # Commit transaction
-        await db.commit()
-        
-        # Get similar dreams if requested
-        similar_dreams = []
-        if request.include_similar:
-            embedding_service = EmbeddingService()
-            similar_results = await embedding_service.find_similar_dreams(
-                query_embedding=await embedding_service.create_embedding(dream_text),
-                limit=5,
-                user_id=user.id,
-                min_similarity=0.75,
-                db_session=db
-            )
-            
-            for similar_dream, similarity in similar_results:
-                if similar_dream.id != dream.id:
-                    similar_dreams.append({
-                        "id": str(similar_dream.id),
-                        "text": similar_dream.text[:200] + "...",
-                        "main_symbol": similar_dream.interpretation.main_symbol if similar_dream.interpretation else None,
-                        "similarity": round(similarity, 2),
-                        "created_at": similar_dream.created_at.isoformat()
-                    })
-        
         # Calculate remaining daily limit
-        active_sub = user.active_subscription
-        daily_limit = active_sub.daily_limit if active_sub else 1
-        today_key = f"dream_count:{user.id}:{datetime.now().date()}"
-        dreams_today_str = await redis.get(today_key)
-        dreams_today = int(dreams_today_str) if dreams_today_str else 1
-        daily_limit_remaining = max(0, daily_limit - dreams_today)
+        daily_limit_remaining = await _get_daily_limit_remaining(user, redis)
         
         # Return response
         return DreamInterpretResponse(
-            dream_id=dream.id,
-            interpretation=interpretation,
-            similar_dreams=similar_dreams[:3],  # Top 3 similar
+            dream_id=result.dream.id,
+            interpretation=result.interpretation,
+            similar_dreams=result.similar_dreams,
             daily_limit_remaining=daily_limit_remaining,
             is_saved=True
         )
         
+    except UpstreamBudgetTimeout as e:
+        logger.warning(f"Dream interpretation throttled: {e}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is busy, please try again shortly",
+            headers={"Retry-After": "10"}
+        )
+        
     except Exception as e:
         logger.error(f"Dream interpretation error: {e}")
         await db.rollback()
@@ -228,57 +335,234 @@ async def interpret_dream(
         )
 
 
+async def _enqueue_interpretation(
+    dream_text: str,
+    language: str,
+    include_similar: bool,
+    user: User,
+    redis
+) -> JSONResponse:
+    """Reserve quota, record the job and hand it to a worker"""
+    
+    # Reserved now so parallel jobs cannot exceed the limit; released if the job fails
+    await increment_dream_count(user.id, redis)
+    job = await interpret_job_store.create(
+        user_id=user.id,
+        quota_key=f"dream_count:{user.id}:{datetime.now().date()}",
+        daily_limit_remaining=await _get_daily_limit_remaining(user, redis)
+    )
+    
+    try:
+        interpret_dream_job.delay(
+            job["job_id"],
+            str(user.id),
+            dream_text,
+            language,
+            include_similar,
+            _get_subscription_type(user)
+        )
+    except Exception as e:
+        logger.error(f"Failed to enqueue interpretation job: {e}")
+        await redis.decr(job["quota_key"])
+        await interpret_job_store.update(job["job_id"], status="failed", error="Failed to queue dream")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Interpretation queue is unavailable, please try again shortly",
+            headers={"Retry-After": "10"}
+        )
+    
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=DreamJobResponse(**job).model_dump(mode="json"),
+        headers={"Location": f"/api/v1/dreams/jobs/{job['job_id']}"}
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=DreamJobResponse)
+async def get_interpretation_job(
+    job_id: UUID,
+    user: Annotated[User, Depends(get_current_active_user)]
+):
+    """State of an interpretation job, with the result once done"""
+    
+    job = await interpret_job_store.get(job_id, user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return DreamJobResponse(**job)
+
+
+@router.get("/jobs/{job_id}/wait")
+async def wait_interpretation_job(
+    job_id: UUID,
+    user: Annotated[User, Depends(get_current_active_user)],
+    timeout: float = Query(30.0, gt=0, le=120, description="Seconds to wait before returning the current state")
+):
+    """
+    Wait for an interpretation job as server-sent events
+    
+    Events:
+    - job: DreamJobResponse once the job is done or failed, or when the wait times out
+    - error: {"detail"} if the job does not exist
+    """
+    
+    async def event_stream():
+        job = await interpret_job_store.wait(
+            job_id,
+            user.id,
+            timeout=min(timeout, settings.INTERPRET_JOB_WAIT_TIMEOUT)
+        )
+        if not job:
+            yield _sse_event("error", {"detail": "Job not found"})
+            return
+        yield _sse_event("job", DreamJobResponse(**job).model_dump(mode="json"))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx buffering
+        }
+    )
+
+
+@router.post("/interpret/stream")
+async def interpret_dream_stream(
+    request: DreamInterpretRequest,
+    background_tasks: BackgroundTasks,
+    user: Annotated[User, Depends(check_dream_limit)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    openai_service: Annotated[OpenAIService, Depends(get_openai_service)],
+    redis = Depends(get_redis)
+):
+    """
+    Interpret a dream and stream the result as server-sent events
+    
+    Events:
+    - field: {"name", "value"} for main_symbol, main_symbol_emoji, emotions, advice...
+    - delta: {"name": "interpretation", "text"} while interpretation is generated
+    - done: {"dream_id", "interpretation", "daily_limit_remaining"} after saving
+    - error: {"detail"} if interpretation or saving failed
+    """
+    
+    dream_text = await _resolve_dream_text(request, openai_service)
+    
+    # Context is read before streaming starts, the request session closes after
+    user_context = None
+    if request.include_similar:
+        user_context = await DreamService(db).get_user_context(user.id)
+    
+    interpreter = DreamInterpreter(openai_service)
+    
+    async def event_stream():
+        try:
+            interpretation = None
+            async for event in interpreter.interpret_dream_stream(
+                dream_text=dream_text,
+                user_context=user_context,
+                language=request.language,
+                subscription_type=_get_subscription_type(user)
+            ):
+                if event["type"] == "done":
+                    interpretation = event["interpretation"]
+                elif event["type"] == "delta":
+                    yield _sse_event("delta", {"name": event["name"], "text": event["text"]})
+                else:
+                    yield _sse_event("field", {"name": event["name"], "value": event["value"]})
+            
+            # Persist once the full interpretation is known
+            async with database.async_session_factory() as session:
+                dream = await DreamService(session).save_interpretation(
+                    user_id=user.id,
+                    dream_text=dream_text,
+                    language=request.language,
+                    interpretation=interpretation
+                )
+                await session.commit()
+            
+            symbol_stats_store.interpretation_written(dream.id)
+            await DreamService.forget_journal_total(user.id)
+            await increment_dream_count(user.id, redis)
+            daily_limit_remaining = await _get_daily_limit_remaining(user, redis)
+            
+            # Runs after the response, also when the client closes the stream
+            # as soon as it has "done" (nothing may follow the final yield)
+            if request.include_similar:
+                background_tasks.add_task(
+                    store_dream_embedding, openai_service, dream.id, user.id, dream_text
+                )
+            
+            yield _sse_event("done", {
+                "dream_id": str(dream.id),
+                "interpretation": interpretation.model_dump(mode="json"),
+                "daily_limit_remaining": daily_limit_remaining,
+                "is_saved": True
+            })
+            
+        except Exception as e:
+            logger.error(f"Streaming dream interpretation error: {e}")
+            yield _sse_event("error", {"detail": "Failed to interpret dream"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx buffering
+        },
+        background=background_tasks
+    )
+
+
 @router.get("/", response_model=PaginatedResponse[DreamResponse])
 async def get_dreams(
     user: Annotated[User, Depends(get_current_active_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
-    pagination: Annotated[dict, Depends(get_pagination)],
+    pagination: Annotated[PaginationParams, Depends(get_pagination)],
     search: Optional[str] = Query(None, description="Search in dream text"),
-    tag: Optional[str] = Query(None, description="Filter by tag")
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(True, description="Also return total and pages")
 ):
-    """Get user's dream journal with pagination"""
+    """
+    Get user's dream journal with pagination
     
-    # Build query
-    query = select(Dream).where(
-        and_(
-            Dream.user_id == user.id,
-            Dream.is_deleted == False
-        )
-    )
+    Pages are read by keyset: pass next_cursor of a page as cursor to get the
+    next one, at the same cost however deep. page is the offset fallback for
+    clients without cursors. Without a search the total is cached and may lag
+    briefly; include_total=false skips it.
+    """
     
-    # Add search filter
-    if search:
-        query = query.where(Dream.text.ilike(f"%{search}%"))
+    dream_service = DreamService(db)
     
     # Add tag filter if implemented
     # if tag:
     #     query = query.join(DreamTag).where(DreamTag.tag == tag)
     
-    # Order by date
-    query = query.order_by(Dream.created_at.desc())
-    
-    # Get total count
-    count_query = select(func.count()).select_from(Dream).where(
-        and_(
-            Dream.user_id == user.id,
-            Dream.is_deleted == False
+    try:
+        dreams, next_cursor = await dream_service.list_dreams(
+            user.id,
+            limit=pagination.limit,
+            cursor=cursor,
+            offset=pagination.offset,
+            search=search
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
-    )
-    if search:
-        count_query = count_query.where(Dream.text.ilike(f"%{search}%"))
-    
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
-    
-    # Apply pagination
-    query = query.offset(pagination["offset"]).limit(pagination["limit"])
-    
-    # Load with interpretation
-    query = query.options(selectinload(Dream.interpretation))
     
-    # Execute query
-    result = await db.execute(query)
-    dreams = result.scalars().all()
+    total = None
+    if include_total:
+        if search:
+            total = await dream_service.count_dreams(user.id, search=search)
+        else:
+            total = await dream_service.journal_total(user.id)
     
     # Convert to response
     dream_responses = []
@@ -297,11 +581,43 @@ async def get_dreams(
     return PaginatedResponse.create(
         items=dream_responses,
         total=total,
-        page=pagination["page"],
-        limit=pagination["limit"]
+        page=None if cursor else pagination.page,
+        limit=pagination.limit,
+        next_cursor=next_cursor
     )
 
 
+@router.get("/symbols/popular", response_model=List[SymbolResponse])
+async def get_popular_symbols(
+    user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    limit: int = Query(10, ge=1, le=100),
+    days: Optional[int] = Query(None, ge=1, le=365, description="Count only the last N days")
+):
+    """Most frequent dream symbols across all journals"""
+    
+    symbols = await symbol_stats_store.popular(db, limit=limit, days=days)
+    return [SymbolResponse(**symbol) for symbol in symbols]
+
+
+@router.get("/symbols/{symbol}", response_model=SymbolResponse)
+async def get_symbol(
+    symbol: str,
+    user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Symbol count and the symbols dreamt most often alongside it"""
+    
+    stats = await symbol_stats_store.lookup(db, symbol)
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Symbol not found"
+        )
+    
+    return SymbolResponse(**stats)
+
+
 @router.get("/{dream_id}", response_model=DreamResponse)
 async def get_dream(
     dream_id: UUID,
@@ -328,13 +644,8 @@ async def get_dream(
             detail="Dream not found"
         )
     
-    # Get similar dreams count
-    embedding_service = EmbeddingService()
-    context = await embedding_service.get_dream_context(
-        dream_id=dream.id,
-        db_session=db,
-        context_size=10
-    )
+    # Precomputed in the background, a single lookup here
+    context = await similarity_context_store.get(db, dream.id, user.id)
     
     return DreamResponse(
         id=dream.id,
@@ -344,7 +655,10 @@ async def get_dream(
         created_at=dream.created_at,
         interpretation=dream.interpretation,
         tags=[],  # TODO: Load tags
-        similar_dreams_count=context.get("similar_count", 0)
+        similar_dreams_count=context.similar_count if context else 0,
+        similar_dream_ids=context.similar_dream_ids if context else [],
+        common_symbols=context.common_symbols if context else [],
+        recurring_emotions=context.recurring_emotions if context else []
     )
 
 
@@ -353,7 +667,8 @@ async def update_dream(
     dream_id: UUID,
     update_data: DreamUpdate,
     user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    openai_service: Annotated[OpenAIService, Depends(get_openai_service)]
 ):
     """Update dream (edit text or soft delete)"""
     
@@ -367,15 +682,17 @@ async def update_dream(
         )
     
     # Update fields
-    if update_data.text is not None:
+    text_changed = update_data.text is not None and update_data.text != dream.text
+    if text_changed:
         dream.text = update_data.text
         
         # Update embedding if text changed
-        embedding_service = EmbeddingService()
+        embedding_service = EmbeddingService(openai_service)
         await embedding_service.update_dream_embedding(
             dream_id=dream.id,
             dream_text=update_data.text,
-            db_session=db
+            db_session=db,
+            user_id=user.id
         )
     
     if update_data.is_deleted is not None:
@@ -383,6 +700,15 @@ async def update_dream(
     
     await db.commit()
     
+    if update_data.is_deleted is not None:
+        await user_vector_cache.invalidate(user.id)
+        await DreamService.forget_journal_total(user.id)
+    
+    if dream.is_deleted:
+        similarity_context_store.dream_removed(dream.id, user.id)
+    elif text_changed or update_data.is_deleted is not None:
+        similarity_context_store.dream_changed(dream.id, user.id)
+    
     return SuccessResponse(
         message="Dream updated successfully"
     )
@@ -408,20 +734,41 @@ async def delete_dream(
     # Hard delete
     await db.delete(dream)
     await db.commit()
+    await DreamService.forget_journal_total(user.id)
+    await user_vector_cache.invalidate(user.id)
+    similarity_context_store.dream_removed(dream_id, user.id)
     
     return SuccessResponse(
         message="Dream deleted permanently"
     )
 
 
-@router.post("/{dream_id}/tts", response_model=dict)
+@router.api_route(
+    "/{dream_id}/tts",
+    methods=["GET", "POST"],
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"audio/mpeg": {}}},
+        status.HTTP_206_PARTIAL_CONTENT: {"content": {"audio/mpeg": {}}},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Audio not modified"},
+        status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: {"description": "Range not satisfiable"}
+    }
+)
 async def generate_tts(
     dream_id: UUID,
+    http_request: Request,
     user: Annotated[User, Depends(get_current_active_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
-    voice: str = Query("nova", description="Voice to use")
+    openai_service: Annotated[OpenAIService, Depends(get_openai_service)],
+    voice: str = Query("nova", pattern="^(alloy|echo|fable|onyx|nova|shimmer)$", description="Voice to use")
 ):
-    """Generate TTS audio for dream interpretation"""
+    """
+    TTS audio of a dream interpretation as audio/mpeg
+    
+    The first request streams the audio as it is generated and stores it under a
+    hash of text, voice, model and speed. Later requests are served from storage
+    with Range and If-None-Match support, so players can seek and cache it.
+    """
     
     # Check if user has TTS access
     active_sub = user.active_subscription
@@ -448,26 +795,107 @@ async def generate_tts(
             detail="Dream interpretation not found"
         )
     
+    text = dream.interpretation.interpretation
+    key = tts_storage.key(text, voice, settings.TTS_MODEL, settings.TTS_SPEED)
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": "private, max-age=31536000, immutable"
+    }
+    
+    size = await tts_storage.size(key)
+    if size is not None:
+        TTS_CACHE_REQUESTS.labels(result="hit").inc()
+        return _stored_audio_response(http_request, key, size, headers)
+    TTS_CACHE_REQUESTS.labels(result="miss").inc()
+    
+    chunks = openai_service.text_to_speech_stream(
+        text=text,
+        voice=voice,
+        model=settings.TTS_MODEL,
+        speed=settings.TTS_SPEED,
+        chunk_size=settings.TTS_STREAM_CHUNK_SIZE
+    )
     try:
-        # Generate TTS
-        openai_service = OpenAIService()
-        audio_data = await openai_service.text_to_speech(
-            text=dream.interpretation.interpretation,
-            voice=voice
-        )
-        
-        # Encode to base64 for response
-        audio_base64 = base64.b64encode(audio_data).decode()
-        
-        return {
-            "audio": audio_base64,
-            "format": "mp3",
-            "voice": voice
-        }
-        
+        # Upstream errors surface as 500 before any audio is sent
+        first_chunk = await anext(chunks)
     except Exception as e:
         logger.error(f"TTS generation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate audio"
-        )
\ No newline at end of file
+        )
+    
+    async def audio_stream():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    
+    # No Content-Length yet, so the response is sent chunked
+    return StreamingResponse(
+        tts_storage.write_through(key, audio_stream()),
+        media_type="audio/mpeg",
+        headers=headers
+    )
+
+
+def _stored_audio_response(
+    http_request: Request,
+    key: str,
+    size: int,
+    headers: dict
+) -> Response:
+    """Stored audio, whole or the requested byte range"""
+    
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    if http_request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    byte_range = _parse_range(http_request.headers.get("range"), size)
+    if byte_range is None:
+        return StreamingResponse(
+            tts_storage.read(key),
+            media_type="audio/mpeg",
+            headers={**headers, "Content-Length": str(size)}
+        )
+    
+    start, end = byte_range
+    return StreamingResponse(
+        tts_storage.read(key, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="audio/mpeg",
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1)
+        }
+    )
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single bytes range; None to send the whole file.
+    Multiple ranges are answered with the whole file, as RFC 9110 allows.
+    """
+    
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
@@ -0,0 +1,95 @@
+# ai_context_v3
+"""
+🎯 main_goal: Process-wide OpenAI HTTP client and tokenizer registry
+⚡ critical_requirements:
+   - One pooled keep-alive AsyncOpenAI client per process
+   - Configurable connection pool limits
+   - Tokenizers loaded once per model
+   - Lifecycle managed by the app lifespan
+📥 inputs_outputs: Settings -> Shared AsyncOpenAI client and tiktoken encodings
+🔧 functions_list:
+   - init_ai_clients: Create pooled client and preload tokenizer
+   - close_ai_clients: Close pooled client
+   - get_openai_client: Get shared AsyncOpenAI client
+   - get_tokenizer: Get cached tiktoken encoding for a model
+🚫 forbidden_changes: Do not create per-request clients
+🧪 tests: test_ai_clients.py with lifecycle tests
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+import tiktoken
+from openai import AsyncOpenAI
+from loguru import logger
+
+from app.core.config import settings
+
+# Global OpenAI client and tokenizer registry
+openai_client: Optional[AsyncOpenAI] = None
+_tokenizers: Dict[str, tiktoken.Encoding] = {}
+
+
+async def init_ai_clients() -> None:
+    """Initialize pooled OpenAI client and preload tokenizer"""
+    global openai_client
+
+    logger.info(
+        f"Creating OpenAI client pool: max_connections={settings.OPENAI_MAX_CONNECTIONS}, "
+        f"keepalive={settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS}"
+    )
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.OPENAI_REQUEST_TIMEOUT,
+            connect=settings.OPENAI_CONNECT_TIMEOUT
+        ),
+    )
+
+    openai_client = AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        http_client=http_client,
+        max_retries=0,  # Retries are handled by OpenAIService
+    )
+
+    # Loading BPE ranks is blocking file/network IO
+    await asyncio.to_thread(get_tokenizer, settings.OPENAI_TOKENIZER_MODEL)
+    logger.info("OpenAI client initialized successfully")
+
+
+async def close_ai_clients() -> None:
+    """Close pooled OpenAI client"""
+    global openai_client
+
+    if openai_client:
+        await openai_client.close()
+        openai_client = None
+        logger.info("OpenAI client closed")
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get shared OpenAI client"""
+    if not openai_client:
+        raise RuntimeError("OpenAI client not initialized. Call init_ai_clients() first.")
+    return openai_client
+
+
+def get_tokenizer(model: str = "gpt-4") -> tiktoken.Encoding:
+    """
+    Get tiktoken encoding for model, loading it once per process.
+    Unknown models fall back to cl100k_base.
+    """
+    encoding = _tokenizers.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _tokenizers[model] = encoding
+    return encoding
@@ -0,0 +1,40 @@
+# ai_context_v3
+"""
+🎯 main_goal: Celery application for background jobs
+⚡ critical_requirements:
+   - Redis broker (REDIS_URL unless CELERY_BROKER_URL is set)
+   - Late acks and prefetch 1, so a crashed worker's job is redelivered
+   - JSON payloads only, results are kept by the jobs themselves
+📥 inputs_outputs: Settings -> Configured Celery app
+🔧 functions_list: celery_app instance
+🚫 forbidden_changes: Do not enable pickle serialization
+🧪 tests: test_celery_app.py
+"""
+
+from celery import Celery
+
+from app.core.config import settings
+
+INTERPRET_QUEUE = "interpret"
+
+celery_app = Celery(
+    "razgazdayson",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    include=["app.worker.tasks"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    task_ignore_result=True,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_default_queue=INTERPRET_QUEUE,
+    # Jobs time out on their own (the threads pool ignores Celery time limits);
+    # on prefork this hard limit is a backstop that leaves them time to fail cleanly
+    task_time_limit=settings.INTERPRET_JOB_TIME_LIMIT + 30,
+    broker_connection_retry_on_startup=True,
+    # Redeliver unacked jobs after this long (must exceed the job time limit)
+    broker_transport_options={"visibility_timeout": settings.INTERPRET_JOB_TIME_LIMIT * 2},
+)
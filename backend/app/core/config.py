@@ -68,6 +68,111 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_MAX_TOKENS: int = 1000
     OPENAI_TEMPERATURE: float = 0.7
+    OPENAI_TOKENIZER_MODEL: str = "gpt-4"
+    
+    # OpenAI HTTP connection pool
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0
+    OPENAI_REQUEST_TIMEOUT: float = 120.0
+    OPENAI_CONNECT_TIMEOUT: float = 10.0
+    
+    # AI response cache (Redis hot tier, Postgres L2)
+    AI_CACHE_REDIS_TTL: int = 3600
+    AI_CACHE_DB_ENABLED: bool = True
+    AI_CACHE_DB_TTL_HOURS: int = 168
+    AI_CACHE_WRITE_BATCH_SIZE: int = 100
+    AI_CACHE_WRITE_QUEUE_SIZE: int = 10000
+    AI_CACHE_FLUSH_INTERVAL: float = 2.0
+    AI_CACHE_CLEANUP_INTERVAL: int = 3600
+    
+    # Coalescing of identical in-flight completions
+    AI_SINGLE_FLIGHT_LOCK_TTL: int = 90
+    AI_SINGLE_FLIGHT_WAIT_TIMEOUT: float = 60.0
+    
+    # Upstream budget governor
+    OPENAI_GOVERNOR_ENABLED: bool = True
+    OPENAI_RPM_LIMIT: int = 500
+    OPENAI_TPM_LIMIT: int = 300000
+    OPENAI_GOVERNOR_FREE_RESERVE: float = 0.2  # Budget share free users cannot use
+    OPENAI_GOVERNOR_MAX_WAIT: float = 30.0
+    OPENAI_GOVERNOR_COOLDOWN: float = 5.0
+    
+    # Hedging, circuit breaker and retry budget
+    OPENAI_HEDGING_ENABLED: bool = False
+    OPENAI_LATENCY_WINDOW: int = 200
+    OPENAI_HEDGE_MIN_SAMPLES: int = 20
+    OPENAI_HEDGE_MIN_DELAY: float = 1.0
+    OPENAI_CIRCUIT_FAILURE_RATE: float = 0.5
+    OPENAI_CIRCUIT_MIN_REQUESTS: int = 20
+    OPENAI_CIRCUIT_WINDOW: float = 60.0
+    OPENAI_CIRCUIT_OPEN_SECONDS: float = 30.0
+    OPENAI_RETRY_BUDGET_RATIO: float = 0.1  # Retries+hedges per original request
+    OPENAI_RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    OPENAI_RETRY_BUDGET_MAX: int = 50
+    
+    # Embeddings
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"  # Used when the model registry is unavailable
+    EMBEDDING_DIMENSIONS: int = 1536
+    EMBEDDING_REGISTRY_REFRESH_SECONDS: float = 30.0  # How fast workers see a cutover
+    EMBEDDING_BACKFILL_BATCH_SIZE: int = 500
+    EMBEDDING_LOCAL_IDF_PATH: Optional[str] = None  # IDF weights (.npy) for local/* models
+    EMBEDDING_BATCH_MAX_INPUTS: int = 256
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000
+    EMBEDDING_MAX_CONCURRENT_BATCHES: int = 4
+    EMBEDDING_CACHE_TTL: int = 30 * 24 * 3600  # 30 days
+    
+    # Vector search
+    VECTOR_INDEX_TYPE: str = "ivfflat"  # ivfflat or hnsw
+    VECTOR_IVFFLAT_LISTS: int = 100
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_INDEX_PRECISION: str = "full"  # full or half (halfvec index, rescored at full precision)
+    VECTOR_HALF_RESCORE_FACTOR: int = 2  # halfvec shortlist size per ANN candidate
+    VECTOR_SEARCH_RECALL_TARGET: float = 0.95
+    VECTOR_EXACT_SCAN_MAX_ROWS: int = 2000  # Per-user journals up to this size are scanned exactly
+    VECTOR_ANN_OVERFETCH: int = 4  # ANN candidates per requested result before post-filtering
+    USER_VECTOR_CACHE_ENABLED: bool = True
+    USER_VECTOR_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Per worker
+    
+    # Precomputed similarity context per dream
+    SIMILARITY_CONTEXT_ENABLED: bool = True
+    SIMILARITY_CONTEXT_SIZE: int = 10  # Similar dreams kept per dream
+    SIMILARITY_CONTEXT_MIN_SIMILARITY: float = 0.7
+    SIMILARITY_CONTEXT_QUEUE_SIZE: int = 10000
+    
+    # Symbol statistics
+    SYMBOL_STATS_ENABLED: bool = True
+    SYMBOL_STATS_WRITE_BATCH_SIZE: int = 500
+    SYMBOL_STATS_QUEUE_SIZE: int = 10000
+    SYMBOL_STATS_FLUSH_INTERVAL: float = 5.0
+    SYMBOL_COOCCURRENCE_WINDOW: int = 5  # Previous dreams of the user paired with a new one
+    SYMBOL_STATS_COMPACT_INTERVAL: int = 3600
+    SYMBOL_DAILY_RETENTION_DAYS: int = 400
+    SYMBOL_COOCCURRENCE_MIN_COUNT: int = 2  # Rarer pairs are pruned once idle
+    SYMBOL_COOCCURRENCE_IDLE_DAYS: int = 90
+    
+    # Symbol lexicon fast path (short single-symbol dreams without GPT)
+    SYMBOL_FAST_PATH_TIERS: List[str] = ["free", "trial"]  # Subscription types it applies to
+    SYMBOL_FAST_PATH_MAX_WORDS: int = 12
+    SYMBOL_FAST_PATH_MAX_EXTRA_WORDS: int = 3  # Words besides the symbol and filler
+    SYMBOL_FAST_PATH_CACHE_TTL: int = 7 * 24 * 3600
+    
+    # Asynchronous interpretation jobs (Celery)
+    CELERY_BROKER_URL: Optional[str] = None  # Defaults to REDIS_URL
+    INTERPRET_JOB_TTL: int = 24 * 3600  # How long job state and results are kept
+    INTERPRET_JOB_TIME_LIMIT: int = 300  # Seconds before a running job is failed
+    INTERPRET_JOB_MAX_RETRIES: int = 3  # Retries of jobs throttled by the upstream governor
+    INTERPRET_JOB_WAIT_TIMEOUT: float = 60.0  # Max wait of the SSE endpoint
+    
+    # Dream journal
+    DREAM_JOURNAL_TOTAL_TTL: int = 300  # Cached journal size, dropped on adds and deletes
+    
+    # Text to speech audio storage (content-addressed MP3 files)
+    TTS_MODEL: str = "tts-1"
+    TTS_SPEED: float = 1.0
+    TTS_STORAGE_DIR: str = "storage/tts"  # Local directory or a mounted object-store bucket
+    TTS_STREAM_CHUNK_SIZE: int = 64 * 1024
     
     # Rate limiting
     RATE_LIMIT_PER_USER_DAILY: int = 1000
@@ -93,7 +198,7 @@ class Settings(BaseSettings):
     
     # File uploads
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
-    ALLOWED_AUDIO_FORMATS: List[str] = ["mp3", "wav", "ogg", "m4a"]
+    ALLOWED_AUDIO_FORMATS: List[str] = ["mp3", "wav", "ogg", "m4a", "webm"]
     
     model_config = SettingsConfigDict(
         env_file=".env",
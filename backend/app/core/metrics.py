@@ -0,0 +1,165 @@
+# ai_context_v3
+"""
+🎯 main_goal: Prometheus metrics for application internals
+⚡ critical_requirements:
+   - Registered once on the default registry
+   - Exposed by the Instrumentator /metrics endpoint
+   - Low-cardinality labels only
+📥 inputs_outputs: None -> Prometheus metric objects
+🔧 functions_list:
+   - AI_GOVERNOR_*: Upstream budget governor metrics
+   - AI_HEDGED_*, AI_CIRCUIT_*, AI_RETRY_*: Resilience metrics
+   - AI_UPSTREAM_*, AI_TOKENS, AI_CACHE_*: Upstream call metrics
+   - track_upstream: Time an upstream call per model and operation
+   - track_stage: Time a stage of dream interpretation
+   - SYMBOL_FAST_PATH_REQUESTS: Symbol lexicon fast path hit rate
+   - VECTOR_*: Vector search metrics
+   - TTS_CACHE_REQUESTS: TTS audio storage hit rate
+🚫 forbidden_changes: Do not use user ids or prompts as label values
+🧪 tests: test_metrics.py
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# Upstream budget governor
+AI_GOVERNOR_QUEUE_WAIT = Histogram(
+    "ai_governor_queue_wait_seconds",
+    "Time requests wait for upstream RPM/TPM budget",
+    ["model", "priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+AI_GOVERNOR_QUEUE_DEPTH = Gauge(
+    "ai_governor_queue_depth",
+    "Requests waiting for upstream budget in this worker",
+    ["model"],
+)
+AI_GOVERNOR_TIMEOUTS = Counter(
+    "ai_governor_timeouts_total",
+    "Requests rejected after waiting too long for upstream budget",
+    ["model", "priority"],
+)
+AI_GOVERNOR_THROTTLED = Counter(
+    "ai_governor_throttled_total",
+    "Upstream 429 responses reported to the governor",
+    ["model"],
+)
+
+# Hedging, circuit breaker and retry budget
+AI_HEDGED_REQUESTS = Counter(
+    "ai_hedged_requests_total",
+    "Hedged upstream requests by outcome",
+    ["model", "outcome"],
+)
+AI_CIRCUIT_STATE = Gauge(
+    "ai_circuit_state",
+    "Upstream circuit state (0 closed, 1 half-open, 2 open)",
+    ["model"],
+)
+AI_CIRCUIT_REJECTIONS = Counter(
+    "ai_circuit_rejections_total",
+    "Calls short-circuited while the breaker was open",
+    ["model"],
+)
+AI_RETRY_BUDGET_EXHAUSTED = Counter(
+    "ai_retry_budget_exhausted_total",
+    "Retries or hedges skipped because the budget was empty",
+    ["kind"],
+)
+
+# Upstream AI calls
+AI_UPSTREAM_LATENCY = Histogram(
+    "ai_upstream_latency_seconds",
+    "Latency of upstream AI API calls",
+    ["model", "operation", "status"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 45, 60, 120),
+)
+AI_TOKENS = Counter(
+    "ai_tokens_total",
+    "Tokens consumed by upstream AI calls",
+    ["model", "operation", "kind"],
+)
+AI_CACHE_REQUESTS = Counter(
+    "ai_cache_requests_total",
+    "AI cache lookups by cache tier and result",
+    ["cache", "result"],
+)
+AI_RETRIES = Counter(
+    "ai_retries_total",
+    "Retried upstream AI calls",
+    ["model", "operation"],
+)
+AI_FALLBACKS = Counter(
+    "ai_fallbacks_total",
+    "Fallback interpretations returned instead of AI output",
+    ["reason"],
+)
+AI_JSON_PARSE_FAILURES = Counter(
+    "ai_json_parse_failures_total",
+    "AI responses that were not valid JSON",
+    ["operation"],
+)
+
+# Dream interpretation pipeline
+DREAM_INTERPRET_STAGE = Histogram(
+    "dream_interpret_stage_seconds",
+    "Duration of dream interpretation stages",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+SYMBOL_FAST_PATH_REQUESTS = Counter(
+    "symbol_fast_path_requests_total",
+    "Symbol lexicon fast path lookups by result (curated, cached, no_entry, no_match)",
+    ["tier", "result"],
+)
+
+
+@contextmanager
+def track_upstream(model: str, operation: str) -> Iterator[None]:
+    """Observe upstream call latency, labelled ok or error"""
+    started = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        AI_UPSTREAM_LATENCY.labels(
+            model=model, operation=operation, status=status
+        ).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Observe duration of one interpretation stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        DREAM_INTERPRET_STAGE.labels(stage=stage).observe(time.perf_counter() - started)
+
+# Vector search
+VECTOR_SEARCH_PLANS = Counter(
+    "vector_search_plans_total",
+    "Similarity searches by chosen plan (exact or ann)",
+    ["plan"],
+)
+USER_VECTOR_CACHE_BYTES = Gauge(
+    "user_vector_cache_bytes",
+    "Memory held by cached per-user embedding matrices in this worker",
+)
+USER_VECTOR_CACHE_EVICTIONS = Counter(
+    "user_vector_cache_evictions_total",
+    "User matrices evicted to stay under the memory cap",
+)
+
+# Text to speech
+TTS_CACHE_REQUESTS = Counter(
+    "tts_cache_requests_total",
+    "TTS requests by storage result (hit or miss)",
+    ["result"],
+)
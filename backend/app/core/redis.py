@@ -11,6 +11,7 @@
    - init_redis: Initialize Redis connection
    - close_redis: Close Redis connection
    - get_redis: Get Redis client
+   - get_binary_redis: Get Redis client for raw bytes values
    - cache_key: Generate cache keys
 🚫 forbidden_changes: Do not use sync Redis operations
 🧪 tests: test_redis.py with cache operation tests
@@ -23,13 +24,14 @@ from loguru import logger
 
 from app.core.config import settings
 
-# Global Redis client
+# Global Redis clients
 redis_client: Optional[redis.Redis] = None
+redis_binary_client: Optional[redis.Redis] = None
 
 
 async def init_redis() -> None:
     """Initialize Redis connection"""
-    global redis_client
+    global redis_client, redis_binary_client
     
     logger.info(f"Connecting to Redis: {settings.REDIS_HOST}:{settings.REDIS_PORT}")
     
@@ -40,6 +42,13 @@ async def init_redis() -> None:
         max_connections=50,
     )
     
+    # Separate pool without response decoding for packed binary values
+    redis_binary_client = redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=False,
+        max_connections=20,
+    )
+    
     # Test connection
     await redis_client.ping()
     logger.info("Redis connected successfully")
@@ -47,7 +56,10 @@ async def init_redis() -> None:
 
 async def close_redis() -> None:
     """Close Redis connection"""
-    global redis_client
+    global redis_client, redis_binary_client
+    
+    if redis_binary_client:
+        await redis_binary_client.close()
     
     if redis_client:
         await redis_client.close()
@@ -61,6 +73,13 @@ def get_redis() -> redis.Redis:
     return redis_client
 
 
+def get_binary_redis() -> redis.Redis:
+    """Get Redis client that returns raw bytes"""
+    if not redis_binary_client:
+        raise RuntimeError("Redis not initialized. Call init_redis() first.")
+    return redis_binary_client
+
+
 def cache_key(prefix: str, *args) -> str:
     """
     Generate cache key with prefix.
@@ -32,6 +32,10 @@ from app.api.v1 import health, dreams, auth, users, subscriptions
 from app.core.config import settings
 from app.core.database import init_db, close_db
 from app.core.redis import init_redis, close_redis
+from app.core.ai_clients import init_ai_clients, close_ai_clients
+from app.services.ai.response_cache import response_cache_store
+from app.services.ai.similarity_context import similarity_context_store
+from app.services.symbol_stats import symbol_stats_store
 from app.core.rate_limit import limiter
 from app.errors.handlers import setup_exception_handlers
 
@@ -47,6 +51,18 @@ async def lifespan(app: FastAPI):
     # Initialize Redis
     await init_redis()
     
+    # Initialize shared OpenAI client pool and tokenizer
+    await init_ai_clients()
+    
+    # Start write-behind writer for the database AI cache tier
+    await response_cache_store.start()
+    
+    # Start background maintenance of per-dream similarity context
+    await similarity_context_store.start()
+    
+    # Start batched writer of global symbol statistics
+    await symbol_stats_store.start()
+    
     # Initialize Sentry if configured
     if settings.SENTRY_DSN:
         sentry_sdk.init(
@@ -60,6 +76,10 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("Shutting down Razgazdayson API...")
+    await symbol_stats_store.stop()
+    await similarity_context_store.stop()
+    await response_cache_store.stop()
+    await close_ai_clients()
     await close_db()
     await close_redis()
 
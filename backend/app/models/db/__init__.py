@@ -14,7 +14,10 @@ from .dream import Dream, DreamInterpretation, DreamTag
 from .subscription import Subscription
 from .user_stats import UserStats
 from .ai_cache import AIResponseCache
-from .dream_embedding import DreamEmbedding
+from .dream_embedding import DreamEmbedding, HalfVector
+from .embedding_model import EmbeddingModel
+from .similarity_context import DreamSimilarityContext
+from .symbol_stats import Symbol, SymbolCooccurrence, SymbolDailyCount
 
 __all__ = [
     "Base",
@@ -25,5 +28,11 @@ __all__ = [
     "Subscription",
     "UserStats",
     "AIResponseCache",
-    "DreamEmbedding"
+    "DreamEmbedding",
+    "HalfVector",
+    "EmbeddingModel",
+    "DreamSimilarityContext",
+    "Symbol",
+    "SymbolCooccurrence",
+    "SymbolDailyCount"
 ]
\ No newline at end of file
@@ -13,7 +13,7 @@
 
 from datetime import datetime, timedelta
 
-from sqlalchemy import String, JSON, UniqueConstraint
+from sqlalchemy import Index, String, JSON, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -44,6 +44,8 @@ class AIResponseCache(Base):
     # Unique constraint on prompt_hash + model
     __table_args__ = (
         UniqueConstraint("prompt_hash", "model", name="uq_prompt_hash_model"),
+        # Same name as migration 0008, so create_all and the migration agree
+        Index("idx_ai_response_cache_expires_at", "expires_at"),
     )
     
     @property
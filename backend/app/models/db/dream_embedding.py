@@ -6,8 +6,10 @@
    - Relationship to dreams
    - Metadata JSON field
 📥 inputs_outputs: None -> DreamEmbedding ORM model
-🔧 functions_list: DreamEmbedding table model with vector column
-🚫 forbidden_changes: Do not change vector dimensions
+🔧 functions_list:
+   - DreamEmbedding: Table model with vector column
+   - HalfVector: halfvec type for half-precision index expressions
+🚫 forbidden_changes: Dimensions are per model (embedding_models), not per column
 🧪 tests: test_dream_embedding_model.py
 """
 
@@ -25,6 +27,14 @@ if TYPE_CHECKING:
     from .dream import Dream
 
 
+class HalfVector(Vector):
+    """pgvector halfvec, used to cast vectors for half-precision indexes"""
+    cache_ok = True
+    
+    def get_col_spec(self, **kw) -> str:
+        return f"HALFVEC({self.dim})"
+
+
 class DreamEmbedding(Base):
     """Dream embedding model for vector similarity search"""
     __tablename__ = "dream_embeddings"
@@ -38,7 +48,7 @@ class DreamEmbedding(Base):
         index=True
     )
     embedding: Mapped[List[float]] = mapped_column(
-        Vector(1536),  # OpenAI ada-002 dimension
+        Vector(),  # Dimension depends on the model, see EmbeddingModel
         nullable=True
     )
     model: Mapped[str] = mapped_column(
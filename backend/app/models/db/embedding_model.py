@@ -0,0 +1,64 @@
+# ai_context_v3
+"""
+🎯 main_goal: SQLAlchemy EmbeddingModel registry of embedding models
+⚡ critical_requirements: 
+   - Dimension per registered model
+   - Exactly one active model (read path)
+   - Backfill status and resume cursor
+📥 inputs_outputs: None -> EmbeddingModel ORM model
+🔧 functions_list: EmbeddingModel table model
+🚫 forbidden_changes: Do not change dimensions of a registered model
+🧪 tests: test_embedding_model.py
+"""
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class EmbeddingModel(Base):
+    """Embedding model registered for dream vectors"""
+    __tablename__ = "embedding_models"
+    __table_args__ = {"schema": "vector_store"}
+    
+    # Columns
+    name: Mapped[str] = mapped_column(
+        String(50),
+        unique=True,
+        nullable=False
+    )  # Value of dream_embeddings.model
+    provider_model: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False
+    )  # Model name sent to the embeddings API
+    dimensions: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False
+    )
+    is_active: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default="false"
+    )
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default="backfilling",
+        server_default="backfilling"
+    )  # backfilling, ready, retired
+    backfill_cursor: Mapped[Optional[UUID]] = mapped_column(
+        PG_UUID(as_uuid=True),
+        nullable=True
+    )  # Last dream id processed by the backfill
+    activated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+    
+    def __repr__(self) -> str:
+        return f"<EmbeddingModel(name={self.name}, dimensions={self.dimensions}, active={self.is_active})>"
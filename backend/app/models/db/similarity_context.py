@@ -0,0 +1,63 @@
+# ai_context_v3
+"""
+🎯 main_goal: SQLAlchemy DreamSimilarityContext model, precomputed per dream
+⚡ critical_requirements: 
+   - One row per dream, read by dream_id
+   - Top similar dreams with the fields needed to re-aggregate without queries
+   - Array of similar ids (GIN) to find rows affected by a journal change
+📥 inputs_outputs: None -> DreamSimilarityContext ORM model
+🔧 functions_list: DreamSimilarityContext table model
+🚫 forbidden_changes: Do not compute context on the read path
+🧪 tests: test_similarity_context_model.py
+"""
+
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import Boolean, Float, ForeignKey, Integer, String, JSON, Index
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class DreamSimilarityContext(Base):
+    """Similar dreams, common symbols and recurring emotions of one dream"""
+    __tablename__ = "dream_similarity_contexts"
+    
+    # Columns
+    dream_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("dreams.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True
+    )
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    model: Mapped[str] = mapped_column(String(50), nullable=False)  # Embedding model searched
+    similar_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    similar_dream_ids: Mapped[List[UUID]] = mapped_column(
+        ARRAY(PG_UUID(as_uuid=True)),
+        default=list,
+        server_default="{}"
+    )
+    # [{"id", "similarity", "main_symbol", "emotions"}], best first
+    similar: Mapped[list] = mapped_column(JSON, default=list, server_default="[]")
+    common_symbols: Mapped[list] = mapped_column(JSON, default=list, server_default="[]")
+    recurring_emotions: Mapped[list] = mapped_column(JSON, default=list, server_default="[]")
+    average_similarity: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    is_stale: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    
+    __table_args__ = (
+        Index(
+            "idx_similarity_contexts_similar_ids",
+            "similar_dream_ids",
+            postgresql_using="gin"
+        ),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<DreamSimilarityContext(dream_id={self.dream_id}, similar_count={self.similar_count})>"
@@ -0,0 +1,90 @@
+# ai_context_v3
+"""
+🎯 main_goal: SQLAlchemy models for global dream symbol statistics
+⚡ critical_requirements:
+   - One row per normalized (case-folded, lemmatized) symbol
+   - Top-N by count and related symbols are index scans
+   - Co-occurrence stored in both directions
+   - Per-day counts for trends, pruned by compaction
+📥 inputs_outputs: None -> Symbol, SymbolCooccurrence, SymbolDailyCount ORM models
+🔧 functions_list: Symbol statistics table models
+🚫 forbidden_changes: Do not scan dream_interpretations for statistics
+🧪 tests: test_symbol_stats_models.py
+"""
+
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Symbol(Base):
+    """Normalized dream symbol with its total count"""
+    __tablename__ = "symbols"
+
+    # Columns
+    name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)  # Normalized key
+    display: Mapped[str] = mapped_column(String(255), nullable=False)  # First seen spelling
+    emoji: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<Symbol(name={self.name}, count={self.count})>"
+
+
+class SymbolCooccurrence(Base):
+    """How often two symbols appear close together in one user's journal"""
+    __tablename__ = "symbol_cooccurrences"
+
+    # Columns
+    symbol_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("symbols.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    related_symbol_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("symbols.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("symbol_id", "related_symbol_id", name="uq_symbol_cooccurrences_pair"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SymbolCooccurrence(symbol_id={self.symbol_id}, related={self.related_symbol_id}, count={self.count})>"
+
+
+class SymbolDailyCount(Base):
+    """Occurrences of a symbol on one UTC day"""
+    __tablename__ = "symbol_daily_counts"
+
+    # Columns
+    symbol_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("symbols.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    __table_args__ = (
+        UniqueConstraint("symbol_id", "day", name="uq_symbol_daily_counts_day"),
+        Index("idx_symbol_daily_counts_day", "day", "symbol_id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SymbolDailyCount(symbol_id={self.symbol_id}, day={self.day}, count={self.count})>"
+
+
+# Top-N and related lookups read these in index order
+Index("idx_symbols_count", Symbol.count.desc())
+Index("idx_symbol_cooccurrences_top", SymbolCooccurrence.symbol_id, SymbolCooccurrence.count.desc())
@@ -32,27 +32,30 @@ class PaginationParams(BaseModel):
 class PaginatedResponse(BaseModel, Generic[T]):
     """Generic paginated response schema"""
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when the total was not requested
+    page: Optional[int] = None  # None for cursor pages
     limit: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # None on the last page
     
     @classmethod
     def create(
         cls,
         items: List[T],
-        total: int,
-        page: int,
-        limit: int
+        total: Optional[int],
+        page: Optional[int],
+        limit: int,
+        next_cursor: Optional[str] = None
     ) -> "PaginatedResponse[T]":
         """Create paginated response"""
-        pages = (total + limit - 1) // limit
+        pages = (total + limit - 1) // limit if total is not None else None
         return cls(
             items=items,
             total=total,
             page=page,
             limit=limit,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor
         )
 
 
@@ -102,6 +102,9 @@ class DreamResponse(BaseModel):
     interpretation: Optional[DreamInterpretation] = None
     tags: List[str] = Field(default_factory=list)
     similar_dreams_count: int = 0
+    similar_dream_ids: List[UUID] = Field(default_factory=list)
+    common_symbols: List[str] = Field(default_factory=list)
+    recurring_emotions: List[Dict[str, Any]] = Field(default_factory=list)
     
     class Config:
         from_attributes = True
@@ -109,8 +112,9 @@ class DreamResponse(BaseModel):
 
 class DreamInterpretRequest(BaseModel):
     """Schema for dream interpretation request"""
-    text: str = Field(..., min_length=20, max_length=4000)
-    voice_data: Optional[str] = Field(None, description="Base64 encoded voice data")
+    # At least 20 characters unless it names a single lexicon symbol (checked by the API)
+    text: str = Field(..., min_length=1, max_length=4000)
+    voice_data: Optional[str] = Field(None, description="Base64 encoded voice data (deprecated, use POST /interpret/voice)")
     language: str = Field(default="ru", max_length=10)
     include_similar: bool = Field(default=True, description="Include similar dreams in analysis")
 
@@ -121,4 +125,14 @@ class DreamInterpretResponse(BaseModel):
     interpretation: DreamInterpretation
     similar_dreams: List[Dict[str, Any]] = Field(default_factory=list)
     daily_limit_remaining: int
-    is_saved: bool = False
\ No newline at end of file
+    is_saved: bool = False
+
+
+class DreamJobResponse(BaseModel):
+    """Schema for an asynchronous interpretation job"""
+    job_id: UUID
+    status: str  # queued, running, done or failed
+    created_at: datetime
+    updated_at: datetime
+    result: Optional[DreamInterpretResponse] = None
+    error: Optional[str] = None
@@ -11,11 +11,13 @@
 from .openai_service import OpenAIService
 from .dream_interpreter import DreamInterpreter
 from .embedding_service import EmbeddingService
+from .embedding_provider import EmbeddingProvider
 from .prompt_templates import PromptTemplates
 
 __all__ = [
     "OpenAIService",
     "DreamInterpreter",
     "EmbeddingService",
+    "EmbeddingProvider",
     "PromptTemplates"
 ]
\ No newline at end of file
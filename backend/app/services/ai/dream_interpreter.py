@@ -6,9 +6,12 @@
    - Symbol extraction
    - Emotion analysis
    - Personalized advice
+   - Fallback interpretation when upstream circuit is open
+   - Symbol lexicon fast path for short single-symbol dreams (per tier)
 📥 inputs_outputs: Dream text -> Interpretation with symbols and advice
 🔧 functions_list:
    - interpret_dream: Main interpretation method
+   - interpret_dream_stream: Interpretation with incremental field events
    - extract_symbols: Extract main symbols from dream
    - analyze_emotions: Detect emotional patterns
    - generate_advice: Create personalized recommendations
@@ -17,21 +20,25 @@
 """
 
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from datetime import datetime
 
 from loguru import logger
 
 from app.services.ai.openai_service import OpenAIService
 from app.services.ai.prompt_templates import PromptTemplates
+from app.services.ai.json_stream import IncrementalJSONParser, FIELD, DELTA
+from app.services.ai.resilience import CircuitOpenError
+from app.services.ai.symbol_lexicon import symbol_lexicon
+from app.core.metrics import AI_FALLBACKS, AI_JSON_PARSE_FAILURES, track_stage
 from app.models.schemas.dream import DreamInterpretation
 
 
 class DreamInterpreter:
     """Service for interpreting dreams using AI"""
     
-    def __init__(self):
-        self.openai = OpenAIService()
+    def __init__(self, openai_service: Optional[OpenAIService] = None):
+        self.openai = openai_service or OpenAIService()
         self.prompts = PromptTemplates()
         
     async def interpret_dream(
@@ -39,7 +46,8 @@ class DreamInterpreter:
         dream_text: str,
         user_context: Optional[Dict[str, Any]] = None,
         language: str = "ru",
-        include_similar: bool = True
+        include_similar: bool = True,
+        subscription_type: Optional[str] = None
     ) -> DreamInterpretation:
         """
         Interpret a dream and return structured analysis
@@ -49,65 +57,204 @@ class DreamInterpreter:
             user_context: Optional user history/preferences
             language: Language for interpretation
             include_similar: Whether to analyze similar dreams
+            subscription_type: User plan, sets upstream queue priority
             
         Returns:
             DreamInterpretation schema with full analysis
         """
         start_time = datetime.now()
         
-        try:
-            # Build the interpretation prompt
-            system_prompt = self.prompts.get_system_prompt(language)
-            user_prompt = self.prompts.build_interpretation_prompt(
-                dream_text=dream_text,
-                user_context=user_context,
-                language=language
+        lexicon_symbol = self._lexicon_symbol(dream_text, subscription_type)
+        if lexicon_symbol:
+            interpretation = await self._lexicon_interpretation(
+                lexicon_symbol, language, subscription_type, start_time
             )
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            if interpretation:
+                return interpretation
+        
+        try:
+            messages = self._build_messages(dream_text, user_context, language)
             
             # Get AI interpretation
-            response = await self.openai.chat_completion(
-                messages=messages,
-                model="gpt-4-turbo-preview",
-                temperature=0.7,
-                max_tokens=2000
-            )
+            with track_stage("llm"):
+                response = await self.openai.chat_completion(
+                    messages=messages,
+                    model="gpt-4-turbo-preview",
+                    temperature=0.7,
+                    max_tokens=2000,
+                    priority=subscription_type
+                )
             
             # Parse JSON response
-            interpretation_data = json.loads(response["content"])
+            with track_stage("parse"):
+                interpretation_data = json.loads(response["content"])
             
             # Calculate processing time
             processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             
-            # Create interpretation object
-            interpretation = DreamInterpretation(
-                dream_id=None,  # Will be set when saving
-                main_symbol=interpretation_data["main_symbol"],
-                main_symbol_emoji=interpretation_data.get("main_symbol_emoji", "🌙"),
-                interpretation=interpretation_data["interpretation"],
-                emotions=interpretation_data.get("emotions", []),
-                advice=interpretation_data.get("advice", ""),
-                ai_model=response["model"],
-                prompt_version="v1.0",
-                processing_time_ms=processing_time_ms
+            interpretation = self._build_interpretation(
+                interpretation_data, response["model"], processing_time_ms
             )
             
+            # Personalized answers must not be shared through the lexicon cache
+            if lexicon_symbol and not user_context:
+                await symbol_lexicon.remember(lexicon_symbol, language, interpretation)
+            
             logger.info(f"Dream interpreted successfully in {processing_time_ms}ms")
             return interpretation
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse AI response as JSON: {e}")
+            AI_JSON_PARSE_FAILURES.labels(operation="interpret").inc()
+            AI_FALLBACKS.labels(reason="json_parse").inc()
             # Fallback to basic interpretation
+            processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            return await self._fallback_interpretation(dream_text, processing_time_ms)
+            
+        except CircuitOpenError as e:
+            logger.warning(f"Upstream unavailable, using fallback interpretation: {e}")
+            AI_FALLBACKS.labels(reason="circuit_open").inc()
+            processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             return await self._fallback_interpretation(dream_text, processing_time_ms)
             
         except Exception as e:
             logger.error(f"Error interpreting dream: {e}")
             raise
     
+    async def interpret_dream_stream(
+        self,
+        dream_text: str,
+        user_context: Optional[Dict[str, Any]] = None,
+        language: str = "ru",
+        subscription_type: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Interpret a dream while it is being generated
+        
+        Yields:
+            {"type": "field", "name": ..., "value": ...} when a field is complete
+            {"type": "delta", "name": "interpretation", "text": ...} while text streams
+            {"type": "done", "interpretation": DreamInterpretation} at the end
+        """
+        start_time = datetime.now()
+        
+        lexicon_symbol = self._lexicon_symbol(dream_text, subscription_type)
+        if lexicon_symbol:
+            interpretation = await self._lexicon_interpretation(
+                lexicon_symbol, language, subscription_type, start_time
+            )
+            if interpretation:
+                for name in ("main_symbol", "main_symbol_emoji", "emotions", "advice"):
+                    yield {"type": FIELD, "name": name, "value": getattr(interpretation, name)}
+                yield {"type": "done", "interpretation": interpretation}
+                return
+        
+        messages = self._build_messages(dream_text, user_context, language)
+        parser = IncrementalJSONParser(stream_fields=["interpretation"])
+        result = None
+        
+        try:
+            async for chunk in self.openai.chat_completion_stream(
+                messages=messages,
+                model="gpt-4-turbo-preview",
+                temperature=0.7,
+                max_tokens=2000,
+                priority=subscription_type
+            ):
+                if "result" in chunk:
+                    result = chunk["result"]
+                    break
+                
+                for kind, name, value in parser.feed(chunk["delta"]):
+                    if kind == DELTA:
+                        yield {"type": DELTA, "name": name, "text": value}
+                    elif kind == FIELD and name != "interpretation":
+                        yield {"type": FIELD, "name": name, "value": value}
+        except CircuitOpenError as e:
+            # Nothing was streamed yet, the fallback below is used
+            logger.warning(f"Upstream unavailable, using fallback interpretation: {e}")
+            AI_FALLBACKS.labels(reason="circuit_open").inc()
+        
+        processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        try:
+            interpretation_data = json.loads(result["content"])
+            interpretation = self._build_interpretation(
+                interpretation_data, result["model"], processing_time_ms
+            )
+        except (TypeError, KeyError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to parse streamed AI response as JSON: {e}")
+            if result is not None:
+                AI_JSON_PARSE_FAILURES.labels(operation="interpret_stream").inc()
+                AI_FALLBACKS.labels(reason="json_parse").inc()
+            interpretation = await self._fallback_interpretation(dream_text, processing_time_ms)
+        
+        logger.info(f"Dream interpreted (streamed) in {processing_time_ms}ms")
+        yield {"type": "done", "interpretation": interpretation}
+    
+    def _lexicon_symbol(self, dream_text: str, subscription_type: Optional[str]) -> Optional[str]:
+        """Lexicon symbol of a short single-symbol dream, if the tier uses the fast path"""
+        if not symbol_lexicon.enabled_for(subscription_type):
+            return None
+        symbol = symbol_lexicon.match(dream_text)
+        if symbol is None:
+            symbol_lexicon.record_miss(subscription_type)
+        return symbol
+    
+    async def _lexicon_interpretation(
+        self,
+        symbol: str,
+        language: str,
+        subscription_type: Optional[str],
+        start_time: datetime
+    ) -> Optional[DreamInterpretation]:
+        """Curated or cached interpretation of a lexicon symbol"""
+        with track_stage("lexicon"):
+            interpretation = await symbol_lexicon.lookup(symbol, language, subscription_type)
+        if interpretation is None:
+            return None
+        interpretation.processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        logger.info(f"Dream answered from symbol lexicon ({symbol}) in {interpretation.processing_time_ms}ms")
+        return interpretation
+    
+    def _build_messages(
+        self,
+        dream_text: str,
+        user_context: Optional[Dict[str, Any]],
+        language: str
+    ) -> List[Dict[str, str]]:
+        """Build chat messages for interpretation"""
+        system_prompt = self.prompts.get_system_prompt(language)
+        user_prompt = self.prompts.build_interpretation_prompt(
+            dream_text=dream_text,
+            user_context=user_context,
+            language=language
+        )
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _build_interpretation(
+        self,
+        interpretation_data: Dict[str, Any],
+        ai_model: str,
+        processing_time_ms: int
+    ) -> DreamInterpretation:
+        """Create interpretation object from parsed AI response"""
+        return DreamInterpretation(
+            dream_id=None,  # Will be set when saving
+            main_symbol=interpretation_data["main_symbol"],
+            main_symbol_emoji=interpretation_data.get("main_symbol_emoji", "🌙"),
+            interpretation=interpretation_data["interpretation"],
+            emotions=interpretation_data.get("emotions", []),
+            advice=interpretation_data.get("advice", ""),
+            ai_model=ai_model,
+            prompt_version="v1.0",
+            processing_time_ms=processing_time_ms
+        )
+    
     async def _fallback_interpretation(
         self, 
         dream_text: str, 
@@ -152,6 +299,7 @@ class DreamInterpreter:
             symbols = json.loads(response["content"])
             return symbols.get("symbols", [])
         except:
+            AI_JSON_PARSE_FAILURES.labels(operation="extract_symbols").inc()
             return []
     
     async def analyze_emotions(
@@ -176,6 +324,7 @@ class DreamInterpreter:
             emotions = json.loads(response["content"])
             return emotions.get("emotions", [])
         except:
+            AI_JSON_PARSE_FAILURES.labels(operation="analyze_emotions").inc()
             return []
     
     async def generate_advice(
@@ -206,4 +355,5 @@ class DreamInterpreter:
             advice_data = json.loads(response["content"])
             return advice_data.get("advice", "")
         except:
+            AI_JSON_PARSE_FAILURES.labels(operation="generate_advice").inc()
             return response["content"]
\ No newline at end of file
@@ -0,0 +1,93 @@
+# ai_context_v3
+"""
+🎯 main_goal: Content-addressed cache for text embeddings
+⚡ critical_requirements:
+   - Key by (model, hash of prepared text)
+   - Compact float32 bytes in Redis
+   - Batch lookups with a single MGET
+   - Cache errors never fail embedding generation
+📥 inputs_outputs: (model, text) -> Cached embedding vector
+🔧 functions_list:
+   - EmbeddingCache.get_many: Look up embeddings for several texts
+   - EmbeddingCache.set_many: Store embeddings for several texts
+🚫 forbidden_changes: Do not store embeddings as JSON
+🧪 tests: test_embedding_cache.py with round-trip tests
+"""
+
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import AI_CACHE_REQUESTS
+from app.core.redis import get_binary_redis
+
+
+class EmbeddingCache:
+    """Redis cache of embeddings addressed by text content"""
+
+    PREFIX = "emb_cache"
+
+    def key(self, model: str, text: str) -> str:
+        """Cache key for prepared text"""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.PREFIX}:{model}:{text_hash}"
+
+    async def get_many(
+        self,
+        model: str,
+        texts: Sequence[str]
+    ) -> List[Optional[List[float]]]:
+        """Get cached embeddings, None for misses"""
+        if not texts:
+            return []
+        try:
+            redis = get_binary_redis()
+            values = await redis.mget([self.key(model, text) for text in texts])
+        except Exception as e:
+            logger.error(f"Embedding cache read error: {e}")
+            return [None] * len(texts)
+
+        hits = sum(1 for value in values if value)
+        AI_CACHE_REQUESTS.labels(cache="emb_cache", result="hit").inc(hits)
+        AI_CACHE_REQUESTS.labels(cache="emb_cache", result="miss").inc(len(values) - hits)
+
+        return [
+            np.frombuffer(value, dtype=np.float32).tolist() if value else None
+            for value in values
+        ]
+
+    async def set_many(
+        self,
+        model: str,
+        items: Sequence[Tuple[str, List[float]]]
+    ) -> None:
+        """Store embeddings for texts"""
+        if not items:
+            return
+        try:
+            redis = get_binary_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for text, embedding in items:
+                    pipe.setex(
+                        self.key(model, text),
+                        settings.EMBEDDING_CACHE_TTL,
+                        np.asarray(embedding, dtype=np.float32).tobytes()
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Embedding cache write error: {e}")
+
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Get cached embedding for one text"""
+        return (await self.get_many(model, [text]))[0]
+
+    async def set(self, model: str, text: str, embedding: List[float]) -> None:
+        """Store embedding for one text"""
+        await self.set_many(model, [(text, embedding)])
+
+
+# Default cache instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,178 @@
+# ai_context_v3
+"""
+🎯 main_goal: Pluggable embedding backends behind one interface
+⚡ critical_requirements:
+   - OpenAI embeddings API as one provider
+   - Local CPU provider with no network: hashed char n-gram TF-IDF, NumPy only
+   - Deterministic across processes (no Python hash()), batch-capable
+   - Provider chosen by the registered model's provider_model
+📥 inputs_outputs: Texts + model spec -> Embedding vectors
+🔧 functions_list:
+   - EmbeddingProvider.embed: Embed a batch of texts
+   - OpenAIEmbeddingProvider: Embeddings API via OpenAIService
+   - HashedNgramEmbeddingProvider: Offline hashed n-gram TF-IDF vectors
+   - get_embedding_provider: Provider for a model spec
+   - CLI: fit IDF weights for local models from a text corpus
+🚫 forbidden_changes: Do not change the local hashing scheme of a registered model
+🧪 tests: test_embedding_provider.py with determinism and similarity tests
+"""
+
+import argparse
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.ai.embedding_registry import EmbeddingModelSpec
+from app.services.ai.openai_service import OpenAIService
+
+LOCAL_PROVIDER_PREFIX = "local/"
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into vectors of the model's dimension"""
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str], model: EmbeddingModelSpec) -> List[List[float]]:
+        """Embeddings in the order of texts"""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API"""
+
+    def __init__(self, openai_service: OpenAIService):
+        self.openai = openai_service
+
+    async def embed(self, texts: Sequence[str], model: EmbeddingModelSpec) -> List[List[float]]:
+        return await self.openai.create_embeddings(
+            texts=list(texts),
+            model=model.provider_model,
+            dimensions=model.request_dimensions
+        )
+
+
+class HashedNgramEmbeddingProvider(EmbeddingProvider):
+    """
+    Character n-gram TF-IDF with the hashing trick, no vocabulary and no network.
+    N-grams are hashed with a vectorized polynomial rolling hash over code points;
+    a signed hash projects the sparse TF-IDF vector to a fixed dimension.
+    IDF weights per hash bucket come from fit() on a corpus, uniform otherwise.
+    """
+
+    IDF_BUCKETS = 2 ** 20
+    _PRIME = np.uint64(1099511628211)
+    _MIX = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(
+        self,
+        dimensions: int,
+        ngram_range: Tuple[int, int] = (3, 5),
+        idf: Optional[np.ndarray] = None
+    ):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.idf = idf
+
+    async def embed(self, texts: Sequence[str], model: EmbeddingModelSpec) -> List[List[float]]:
+        # CPU work off the event loop; NumPy releases the GIL for most of it
+        matrix = await asyncio.to_thread(self.transform, texts)
+        return matrix.tolist()
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """L2-normalized (len(texts), dimensions) float32 matrix"""
+        docs, hashes = self._ngram_hashes(texts)
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        if hashes.size == 0:
+            return matrix
+
+        # Term frequency per (document, n-gram), sublinear
+        pairs, counts = np.unique(np.stack([docs.astype(np.uint64), hashes]), axis=1, return_counts=True)
+        pair_docs, pair_hashes = pairs[0].astype(np.int64), pairs[1]
+        weights = 1.0 + np.log(counts)
+        if self.idf is not None:
+            weights *= self.idf[(pair_hashes % np.uint64(self.IDF_BUCKETS)).astype(np.int64)]
+
+        # Signed feature hashing keeps the projection unbiased
+        with np.errstate(over="ignore"):
+            mixed = pair_hashes * self._MIX
+        columns = ((mixed >> np.uint64(33)) % np.uint64(self.dimensions)).astype(np.int64)
+        signs = np.where((mixed >> np.uint64(63)) == 1, -1.0, 1.0)
+        np.add.at(matrix, (pair_docs, columns), (weights * signs).astype(np.float32))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        return matrix
+
+    def _ngram_hashes(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(document index, n-gram hash) for every n-gram of every text"""
+        doc_parts, hash_parts = [], []
+        for doc, text in enumerate(texts):
+            # Padding marks word boundaries at the start and end
+            padded = f" {' '.join(text.lower().split())} "
+            codes = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                if len(codes) < n:
+                    continue
+                windows = np.lib.stride_tricks.sliding_window_view(codes, n)
+                hashes = np.full(len(windows), np.uint64(n), dtype=np.uint64)
+                with np.errstate(over="ignore"):
+                    for column in range(n):
+                        hashes = hashes * self._PRIME + windows[:, column]
+                hash_parts.append(hashes)
+                doc_parts.append(np.full(len(hashes), doc, dtype=np.int64))
+        if not hash_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+        return np.concatenate(doc_parts), np.concatenate(hash_parts)
+
+    @classmethod
+    def fit(
+        cls,
+        corpus: Sequence[str],
+        dimensions: int,
+        ngram_range: Tuple[int, int] = (3, 5)
+    ) -> "HashedNgramEmbeddingProvider":
+        """Provider with smoothed IDF weights learned from a corpus"""
+        provider = cls(dimensions, ngram_range)
+        docs, hashes = provider._ngram_hashes(corpus)
+        buckets = (hashes % np.uint64(cls.IDF_BUCKETS)).astype(np.int64)
+        # Document frequency: count each (document, bucket) once
+        unique = np.unique(docs * cls.IDF_BUCKETS + buckets)
+        document_frequency = np.bincount(unique % cls.IDF_BUCKETS, minlength=cls.IDF_BUCKETS)
+        provider.idf = (np.log((1 + len(corpus)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return provider
+
+    def save_idf(self, path: Path) -> None:
+        np.save(path, self.idf)
+
+    @classmethod
+    def load(cls, dimensions: int, idf_path: Optional[str] = None) -> "HashedNgramEmbeddingProvider":
+        idf = np.load(idf_path) if idf_path else None
+        return cls(dimensions, idf=idf)
+
+
+_local_providers: Dict[int, HashedNgramEmbeddingProvider] = {}
+
+
+def get_embedding_provider(model: EmbeddingModelSpec, openai_service: OpenAIService) -> EmbeddingProvider:
+    """Local provider for local/* models, the OpenAI API otherwise"""
+    if model.provider_model.startswith(LOCAL_PROVIDER_PREFIX):
+        provider = _local_providers.get(model.dimensions)
+        if provider is None:
+            provider = HashedNgramEmbeddingProvider.load(model.dimensions, settings.EMBEDDING_LOCAL_IDF_PATH)
+            _local_providers[model.dimensions] = provider
+        return provider
+    return OpenAIEmbeddingProvider(openai_service)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit IDF weights for local/* embedding models")
+    parser.add_argument("corpus", type=Path, help="UTF-8 text file, one document per line")
+    parser.add_argument("output", type=Path, help="Where to write the .npy file (EMBEDDING_LOCAL_IDF_PATH)")
+    args = parser.parse_args()
+    documents = [line for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    # Dimension does not affect IDF weights, any value works here
+    HashedNgramEmbeddingProvider.fit(documents, dimensions=1).save_idf(args.output)
+    print(f"IDF weights from {len(documents)} documents written to {args.output}")
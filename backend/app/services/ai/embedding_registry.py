@@ -0,0 +1,190 @@
+# ai_context_v3
+"""
+🎯 main_goal: Registry of embedding models with active-model cutover
+⚡ critical_requirements:
+   - Reads use exactly one active model
+   - Writes also go to models being backfilled or kept for rollback
+   - Cutover and rollback without restarts (workers refresh periodically)
+   - Registry errors fall back to EMBEDDING_MODEL from settings
+📥 inputs_outputs: embedding_models table -> Active and write-target model specs
+🔧 functions_list:
+   - EmbeddingModelRegistry.active: Model used for search
+   - EmbeddingModelRegistry.write_targets: Models new embeddings are written for
+   - EmbeddingModelRegistry.register: Add a model in backfilling state
+   - EmbeddingModelRegistry.activate: Cut reads over to a ready model
+   - EmbeddingModelRegistry.rollback: Reactivate the previously active model
+   - EmbeddingModelRegistry.retire: Stop writing a model
+🚫 forbidden_changes: Do not activate a model that is still backfilling without force
+🧪 tests: test_embedding_registry.py with cutover and rollback tests
+"""
+
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.models.db import EmbeddingModel
+
+
+@dataclass(frozen=True, slots=True)
+class EmbeddingModelSpec:
+    """What is needed to create and search vectors of one model"""
+    name: str
+    provider_model: str
+    dimensions: int
+
+    @property
+    def request_dimensions(self) -> Optional[int]:
+        """Dimensions to ask the API for, only text-embedding-3 models can shorten"""
+        if self.provider_model.startswith("text-embedding-3"):
+            return self.dimensions
+        return None
+
+    @classmethod
+    def from_row(cls, row: EmbeddingModel) -> "EmbeddingModelSpec":
+        return cls(name=row.name, provider_model=row.provider_model, dimensions=row.dimensions)
+
+
+class EmbeddingModelRegistry:
+    """Active model and write targets, cached per process"""
+
+    WRITE_STATUSES = ("backfilling", "ready")
+
+    def __init__(self):
+        self._cached: Optional[Tuple[float, EmbeddingModelSpec, List[EmbeddingModelSpec]]] = None
+
+    @property
+    def default(self) -> EmbeddingModelSpec:
+        return EmbeddingModelSpec(
+            name=settings.EMBEDDING_MODEL,
+            provider_model=settings.EMBEDDING_MODEL,
+            dimensions=settings.EMBEDDING_DIMENSIONS
+        )
+
+    async def active(self) -> EmbeddingModelSpec:
+        """Model whose vectors are searched"""
+        active, _ = await self._load()
+        return active
+
+    async def write_targets(self) -> List[EmbeddingModelSpec]:
+        """Active model first, then models kept up to date for cutover or rollback"""
+        _, targets = await self._load()
+        return targets
+
+    def invalidate(self) -> None:
+        """Re-read the registry on next use"""
+        self._cached = None
+
+    async def _load(self) -> Tuple[EmbeddingModelSpec, List[EmbeddingModelSpec]]:
+        now = time.monotonic()
+        if self._cached and now - self._cached[0] < settings.EMBEDDING_REGISTRY_REFRESH_SECONDS:
+            return self._cached[1], self._cached[2]
+
+        try:
+            async with database.async_session_factory() as session:
+                result = await session.execute(
+                    select(EmbeddingModel).where(
+                        EmbeddingModel.status.in_(self.WRITE_STATUSES)
+                    )
+                )
+                rows = result.scalars().all()
+        except Exception as e:
+            logger.error(f"Embedding registry read error: {e}")
+            rows = []
+
+        active_rows = [row for row in rows if row.is_active]
+        active = EmbeddingModelSpec.from_row(active_rows[0]) if active_rows else self.default
+        targets = [active] + [
+            EmbeddingModelSpec.from_row(row)
+            for row in rows
+            if not row.is_active
+        ]
+        self._cached = (now, active, targets)
+        return active, targets
+
+    async def register(
+        self,
+        session: AsyncSession,
+        name: str,
+        provider_model: str,
+        dimensions: int
+    ) -> EmbeddingModel:
+        """Add a model; new dreams are embedded for it right away"""
+        model = EmbeddingModel(
+            name=name,
+            provider_model=provider_model,
+            dimensions=dimensions,
+            status="backfilling"
+        )
+        session.add(model)
+        await session.commit()
+        self.invalidate()
+        logger.info(f"Registered embedding model {name} ({dimensions} dims)")
+        return model
+
+    async def activate(self, session: AsyncSession, name: str, force: bool = False) -> EmbeddingModel:
+        """Switch reads to a model; the previous one stays written for rollback"""
+        model = await self._get(session, name)
+        if model.status == "retired":
+            raise ValueError(f"Embedding model {name} is retired")
+        if model.status != "ready" and not force:
+            raise ValueError(f"Embedding model {name} is still {model.status}")
+
+        # One transaction, so readers never see zero or two active models
+        await session.execute(
+            update(EmbeddingModel)
+            .where(EmbeddingModel.is_active == True)
+            .values(is_active=False)
+        )
+        model.is_active = True
+        model.activated_at = func.now()
+        await session.commit()
+        self.invalidate()
+        logger.info(f"Embedding model {name} is now active")
+        return model
+
+    async def rollback(self, session: AsyncSession) -> EmbeddingModel:
+        """Reactivate the most recently active model that is still written"""
+        result = await session.execute(
+            select(EmbeddingModel)
+            .where(
+                EmbeddingModel.is_active == False,
+                EmbeddingModel.status == "ready",
+                EmbeddingModel.activated_at.is_not(None)
+            )
+            .order_by(EmbeddingModel.activated_at.desc())
+            .limit(1)
+        )
+        previous = result.scalar_one_or_none()
+        if previous is None:
+            raise ValueError("No previously active embedding model to roll back to")
+        return await self.activate(session, previous.name)
+
+    async def retire(self, session: AsyncSession, name: str) -> EmbeddingModel:
+        """Stop writing a model that is no longer a rollback target"""
+        model = await self._get(session, name)
+        if model.is_active:
+            raise ValueError(f"Embedding model {name} is active")
+        model.status = "retired"
+        await session.commit()
+        self.invalidate()
+        return model
+
+    async def models(self, session: AsyncSession) -> List[EmbeddingModel]:
+        result = await session.execute(select(EmbeddingModel).order_by(EmbeddingModel.created_at))
+        return list(result.scalars().all())
+
+    async def _get(self, session: AsyncSession, name: str) -> EmbeddingModel:
+        model = await session.scalar(select(EmbeddingModel).where(EmbeddingModel.name == name))
+        if model is None:
+            raise ValueError(f"Unknown embedding model {name}")
+        return model
+
+
+# Per-process registry instance
+embedding_registry = EmbeddingModelRegistry()
@@ -6,52 +6,94 @@
    - Similarity search in pgvector
    - Batch processing support
    - Cache embeddings
+   - Model and dimension come from the embedding model registry
+   - Vectors come from the model's EmbeddingProvider (OpenAI or local)
 📥 inputs_outputs: Dream text -> Vector embeddings -> Similar dreams
 🔧 functions_list:
    - create_embedding: Generate embedding for text
-   - find_similar_dreams: Search similar dreams by vector
+   - find_similar_dreams: Search similar dreams by vector (single query)
+   - _search_similar_dreams: Plan exact per-user scan or ANN search
+   - _half_precision_candidates: halfvec index shortlist, rescored in float32
    - batch_create_embeddings: Process multiple texts
-   - update_dream_embedding: Update existing embedding
-🚫 forbidden_changes: Do not change vector dimensions
+   - update_dream_embedding: Update embeddings of all write-target models (invalidates user matrix)
+🚫 forbidden_changes: Vector queries must cast to the model dimension to use its index
 🧪 tests: test_embedding_service.py
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 from uuid import UUID
 
+import openai
 from loguru import logger
-from sqlalchemy import select, text
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 import numpy as np
 
 from app.services.ai.openai_service import OpenAIService
-from app.models.db import Dream, DreamEmbedding, DreamInterpretation
+from app.services.ai.embedding_cache import embedding_cache
+from app.services.ai.embedding_provider import get_embedding_provider
+from app.services.ai.embedding_registry import EmbeddingModelSpec, embedding_registry
+from app.services.ai.user_vector_cache import UserVectors, user_vector_cache
+from app.models.db import Dream, DreamEmbedding, DreamInterpretation, HalfVector
+from app.core.config import settings
+from app.core.metrics import AI_RETRIES, VECTOR_SEARCH_PLANS
 from app.core.database import get_db
 
+# (recall target, ivfflat probes as share of lists, hnsw ef_search)
+_RECALL_PROFILES = (
+    (0.90, 0.05, 40),
+    (0.95, 0.10, 100),
+    (0.98, 0.20, 200),
+    (0.99, 0.40, 400),
+)
+
+
+@dataclass(slots=True)
+class SimilarDream:
+    """Similarity search hit with the interpretation fields callers need"""
+    id: UUID
+    text: str
+    created_at: datetime
+    similarity: float
+    main_symbol: Optional[str] = None
+    main_symbol_emoji: Optional[str] = None
+    emotions: List[Dict[str, Any]] = field(default_factory=list)
+
 
 class EmbeddingService:
     """Service for managing dream vector embeddings"""
     
-    def __init__(self):
-        self.openai = OpenAIService()
-        self.embedding_model = "text-embedding-ada-002"
-        self.embedding_dimension = 1536
+    def __init__(self, openai_service: Optional[OpenAIService] = None):
+        self.openai = openai_service or OpenAIService()
         
     async def create_embedding(
         self,
         text: str,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        model: Optional[EmbeddingModelSpec] = None
     ) -> List[float]:
-        """Create embedding for dream text"""
+        """Create embedding for dream text, with the active model by default"""
         try:
+            model = model or await embedding_registry.active()
+            
             # Clean and prepare text
             clean_text = self._prepare_text_for_embedding(text)
             
+            # Same prepared text always maps to the same vector
+            cached = await embedding_cache.get(model.name, clean_text)
+            if cached is not None:
+                logger.debug("Embedding cache hit")
+                return cached
+            
             # Generate embedding
-            embedding = await self.openai.create_embedding(
-                text=clean_text,
-                model=self.embedding_model
-            )
+            provider = get_embedding_provider(model, self.openai)
+            embedding = (await provider.embed([clean_text], model))[0]
+            await embedding_cache.set(model.name, clean_text, embedding)
             
             logger.info(f"Created embedding of dimension {len(embedding)}")
             return embedding
@@ -78,18 +120,19 @@ class EmbeddingService:
         limit: int = 10,
         user_id: Optional[UUID] = None,
         min_similarity: float = 0.7,
-        db_session: AsyncSession = None
-    ) -> List[Tuple[Dream, float]]:
+        db_session: AsyncSession = None,
+        recall_target: Optional[float] = None
+    ) -> List[SimilarDream]:
         """Find similar dreams using vector similarity"""
         
         if db_session is None:
             async for session in get_db():
                 return await self._search_similar_dreams(
-                    session, query_embedding, limit, user_id, min_similarity
+                    session, query_embedding, limit, user_id, min_similarity, recall_target
                 )
         else:
             return await self._search_similar_dreams(
-                db_session, query_embedding, limit, user_id, min_similarity
+                db_session, query_embedding, limit, user_id, min_similarity, recall_target
             )
     
     async def _search_similar_dreams(
@@ -98,172 +141,494 @@ class EmbeddingService:
         query_embedding: List[float],
         limit: int,
         user_id: Optional[UUID],
-        min_similarity: float
-    ) -> List[Tuple[Dream, float]]:
-        """Internal method to search similar dreams"""
+        min_similarity: float,
+        recall_target: Optional[float] = None
+    ) -> List[SimilarDream]:
+        """
+        Internal method to search similar dreams.
+        Small per-user journals are searched in memory or scanned exactly;
+        everything else goes through the ANN index and is post-filtered by
+        user and threshold.
+        """
         
-        # Convert to numpy array for pgvector
-        query_vector = np.array(query_embedding)
+        model = await embedding_registry.active()
+        if len(query_embedding) != model.dimensions:
+            # Query was embedded with the previous model during a cutover
+            logger.warning(f"Query has {len(query_embedding)} dims, {model.name} has {model.dimensions}")
+            return []
         
-        # Build the similarity search query
-        query = text("""
-            SELECT 
-                d.id,
-                d.text,
-                d.created_at,
-                1 - (de.embedding <=> :query_vector) as similarity
-            FROM dreams d
-            JOIN vector_store.dream_embeddings de ON d.id = de.dream_id
-            WHERE 
-                d.is_deleted = false
-                AND 1 - (de.embedding <=> :query_vector) >= :min_similarity
-                {} -- user filter placeholder
-            ORDER BY de.embedding <=> :query_vector
-            LIMIT :limit
-        """.format("AND d.user_id = :user_id" if user_id else ""))
+        exact = False
+        if user_id is not None:
+            version = None
+            if user_vector_cache.enabled:
+                version = await user_vector_cache.version(user_id)
+                entry = await user_vector_cache.get(user_id, version, model.name)
+                if entry is not None:
+                    return await self._search_user_vectors(session, entry, query_embedding, limit, min_similarity)
+            
+            exact = await self._is_small_journal(session, user_id, model)
+            if exact and version is not None:
+                entry = await self._load_user_vectors(session, user_id, version, model)
+                user_vector_cache.put(user_id, entry)
+                return await self._search_user_vectors(session, entry, query_embedding, limit, min_similarity)
+        
+        if exact:
+            candidates = self._exact_candidates(query_embedding, user_id, model)
+        else:
+            candidate_limit = limit * settings.VECTOR_ANN_OVERFETCH
+            await self._apply_ann_params(session, recall_target, candidate_limit)
+            candidates = self._ann_candidates(query_embedding, candidate_limit, model, user_id)
+        VECTOR_SEARCH_PLANS.labels(plan="exact" if exact else "ann").inc()
         
-        # Prepare parameters
-        params = {
-            "query_vector": query_vector.tolist(),
-            "min_similarity": min_similarity,
-            "limit": limit
-        }
+        # Dream, interpretation fields and similarity in one round trip
+        query = (
+            select(
+                Dream.id,
+                Dream.text,
+                Dream.created_at,
+                DreamInterpretation.main_symbol,
+                DreamInterpretation.main_symbol_emoji,
+                DreamInterpretation.emotions,
+                (1 - candidates.c.distance).label("similarity")
+            )
+            .join(Dream, Dream.id == candidates.c.dream_id)
+            .outerjoin(DreamInterpretation, DreamInterpretation.dream_id == Dream.id)
+            .where(
+                Dream.is_deleted == False,
+                candidates.c.distance <= 1 - min_similarity
+            )
+            .order_by(candidates.c.distance)
+            .limit(limit)
+        )
         if user_id:
-            params["user_id"] = user_id
+            query = query.where(Dream.user_id == user_id)
         
-        # Execute query
-        result = await session.execute(query, params)
-        rows = result.fetchall()
+        result = await session.execute(query)
+        similar_dreams = [self._to_similar_dream(row, row.similarity) for row in result]
         
-        # Load full Dream objects with interpretations
-        dreams_with_similarity = []
-        for row in rows:
-            dream = await session.get(Dream, row.id)
-            if dream:
-                dreams_with_similarity.append((dream, row.similarity))
+        logger.info(f"Found {len(similar_dreams)} similar dreams ({'exact' if exact else 'ann'})")
+        return similar_dreams
+    
+    @staticmethod
+    def _to_similar_dream(row, similarity: float) -> SimilarDream:
+        return SimilarDream(
+            id=row.id,
+            text=row.text,
+            created_at=row.created_at,
+            similarity=float(similarity),
+            main_symbol=row.main_symbol,
+            main_symbol_emoji=row.main_symbol_emoji,
+            emotions=row.emotions or []
+        )
+    
+    async def _load_user_vectors(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        version: int,
+        model: EmbeddingModelSpec
+    ) -> UserVectors:
+        """Load all of a user's vectors into a normalized matrix"""
+        result = await session.execute(
+            select(DreamEmbedding.dream_id, DreamEmbedding.embedding)
+            .join(Dream, Dream.id == DreamEmbedding.dream_id)
+            .where(
+                Dream.user_id == user_id,
+                Dream.is_deleted == False,
+                DreamEmbedding.model == model.name,
+                DreamEmbedding.embedding.is_not(None)
+            )
+        )
+        rows = result.all()
+        return UserVectors.build(
+            dream_ids=[row.dream_id for row in rows],
+            vectors=[row.embedding for row in rows] or np.empty((0, model.dimensions)),
+            version=version,
+            model=model.name
+        )
+    
+    async def _search_user_vectors(
+        self,
+        session: AsyncSession,
+        entry: UserVectors,
+        query_embedding: List[float],
+        limit: int,
+        min_similarity: float
+    ) -> List[SimilarDream]:
+        """Top-k in memory, then hydrate the hits by primary key"""
+        VECTOR_SEARCH_PLANS.labels(plan="memory").inc()
+        hits = entry.top_k(query_embedding, limit, min_similarity)
+        if not hits:
+            return []
         
-        logger.info(f"Found {len(dreams_with_similarity)} similar dreams")
-        return dreams_with_similarity
+        result = await session.execute(
+            select(
+                Dream.id,
+                Dream.text,
+                Dream.created_at,
+                DreamInterpretation.main_symbol,
+                DreamInterpretation.main_symbol_emoji,
+                DreamInterpretation.emotions
+            )
+            .outerjoin(DreamInterpretation, DreamInterpretation.dream_id == Dream.id)
+            .where(
+                Dream.id.in_([dream_id for dream_id, _ in hits]),
+                Dream.is_deleted == False
+            )
+        )
+        rows = {row.id: row for row in result}
+        similar_dreams = [
+            self._to_similar_dream(rows[dream_id], similarity)
+            for dream_id, similarity in hits
+            if dream_id in rows
+        ]
+        
+        logger.info(f"Found {len(similar_dreams)} similar dreams (memory)")
+        return similar_dreams
+    
+    async def _is_small_journal(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        model: EmbeddingModelSpec
+    ) -> bool:
+        """Whether the user's vectors are few enough for an exact scan"""
+        max_rows = settings.VECTOR_EXACT_SCAN_MAX_ROWS
+        # Bounded count over the (user_id) covering index
+        user_rows = (
+            select(DreamEmbedding.id)
+            .join(Dream, Dream.id == DreamEmbedding.dream_id)
+            .where(
+                Dream.user_id == user_id,
+                Dream.is_deleted == False,
+                DreamEmbedding.model == model.name
+            )
+            .limit(max_rows + 1)
+            .subquery()
+        )
+        count = await session.scalar(select(func.count()).select_from(user_rows))
+        return count <= max_rows
+    
+    def _exact_candidates(
+        self,
+        query_embedding: List[float],
+        user_id: UUID,
+        model: EmbeddingModelSpec
+    ):
+        """All of the user's vectors with distances, kept away from the ANN index"""
+        distance = DreamEmbedding.embedding.cosine_distance(query_embedding).label("distance")
+        return (
+            select(DreamEmbedding.dream_id, distance)
+            .join(Dream, Dream.id == DreamEmbedding.dream_id)
+            .where(
+                Dream.user_id == user_id,
+                Dream.is_deleted == False,
+                DreamEmbedding.model == model.name
+            )
+            # Materialized so ordering by distance cannot use the ANN index
+            .cte("candidates")
+            .prefix_with("MATERIALIZED")
+        )
+    
+    def _ann_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_limit: int,
+        model: EmbeddingModelSpec,
+        user_id: Optional[UUID] = None
+    ):
+        """
+        Nearest vectors from the model's ANN index, threshold is applied afterwards.
+        Cast and model filter must match the partial index expression.
+        """
+        if settings.VECTOR_INDEX_PRECISION == "half":
+            return self._half_precision_candidates(query_embedding, candidate_limit, model, user_id)
+        
+        distance = cast(DreamEmbedding.embedding, Vector(model.dimensions)).cosine_distance(
+            query_embedding
+        ).label("distance")
+        query = self._with_user_filter(
+            select(DreamEmbedding.dream_id, distance).where(
+                DreamEmbedding.model == model.name
+            ),
+            user_id
+        )
+        return query.order_by(distance).limit(candidate_limit).subquery("candidates")
+    
+    def _half_precision_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_limit: int,
+        model: EmbeddingModelSpec,
+        user_id: Optional[UUID] = None
+    ):
+        """
+        Shortlist from the halfvec index, rescored with the float32 column.
+        The cast must match the index expression for the planner to use it.
+        """
+        half_distance = cast(DreamEmbedding.embedding, HalfVector(model.dimensions)).cosine_distance(
+            query_embedding
+        ).label("half_distance")
+        shortlist = (
+            self._with_user_filter(
+                select(DreamEmbedding.dream_id, DreamEmbedding.embedding, half_distance).where(
+                    DreamEmbedding.model == model.name
+                ),
+                user_id
+            )
+            .order_by(half_distance)
+            .limit(self._shortlist_size(candidate_limit))
+            .subquery("shortlist")
+        )
+        
+        distance = shortlist.c.embedding.cosine_distance(query_embedding).label("distance")
+        return (
+            select(shortlist.c.dream_id, distance)
+            .order_by(distance)
+            .limit(candidate_limit)
+            .subquery("candidates")
+        )
+    
+    @staticmethod
+    def _with_user_filter(query, user_id: Optional[UUID]):
+        if user_id:
+            # Large journals: user rows are filtered while walking the index
+            query = query.join(Dream, Dream.id == DreamEmbedding.dream_id).where(
+                Dream.user_id == user_id
+            )
+        return query
+    
+    async def _apply_ann_params(
+        self,
+        session: AsyncSession,
+        recall_target: Optional[float],
+        candidate_limit: int
+    ) -> None:
+        """Set index search breadth for the current transaction"""
+        target = recall_target or settings.VECTOR_SEARCH_RECALL_TARGET
+        _, probes_share, ef_search = next(
+            (profile for profile in _RECALL_PROFILES if profile[0] >= target),
+            _RECALL_PROFILES[-1]
+        )
+        if settings.VECTOR_INDEX_TYPE == "hnsw":
+            # ef_search below the shortlist size truncates results
+            name, value = "hnsw.ef_search", max(ef_search, self._shortlist_size(candidate_limit))
+        else:
+            lists = settings.VECTOR_IVFFLAT_LISTS
+            name, value = "ivfflat.probes", max(1, min(lists, math.ceil(lists * probes_share)))
+        await session.execute(select(func.set_config(name, str(value), True)))
+    
+    @staticmethod
+    def _shortlist_size(candidate_limit: int) -> int:
+        """Rows read from the index before exact rescoring"""
+        if settings.VECTOR_INDEX_PRECISION == "half":
+            return candidate_limit * max(1, settings.VECTOR_HALF_RESCORE_FACTOR)
+        return candidate_limit
     
     async def update_dream_embedding(
         self,
         dream_id: UUID,
         dream_text: str,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        user_id: Optional[UUID] = None,
+        embeddings: Optional[Dict[str, List[float]]] = None
     ) -> DreamEmbedding:
-        """Update or create embedding for a dream"""
+        """
+        Update or create embeddings for a dream.
+        Written for every write-target model so a model being backfilled or
+        kept for rollback stays complete; returns the active model's row.
+        embeddings holds vectors already computed for this text, by model name.
+        """
+        known = embeddings or {}
+        
+        async def embed(target: EmbeddingModelSpec) -> List[float]:
+            if target.name in known:
+                return known[target.name]
+            return await self.create_embedding(dream_text, model=target)
+        
         try:
-            # Generate embedding
-            embedding = await self.create_embedding(dream_text)
-            
-            # Check if embedding exists
-            existing = await db_session.execute(
-                select(DreamEmbedding).where(
-                    DreamEmbedding.dream_id == dream_id,
-                    DreamEmbedding.model == self.embedding_model
-                )
+            targets = await embedding_registry.write_targets()
+            embeddings = await asyncio.gather(
+                *(embed(target) for target in targets),
+                return_exceptions=True
             )
-            dream_embedding = existing.scalar_one_or_none()
+            # Only the active model is needed to serve this request
+            if isinstance(embeddings[0], BaseException):
+                raise embeddings[0]
             
-            if dream_embedding:
-                # Update existing
-                dream_embedding.embedding = embedding
-                logger.info(f"Updated embedding for dream {dream_id}")
-            else:
-                # Create new
-                dream_embedding = DreamEmbedding(
-                    dream_id=dream_id,
-                    embedding=embedding,
-                    model=self.embedding_model,
-                    metadata={"text_length": len(dream_text)}
-                )
-                db_session.add(dream_embedding)
-                logger.info(f"Created new embedding for dream {dream_id}")
+            active_embedding = None
+            for target, embedding in zip(targets, embeddings):
+                if isinstance(embedding, BaseException):
+                    logger.warning(f"Skipped {target.name} embedding for dream {dream_id}: {embedding}")
+                    continue
+                dream_embedding = await self._save_embedding(db_session, dream_id, dream_text, target, embedding)
+                active_embedding = active_embedding or dream_embedding
             
             await db_session.commit()
-            return dream_embedding
+            
+            # Cached matrices of the owner no longer match the database
+            if user_id is None:
+                user_id = await db_session.scalar(select(Dream.user_id).where(Dream.id == dream_id))
+            await user_vector_cache.invalidate(user_id)
+            return active_embedding
             
         except Exception as e:
             logger.error(f"Error updating dream embedding: {e}")
             await db_session.rollback()
             raise
     
+    async def _save_embedding(
+        self,
+        db_session: AsyncSession,
+        dream_id: UUID,
+        dream_text: str,
+        model: EmbeddingModelSpec,
+        embedding: List[float]
+    ) -> DreamEmbedding:
+        """Update or add the dream's row for one model"""
+        existing = await db_session.execute(
+            select(DreamEmbedding).where(
+                DreamEmbedding.dream_id == dream_id,
+                DreamEmbedding.model == model.name
+            )
+        )
+        dream_embedding = existing.scalar_one_or_none()
+        
+        if dream_embedding:
+            # Update existing
+            dream_embedding.embedding = embedding
+            logger.info(f"Updated {model.name} embedding for dream {dream_id}")
+        else:
+            # Create new
+            dream_embedding = DreamEmbedding(
+                dream_id=dream_id,
+                embedding=embedding,
+                model=model.name,
+                meta_data={"text_length": len(dream_text)}
+            )
+            db_session.add(dream_embedding)
+            logger.info(f"Created new {model.name} embedding for dream {dream_id}")
+        return dream_embedding
+    
     async def batch_create_embeddings(
         self,
         texts: List[str],
-        batch_size: int = 20
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        model: Optional[EmbeddingModelSpec] = None,
+        use_cache: bool = True
     ) -> List[List[float]]:
-        """Create embeddings for multiple texts in batches"""
-        embeddings = []
+        """
+        Create embeddings for multiple texts using multi-input requests.
+        Batches are limited by input count and total tokens, run with bounded
+        concurrency, and results keep the order of texts.
+        Bulk jobs pass use_cache=False so one-off texts do not fill Redis.
+        """
+        if not texts:
+            return []
+        model = model or await embedding_registry.active()
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            # Process batch in parallel
-            batch_embeddings = []
-            for text in batch:
-                embedding = await self.create_embedding(text)
-                batch_embeddings.append(embedding)
-            
-            embeddings.extend(batch_embeddings)
-            logger.info(f"Processed batch {i//batch_size + 1}/{(len(texts) + batch_size - 1)//batch_size}")
-        
-        return embeddings
-    
-    async def get_dream_context(
-        self,
-        dream_id: UUID,
-        db_session: AsyncSession,
-        context_size: int = 5
-    ) -> Dict[str, Any]:
-        """Get context from similar dreams for better interpretation"""
+        clean_texts = [self._prepare_text_for_embedding(text) for text in texts]
         
-        # Get the dream and its embedding
-        dream = await db_session.get(Dream, dream_id)
-        if not dream:
-            return {}
+        # Only embed texts that are not cached yet
+        if use_cache:
+            embeddings = await embedding_cache.get_many(model.name, clean_texts)
+        else:
+            embeddings = [None] * len(clean_texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
         
-        embedding_result = await db_session.execute(
-            select(DreamEmbedding).where(
-                DreamEmbedding.dream_id == dream_id,
-                DreamEmbedding.model == self.embedding_model
+        batches = [
+            [missing[i] for i in batch]
+            for batch in self._plan_batches(
+                [clean_texts[i] for i in missing],
+                max_inputs=batch_size or settings.EMBEDDING_BATCH_MAX_INPUTS,
+                max_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS
             )
+        ]
+        
+        semaphore = asyncio.Semaphore(
+            max_concurrency or settings.EMBEDDING_MAX_CONCURRENT_BATCHES
         )
-        dream_embedding = embedding_result.scalar_one_or_none()
+        completed = 0
         
-        if not dream_embedding:
-            return {}
+        async def run_batch(indices: List[int]) -> None:
+            nonlocal completed
+            async with semaphore:
+                batch_embeddings = await self._embed_batch_with_retry(
+                    [clean_texts[i] for i in indices],
+                    model
+                )
+            for index, embedding in zip(indices, batch_embeddings):
+                embeddings[index] = embedding
+            if use_cache:
+                await embedding_cache.set_many(
+                    model.name,
+                    [(clean_texts[i], embeddings[i]) for i in indices]
+                )
+            completed += 1
+            logger.info(f"Processed batch {completed}/{len(batches)} ({len(indices)} texts)")
         
-        # Find similar dreams
-        similar_dreams = await self.find_similar_dreams(
-            query_embedding=dream_embedding.embedding,
-            limit=context_size,
-            user_id=dream.user_id,
-            db_session=db_session
-        )
+        await asyncio.gather(*(run_batch(indices) for indices in batches))
+        return embeddings
+    
+    def _plan_batches(
+        self,
+        texts: List[str],
+        max_inputs: int,
+        max_tokens: int
+    ) -> List[List[int]]:
+        """Group text indices into batches bounded by count and token budget"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
         
-        # Extract patterns from similar dreams
-        symbols = []
-        emotions = []
-        themes = []
+        for index, text in enumerate(texts):
+            tokens = self.openai.count_tokens(text)
+            if current and (len(current) >= max_inputs or current_tokens + tokens > max_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(index)
+            current_tokens += tokens
         
-        for similar_dream, similarity in similar_dreams:
-            if similar_dream.id == dream_id:
-                continue
-                
-            if similar_dream.interpretation:
-                symbols.append(similar_dream.interpretation.main_symbol)
-                emotions.extend(similar_dream.interpretation.emotions)
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _embed_batch_with_retry(
+        self,
+        texts: List[str],
+        model: EmbeddingModelSpec,
+        retry_count: int = 3
+    ) -> List[List[float]]:
+        """Embed one batch, retrying and splitting it to isolate failing inputs"""
+        last_error = None
+        for attempt in range(retry_count):
+            if attempt > 0:
+                AI_RETRIES.labels(model=model.provider_model, operation="embedding").inc()
+            try:
+                return await get_embedding_provider(model, self.openai).embed(texts, model)
+            except Exception as e:
+                last_error = e
+                logger.warning(
+                    f"Embedding batch of {len(texts)} failed, attempt {attempt + 1}/{retry_count}: {e}"
+                )
+                if attempt < retry_count - 1:
+                    await asyncio.sleep(2 ** attempt)
         
-        # Aggregate context
-        context = {
-            "similar_count": len(similar_dreams) - 1,  # Exclude self
-            "common_symbols": list(set(symbols)),
-            "recurring_emotions": self._aggregate_emotions(emotions),
-            "average_similarity": np.mean([s for _, s in similar_dreams[1:]]) if len(similar_dreams) > 1 else 0
-        }
+        # Only input errors are worth isolating, upstream failures are not
+        if len(texts) == 1 or not isinstance(last_error, openai.BadRequestError):
+            raise last_error
         
-        return context
+        # Retry halves separately so one bad input does not fail the rest
+        middle = len(texts) // 2
+        left, right = await asyncio.gather(
+            self._embed_batch_with_retry(texts[:middle], model, retry_count=1),
+            self._embed_batch_with_retry(texts[middle:], model, retry_count=1)
+        )
+        return left + right
     
     def _aggregate_emotions(self, emotions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Aggregate emotions from multiple dreams"""
@@ -0,0 +1,240 @@
+# ai_context_v3
+"""
+🎯 main_goal: Incremental parser for streamed top-level JSON objects
+⚡ critical_requirements:
+   - Emit each top-level field as soon as its value is complete
+   - Stream selected string fields as decoded text deltas
+   - Handle escapes split across chunks
+   - No dependency on chunk boundaries
+📥 inputs_outputs: JSON text chunks -> Field and delta events
+🔧 functions_list:
+   - IncrementalJSONParser.feed: Consume chunk and return new events
+   - IncrementalJSONParser.result: Fields parsed so far
+🚫 forbidden_changes: Do not buffer streamed fields until completion
+🧪 tests: test_json_stream.py with split-chunk tests
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Event kinds
+FIELD = "field"
+DELTA = "delta"
+
+Event = Tuple[str, str, Any]
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+# Parser states
+_EXPECT_OBJECT = 0
+_EXPECT_KEY = 1
+_IN_KEY = 2
+_EXPECT_COLON = 3
+_EXPECT_VALUE = 4
+_IN_STREAM_STRING = 5
+_IN_RAW_VALUE = 6
+_DONE = 7
+
+
+class IncrementalJSONParser:
+    """
+    Parse a single top-level JSON object fed in arbitrary chunks.
+
+    Fields listed in stream_fields (string values only) are emitted as
+    ("delta", name, text) events while they are generated and as a
+    ("field", name, value) event when complete. Other fields are emitted
+    once as ("field", name, value).
+    """
+
+    def __init__(self, stream_fields: Iterable[str] = ()):
+        self.stream_fields = set(stream_fields)
+        self.fields: Dict[str, Any] = {}
+        self._state = _EXPECT_OBJECT
+        self._key: Optional[str] = None
+        self._buffer: List[str] = []
+        self._escape = False
+        self._unicode: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        # Raw value tracking
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def result(self) -> Dict[str, Any]:
+        """Fields parsed so far"""
+        return dict(self.fields)
+
+    def feed(self, chunk: str) -> List[Event]:
+        """Consume chunk and return events completed by it"""
+        events: List[Event] = []
+        delta: List[str] = []
+
+        for char in chunk:
+            state = self._state
+
+            if state == _IN_STREAM_STRING:
+                if self._consume_string_char(char, delta):
+                    continue
+                # Closing quote
+                value = "".join(self._buffer)
+                if delta:
+                    events.append((DELTA, self._key, "".join(delta)))
+                    delta = []
+                self._complete_field(value, events)
+
+            elif state == _IN_RAW_VALUE:
+                if self._consume_raw_char(char):
+                    self._buffer.append(char)
+                    if self._depth == 0 and not self._in_string and char in '"]}':
+                        self._complete_raw(events)
+                    continue
+                # Scalar terminated by a delimiter
+                self._complete_raw(events)
+                self._handle_structural(char, events)
+
+            elif state == _IN_KEY:
+                if self._consume_string_char(char, None):
+                    continue
+                self._key = "".join(self._buffer)
+                self._buffer = []
+                self._state = _EXPECT_COLON
+
+            elif state == _EXPECT_VALUE:
+                if char.isspace():
+                    continue
+                self._buffer = []
+                if char == '"' and self._key in self.stream_fields:
+                    self._reset_string()
+                    self._state = _IN_STREAM_STRING
+                else:
+                    self._depth = 0
+                    self._in_string = False
+                    self._escape = False
+                    self._state = _IN_RAW_VALUE
+                    self._consume_raw_char(char)
+                    self._buffer.append(char)
+
+            else:
+                self._handle_structural(char, events)
+
+        if delta and self._state == _IN_STREAM_STRING:
+            events.append((DELTA, self._key, "".join(delta)))
+        return events
+
+    def _handle_structural(self, char: str, events: List[Event]) -> None:
+        """Handle characters between keys and values"""
+        if char.isspace():
+            return
+        state = self._state
+
+        if state == _EXPECT_OBJECT:
+            if char == "{":
+                self._state = _EXPECT_KEY
+        elif state == _EXPECT_KEY:
+            if char == '"':
+                self._buffer = []
+                self._reset_string()
+                self._state = _IN_KEY
+            elif char == "}":
+                self._state = _DONE
+            # Commas between members are skipped
+        elif state == _EXPECT_COLON:
+            if char == ":":
+                self._state = _EXPECT_VALUE
+
+    def _reset_string(self) -> None:
+        self._escape = False
+        self._unicode = None
+        self._high_surrogate = None
+
+    def _consume_string_char(self, char: str, delta: Optional[List[str]]) -> bool:
+        """
+        Decode one character of a JSON string into the buffer.
+        Returns False on the closing quote.
+        """
+        decoded = None
+
+        if self._unicode is not None:
+            self._unicode += char
+            if len(self._unicode) < 4:
+                return True
+            code = int(self._unicode, 16)
+            self._unicode = None
+            if 0xD800 <= code <= 0xDBFF:
+                self._high_surrogate = code
+                return True
+            if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            decoded = chr(code)
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+                return True
+            decoded = _ESCAPES.get(char, char)
+        elif char == "\\":
+            self._escape = True
+            return True
+        elif char == '"':
+            return False
+        else:
+            decoded = char
+
+        self._buffer.append(decoded)
+        if delta is not None:
+            delta.append(decoded)
+        return True
+
+    def _consume_raw_char(self, char: str) -> bool:
+        """
+        Track nesting of a raw value.
+        Returns False when char terminates a top-level scalar.
+        """
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return True
+
+        if char == '"':
+            self._in_string = True
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            if self._depth == 0:
+                return False
+            self._depth -= 1
+        elif self._depth == 0 and (char == "," or char.isspace()):
+            return False
+        return True
+
+    def _complete_raw(self, events: List[Event]) -> None:
+        raw = "".join(self._buffer)
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        self._complete_field(value, events)
+
+    def _complete_field(self, value: Any, events: List[Event]) -> None:
+        self.fields[self._key] = value
+        events.append((FIELD, self._key, value))
+        self._key = None
+        self._buffer = []
+        self._state = _EXPECT_KEY
@@ -4,22 +4,26 @@
 ⚡ critical_requirements: 
    - Async operations
    - Error handling with retries
-   - Rate limiting respect
+   - Rate limiting respect (shared RPM/TPM governor)
    - Response caching
 📥 inputs_outputs: Prompts -> AI responses
 🔧 functions_list: 
    - chat_completion: Get GPT-4 response
+   - chat_completion_stream: Stream GPT-4 response content
    - create_embedding: Generate text embeddings
+   - create_embeddings: Generate embeddings for many texts in one request
    - transcribe_audio: Convert voice to text
    - text_to_speech: Generate audio from text
+   - text_to_speech_stream: Generate audio from text, yielded as it arrives
 🚫 forbidden_changes: Do not expose API keys
 🧪 tests: test_openai_service.py
 """
 
 import hashlib
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, BinaryIO, Union
 import asyncio
+import time
 from datetime import datetime, timedelta
 
 import openai
@@ -29,16 +33,46 @@ import tiktoken
 
 from app.core.config import settings
 from app.core.redis import get_redis
+from app.core.ai_clients import get_openai_client, get_tokenizer
+from app.core.metrics import (
+    AI_CACHE_REQUESTS,
+    AI_HEDGED_REQUESTS,
+    AI_RETRIES,
+    AI_TOKENS,
+    AI_UPSTREAM_LATENCY,
+    track_upstream,
+)
+from app.services.ai.response_cache import response_cache_store
+from app.services.ai.single_flight import completion_flights
+from app.services.ai.rate_governor import rate_governor
+from app.services.ai.resilience import (
+    circuit_breaker,
+    latency_tracker,
+    retry_budget,
+)
 from app.models.schemas.common import ErrorResponse
 
+# Errors that indicate upstream health problems (not bad requests)
+_UPSTREAM_FAILURES = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+    openai.RateLimitError,
+)
+
 
 class OpenAIService:
     """Service for OpenAI API interactions"""
     
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        encoding: Optional[tiktoken.Encoding] = None
+    ):
+        # Shared pooled client and tokenizer from app lifespan by default
+        self.client = client or get_openai_client()
         self.redis = None
-        self.encoding = tiktoken.encoding_for_model("gpt-4")
+        self.encoding = encoding or get_tokenizer(settings.OPENAI_TOKENIZER_MODEL)
         
     async def _get_redis(self):
         """Lazy Redis connection getter"""
@@ -51,25 +85,50 @@ class OpenAIService:
         prompt_hash = hashlib.sha256(f"{prompt}:{model}".encode()).hexdigest()
         return f"ai_cache:{model}:{prompt_hash}"
     
+    @staticmethod
+    def _split_cache_key(cache_key: str) -> Tuple[str, str]:
+        """Split cache key into (model, prompt_hash)"""
+        model, prompt_hash = cache_key.split(":", 1)[1].rsplit(":", 1)
+        return model, prompt_hash
+    
     async def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get cached response from Redis"""
+        """Get cached response from Redis, falling back to the database tier"""
         try:
             redis = await self._get_redis()
             cached = await redis.get(cache_key)
             if cached:
                 logger.debug(f"Cache hit for key: {cache_key}")
+                AI_CACHE_REQUESTS.labels(cache="ai_cache_redis", result="hit").inc()
                 return json.loads(cached)
+            AI_CACHE_REQUESTS.labels(cache="ai_cache_redis", result="miss").inc()
         except Exception as e:
             logger.error(f"Redis cache error: {e}")
+            AI_CACHE_REQUESTS.labels(cache="ai_cache_redis", result="error").inc()
+        
+        # Redis miss: read through to Postgres and re-promote hot entry
+        model, prompt_hash = self._split_cache_key(cache_key)
+        stored = await response_cache_store.get(prompt_hash, model)
+        AI_CACHE_REQUESTS.labels(cache="ai_cache_db", result="hit" if stored else "miss").inc()
+        if stored:
+            response, remaining_ttl = stored
+            logger.debug(f"DB cache hit for key: {cache_key}")
+            await self._promote_response(
+                cache_key,
+                response,
+                min(settings.AI_CACHE_REDIS_TTL, remaining_ttl)
+            )
+            return response
         return None
     
-    async def _cache_response(
-        self, 
-        cache_key: str, 
-        response: Dict[str, Any], 
-        ttl_seconds: int = 3600
+    async def _promote_response(
+        self,
+        cache_key: str,
+        response: Dict[str, Any],
+        ttl_seconds: int
     ) -> None:
-        """Cache response in Redis"""
+        """Write response to Redis only"""
+        if ttl_seconds <= 0:
+            return
         try:
             redis = await self._get_redis()
             await redis.setex(
@@ -81,10 +140,34 @@ class OpenAIService:
         except Exception as e:
             logger.error(f"Redis cache write error: {e}")
     
+    async def _cache_response(
+        self, 
+        cache_key: str, 
+        response: Dict[str, Any], 
+        ttl_seconds: int = 3600
+    ) -> None:
+        """Cache response in Redis and queue it for the database tier"""
+        await self._promote_response(cache_key, response, ttl_seconds)
+        
+        model, prompt_hash = self._split_cache_key(cache_key)
+        response_cache_store.enqueue(prompt_hash, model, response)
+    
     def count_tokens(self, text: str) -> int:
         """Count tokens in text"""
         return len(self.encoding.encode(text))
     
+    def _estimate_request_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Upper bound of tokens a completion request can consume"""
+        return sum(self.count_tokens(m["content"]) for m in messages) + max_tokens
+    
+    @staticmethod
+    def _retry_after(error: openai.APIStatusError) -> Optional[float]:
+        """Retry-After header value in seconds, if present"""
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            return None
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -92,34 +175,70 @@ class OpenAIService:
         temperature: float = 0.7,
         max_tokens: int = 2000,
         use_cache: bool = True,
-        cache_ttl: int = 3600,
-        retry_count: int = 3
+        cache_ttl: Optional[int] = None,
+        retry_count: int = 3,
+        priority: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get chat completion from OpenAI"""
+        """
+        Get chat completion from OpenAI.
+        priority is the caller's subscription type, used to order requests
+        waiting for upstream budget.
+        """
+        
+        if not use_cache:
+            return await self._request_completion(
+                messages, model, temperature, max_tokens, None, cache_ttl, retry_count, priority
+            )
         
         # Generate cache key if caching is enabled
-        cache_key = None
-        if use_cache:
-            prompt_text = json.dumps(messages, sort_keys=True)
-            cache_key = self._generate_cache_key(prompt_text, model)
-            
-            # Check cache
-            cached = await self._get_cached_response(cache_key)
-            if cached:
-                return cached
+        prompt_text = json.dumps(messages, sort_keys=True)
+        cache_key = self._generate_cache_key(prompt_text, model)
+        
+        # Check cache
+        cached = await self._get_cached_response(cache_key)
+        if cached:
+            return cached
+        
+        # Coalesce identical concurrent requests into one upstream call
+        return await completion_flights.do(
+            cache_key,
+            lambda: self._request_completion(
+                messages, model, temperature, max_tokens, cache_key, cache_ttl, retry_count, priority
+            ),
+            lambda: self._get_cached_response(cache_key)
+        )
+    
+    async def _request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        cache_key: Optional[str],
+        cache_ttl: Optional[int],
+        retry_count: int,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Call chat completion API with retries and cache the result"""
+        
+        estimated_tokens = self._estimate_request_tokens(messages, max_tokens)
+        retry_budget.deposit()
         
         # Retry logic for API calls
         last_error = None
         for attempt in range(retry_count):
+            if attempt > 0 and not retry_budget.try_spend("retry"):
+                logger.warning("Retry budget exhausted, not retrying")
+                break
+            if attempt > 0:
+                AI_RETRIES.labels(model=model, operation="chat").inc()
+            # Fail fast while upstream is unhealthy
+            circuit_breaker.check(model)
             try:
                 start_time = datetime.now()
                 
-                response = await self.client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    response_format={"type": "json_object"}
+                response = await self._create_completion_hedged(
+                    messages, model, temperature, max_tokens, estimated_tokens, priority
                 )
                 
                 processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -137,15 +256,21 @@ class OpenAIService:
                 }
                 
                 # Cache successful response
-                if use_cache and cache_key:
-                    await self._cache_response(cache_key, result, cache_ttl)
+                if cache_key:
+                    await self._cache_response(
+                        cache_key,
+                        result,
+                        cache_ttl or settings.AI_CACHE_REDIS_TTL
+                    )
                 
                 logger.info(f"OpenAI completion successful: {result['usage']['total_tokens']} tokens")
                 return result
                 
             except openai.RateLimitError as e:
                 logger.warning(f"Rate limit error, attempt {attempt + 1}/{retry_count}")
-                if attempt < retry_count - 1:
+                await rate_governor.report_rate_limited(model, self._retry_after(e))
+                # The governor cooldown paces the next attempt when enabled
+                if attempt < retry_count - 1 and not rate_governor.enabled:
                     await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 last_error = e
                 
@@ -163,17 +288,228 @@ class OpenAIService:
         # All retries failed
         raise Exception(f"Failed after {retry_count} attempts: {last_error}")
     
+    async def _create_completion_hedged(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        estimated_tokens: int,
+        priority: Optional[str]
+    ):
+        """
+        Send a completion, hedging with a second request when the first is
+        slower than recent p95 latency. The first successful response wins.
+        """
+        send = lambda: self._create_completion(
+            messages, model, temperature, max_tokens, estimated_tokens, priority
+        )
+        
+        hedge_delay = latency_tracker.hedge_delay(model) if settings.OPENAI_HEDGING_ENABLED else None
+        if hedge_delay is None:
+            return await send()
+        
+        primary = asyncio.create_task(send())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if done or not retry_budget.try_spend("hedge"):
+                return await primary
+            
+            AI_HEDGED_REQUESTS.labels(model=model, outcome="sent").inc()
+            hedge = asyncio.create_task(send())
+            pending.add(hedge)
+            
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        outcome = "hedge_won" if task is hedge else "primary_won"
+                        AI_HEDGED_REQUESTS.labels(model=model, outcome=outcome).inc()
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                # Let the losing attempts give their budget charge back
+                await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def _create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        estimated_tokens: int,
+        priority: Optional[str]
+    ):
+        """Single upstream completion call within budget and breaker accounting"""
+        charged_tokens = await rate_governor.acquire(model, estimated_tokens, priority)
+        used_tokens = 0  # A failed or cancelled request gives its charge back
+        started = time.monotonic()
+        try:
+            with track_upstream(model, "chat"):
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"}
+                )
+            used_tokens = response.usage.total_tokens
+        except _UPSTREAM_FAILURES:
+            circuit_breaker.record_failure(model)
+            raise
+        except openai.APIStatusError:
+            # Upstream answered, the request itself was rejected
+            circuit_breaker.record_success(model)
+            raise
+        finally:
+            # Shielded so a losing hedge still settles when cancelled again
+            await asyncio.shield(rate_governor.settle(model, charged_tokens, used_tokens))
+        
+        latency_tracker.record(model, time.monotonic() - started)
+        circuit_breaker.record_success(model)
+        self._count_tokens_used(
+            model, "chat", response.usage.prompt_tokens, response.usage.completion_tokens
+        )
+        return response
+    
+    @staticmethod
+    def _count_tokens_used(
+        model: str,
+        operation: str,
+        prompt_tokens: int,
+        completion_tokens: int = 0
+    ) -> None:
+        AI_TOKENS.labels(model=model, operation=operation, kind="prompt").inc(prompt_tokens)
+        if completion_tokens:
+            AI_TOKENS.labels(model=model, operation=operation, kind="completion").inc(completion_tokens)
+    
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4-turbo-preview",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        cache_ttl: Optional[int] = None,
+        priority: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream chat completion content.
+        Yields {"delta": str} chunks, then a final {"result": dict} with the
+        same shape chat_completion returns. Cache hits are replayed as one chunk.
+        """
+        cache_key = None
+        if use_cache:
+            prompt_text = json.dumps(messages, sort_keys=True)
+            cache_key = self._generate_cache_key(prompt_text, model)
+            
+            cached = await self._get_cached_response(cache_key)
+            if cached:
+                yield {"delta": cached["content"]}
+                yield {"result": cached}
+                return
+        
+        circuit_breaker.check(model)
+        charged_tokens = await rate_governor.acquire(
+            model,
+            self._estimate_request_tokens(messages, max_tokens),
+            priority
+        )
+        
+        start_time = datetime.now()
+        content_parts = []
+        finish_reason = None
+        response_model = model
+        
+        # Streaming responses carry no usage, estimate it locally
+        prompt_tokens = sum(self.count_tokens(m["content"]) for m in messages)
+        stream = None
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                response_model = chunk.model or response_model
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                if choice.delta and choice.delta.content:
+                    content_parts.append(choice.delta.content)
+                    yield {"delta": choice.delta.content}
+        except _UPSTREAM_FAILURES as e:
+            circuit_breaker.record_failure(model)
+            AI_UPSTREAM_LATENCY.labels(model=model, operation="chat_stream", status="error").observe(
+                (datetime.now() - start_time).total_seconds()
+            )
+            if isinstance(e, openai.RateLimitError):
+                await rate_governor.report_rate_limited(model, self._retry_after(e))
+            raise
+        finally:
+            # Also reached when the request fails, the stream breaks or the
+            # client disconnects: only what was generated stays charged
+            completion_tokens = self.count_tokens("".join(content_parts))
+            used_tokens = prompt_tokens + completion_tokens if stream is not None else 0
+            await rate_governor.settle(model, charged_tokens, used_tokens)
+        circuit_breaker.record_success(model)
+        
+        content = "".join(content_parts)
+        processing_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        result = {
+            "content": content,
+            "model": response_model,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            "processing_time_ms": processing_time_ms,
+            "finish_reason": finish_reason
+        }
+        
+        AI_UPSTREAM_LATENCY.labels(model=model, operation="chat_stream", status="ok").observe(
+            processing_time_ms / 1000
+        )
+        self._count_tokens_used(model, "chat_stream", prompt_tokens, completion_tokens)
+        
+        if cache_key and finish_reason == "stop":
+            await self._cache_response(
+                cache_key,
+                result,
+                cache_ttl or settings.AI_CACHE_REDIS_TTL
+            )
+        
+        logger.info(f"OpenAI streamed completion finished: ~{result['usage']['total_tokens']} tokens")
+        yield {"result": result}
+    
     async def create_embedding(
         self,
         text: str,
-        model: str = "text-embedding-ada-002"
+        model: str = "text-embedding-ada-002",
+        dimensions: Optional[int] = None
     ) -> List[float]:
         """Create text embedding for vector search"""
         try:
-            response = await self.client.embeddings.create(
-                model=model,
-                input=text
-            )
+            with track_upstream(model, "embedding"):
+                response = await self.client.embeddings.create(
+                    model=model,
+                    input=text,
+                    **self._dimensions_option(dimensions)
+                )
+            self._count_tokens_used(model, "embedding", response.usage.prompt_tokens)
             
             embedding = response.data[0].embedding
             logger.info(f"Created embedding of dimension {len(embedding)}")
@@ -183,18 +519,57 @@ class OpenAIService:
             logger.error(f"Error creating embedding: {e}")
             raise
     
+    async def create_embeddings(
+        self,
+        texts: List[str],
+        model: str = "text-embedding-ada-002",
+        dimensions: Optional[int] = None
+    ) -> List[List[float]]:
+        """Create embeddings for multiple texts in a single request"""
+        try:
+            with track_upstream(model, "embedding"):
+                response = await self.client.embeddings.create(
+                    model=model,
+                    input=texts,
+                    **self._dimensions_option(dimensions)
+                )
+            self._count_tokens_used(model, "embedding", response.usage.prompt_tokens)
+            
+            # Results are not guaranteed to be in input order
+            data = sorted(response.data, key=lambda item: item.index)
+            embeddings = [item.embedding for item in data]
+            
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                )
+            
+            logger.info(f"Created {len(embeddings)} embeddings in one request")
+            return embeddings
+            
+        except Exception as e:
+            logger.error(f"Error creating embeddings batch: {e}")
+            raise
+    
+    @staticmethod
+    def _dimensions_option(dimensions: Optional[int]) -> Dict[str, Any]:
+        """Shortened text-embedding-3 vectors; sent as body since the client has no argument for it"""
+        return {"extra_body": {"dimensions": dimensions}} if dimensions else {}
+    
     async def transcribe_audio(
         self,
-        audio_file: bytes,
-        language: str = "ru"
+        audio_file: Union[bytes, BinaryIO],
+        language: str = "ru",
+        filename: str = "audio.webm"
     ) -> str:
-        """Transcribe audio to text using Whisper"""
+        """Transcribe audio to text using Whisper; file objects are streamed, not read into memory"""
         try:
-            response = await self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=("audio.webm", audio_file),
-                language=language
-            )
+            with track_upstream("whisper-1", "whisper"):
+                response = await self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(filename, audio_file),
+                    language=language
+                )
             
             logger.info(f"Transcribed audio successfully: {len(response.text)} chars")
             return response.text
@@ -212,12 +587,13 @@ class OpenAIService:
     ) -> bytes:
         """Convert text to speech"""
         try:
-            response = await self.client.audio.speech.create(
-                model=model,
-                voice=voice,
-                input=text,
-                speed=speed
-            )
+            with track_upstream(model, "tts"):
+                response = await self.client.audio.speech.create(
+                    model=model,
+                    voice=voice,
+                    input=text,
+                    speed=speed
+                )
             
             audio_data = response.content
             logger.info(f"Generated TTS audio: {len(audio_data)} bytes")
@@ -225,4 +601,29 @@ class OpenAIService:
             
         except Exception as e:
             logger.error(f"Error in text-to-speech: {e}")
+            raise
+    
+    async def text_to_speech_stream(
+        self,
+        text: str,
+        voice: str = "nova",
+        model: str = "tts-1",
+        speed: float = 1.0,
+        chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Convert text to speech, yielding MP3 chunks as the upstream sends them"""
+        try:
+            with track_upstream(model, "tts"):
+                async with self.client.audio.speech.with_streaming_response.create(
+                    model=model,
+                    voice=voice,
+                    input=text,
+                    speed=speed,
+                    response_format="mp3"
+                ) as response:
+                    async for chunk in response.iter_bytes(chunk_size):
+                        yield chunk
+            
+        except Exception as e:
+            logger.error(f"Error in streaming text-to-speech: {e}")
             raise
\ No newline at end of file
@@ -0,0 +1,249 @@
+# ai_context_v3
+"""
+🎯 main_goal: Shared RPM/TPM budget governor for upstream AI calls
+⚡ critical_requirements:
+   - Redis token buckets shared by all workers
+   - Pre-charge estimated tokens, settle with actual usage
+   - Priority lanes by subscription type (paid ahead of free)
+   - Cooldown after upstream 429 instead of lockstep retries
+   - Fail open when Redis is unavailable
+📥 inputs_outputs: (model, estimated tokens, subscription type) -> Budget reservation
+🔧 functions_list:
+   - RateGovernor.acquire: Wait for budget in priority order
+   - RateGovernor.settle: Refund or charge the estimate difference
+   - RateGovernor.report_rate_limited: Pause all workers after a 429
+🚫 forbidden_changes: Do not let free traffic drain the reserved budget
+🧪 tests: test_rate_governor.py with priority ordering tests
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+from typing import List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import (
+    AI_GOVERNOR_QUEUE_DEPTH,
+    AI_GOVERNOR_QUEUE_WAIT,
+    AI_GOVERNOR_THROTTLED,
+    AI_GOVERNOR_TIMEOUTS,
+)
+from app.core.redis import get_redis
+
+# Refill both buckets and take budget if it stays above the lane reserve.
+# Returns 0 when granted, otherwise milliseconds to wait.
+_ACQUIRE_SCRIPT = """
+local cooldown = redis.call("pttl", KEYS[2])
+if cooldown > 0 then
+    return cooldown
+end
+
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+
+local time = redis.call("time")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local state = redis.call("hmget", KEYS[1], "req", "tok", "ts")
+local req = tonumber(state[1]) or rpm
+local tok = tonumber(state[2]) or tpm
+local ts = tonumber(state[3]) or now
+
+local elapsed = math.max(0, now - ts)
+req = math.min(rpm, req + elapsed * rpm / 60000)
+tok = math.min(tpm, tok + elapsed * tpm / 60000)
+
+-- A single request may never need more than the lane can ever hold
+cost = math.min(cost, tpm * (1 - reserve))
+
+local req_floor = rpm * reserve
+local tok_floor = tpm * reserve
+local wait = 0
+if req - 1 < req_floor then
+    wait = math.max(wait, (req_floor + 1 - req) * 60000 / rpm)
+end
+if tok - cost < tok_floor then
+    wait = math.max(wait, (tok_floor + cost - tok) * 60000 / tpm)
+end
+
+if wait == 0 then
+    req = req - 1
+    tok = tok - cost
+end
+
+redis.call("hset", KEYS[1], "req", req, "tok", tok, "ts", now)
+redis.call("pexpire", KEYS[1], 120000)
+return math.ceil(wait)
+"""
+
+# Return unused pre-charged tokens (or charge extra when negative)
+_SETTLE_SCRIPT = """
+local tpm = tonumber(ARGV[1])
+local delta = tonumber(ARGV[2])
+local tok = tonumber(redis.call("hget", KEYS[1], "tok"))
+if not tok then
+    return 0
+end
+redis.call("hset", KEYS[1], "tok", math.min(tpm, tok + delta))
+return 1
+"""
+
+# Lower rank is served first
+_PRIORITY_RANKS = {
+    "pro": 0,
+    "yearly": 0,
+    "trial": 1,
+    "free": 2,
+}
+
+
+class UpstreamBudgetTimeout(Exception):
+    """Raised when a request waited too long for upstream budget"""
+
+
+class RateGovernor:
+    """Token-bucket governor for one upstream quota per model"""
+
+    PREFIX = "ai_governor"
+
+    def __init__(self):
+        # Per-model heap of [rank, seq, wake event]
+        self._waiters = {}
+        self._seq = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.OPENAI_GOVERNOR_ENABLED
+
+    @staticmethod
+    def priority_rank(subscription_type: Optional[str]) -> int:
+        return _PRIORITY_RANKS.get(subscription_type or "free", 2)
+
+    def _reserve_fraction(self, rank: int) -> float:
+        """Share of the bucket this lane may not consume"""
+        return settings.OPENAI_GOVERNOR_FREE_RESERVE * rank / 2
+
+    def _keys(self, model: str) -> List[str]:
+        return [f"{self.PREFIX}:{model}", f"{self.PREFIX}:{model}:cooldown"]
+
+    async def acquire(
+        self,
+        model: str,
+        estimated_tokens: int,
+        subscription_type: Optional[str] = None
+    ) -> int:
+        """
+        Wait until the model budget allows the request.
+        Returns the number of tokens charged, to be settled later.
+        """
+        if not self.enabled:
+            return 0
+
+        rank = self.priority_rank(subscription_type)
+        lane = subscription_type or "free"
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + settings.OPENAI_GOVERNOR_MAX_WAIT
+
+        waiters = self._waiters.setdefault(model, [])
+        entry = [rank, next(self._seq), asyncio.Event()]
+        previous_head = waiters[0] if waiters else None
+        heapq.heappush(waiters, entry)
+        if previous_head is not None and waiters[0] is entry:
+            # Preempt a lower priority head that is sleeping
+            previous_head[2].set()
+        AI_GOVERNOR_QUEUE_DEPTH.labels(model=model).set(len(waiters))
+
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    AI_GOVERNOR_TIMEOUTS.labels(model=model, priority=lane).inc()
+                    raise UpstreamBudgetTimeout(
+                        f"No upstream budget for {model} within {settings.OPENAI_GOVERNOR_MAX_WAIT}s"
+                    )
+
+                entry[2].clear()
+                if waiters[0] is not entry:
+                    # Only the head of the queue polls Redis
+                    await self._sleep_until_woken(entry[2], remaining)
+                    continue
+
+                wait_ms = await self._try_take(model, estimated_tokens, rank)
+                if wait_ms == 0:
+                    return estimated_tokens
+
+                # Jitter keeps workers from polling in lockstep
+                delay = wait_ms / 1000 * random.uniform(1.0, 1.2)
+                await self._sleep_until_woken(entry[2], min(delay, remaining))
+
+        finally:
+            waiters.remove(entry)
+            heapq.heapify(waiters)
+            if waiters:
+                waiters[0][2].set()
+            AI_GOVERNOR_QUEUE_DEPTH.labels(model=model).set(len(waiters))
+            AI_GOVERNOR_QUEUE_WAIT.labels(model=model, priority=lane).observe(
+                loop.time() - started
+            )
+
+    async def settle(self, model: str, charged_tokens: int, actual_tokens: int) -> None:
+        """Adjust bucket by the difference between estimate and actual usage"""
+        if not self.enabled or not charged_tokens:
+            return
+        try:
+            redis = get_redis()
+            await redis.eval(
+                _SETTLE_SCRIPT,
+                1,
+                self._keys(model)[0],
+                settings.OPENAI_TPM_LIMIT,
+                charged_tokens - actual_tokens
+            )
+        except Exception as e:
+            logger.error(f"Governor settle error: {e}")
+
+    async def report_rate_limited(self, model: str, retry_after: Optional[float] = None) -> None:
+        """Pause the model budget for every worker after an upstream 429"""
+        AI_GOVERNOR_THROTTLED.labels(model=model).inc()
+        if not self.enabled:
+            return
+        cooldown_ms = int((retry_after or settings.OPENAI_GOVERNOR_COOLDOWN) * 1000)
+        try:
+            redis = get_redis()
+            # Keep an existing longer cooldown
+            await redis.set(self._keys(model)[1], "1", px=cooldown_ms, nx=True)
+        except Exception as e:
+            logger.error(f"Governor cooldown error: {e}")
+
+    async def _try_take(self, model: str, estimated_tokens: int, rank: int) -> int:
+        try:
+            redis = get_redis()
+            return int(await redis.eval(
+                _ACQUIRE_SCRIPT,
+                2,
+                *self._keys(model),
+                settings.OPENAI_RPM_LIMIT,
+                settings.OPENAI_TPM_LIMIT,
+                estimated_tokens,
+                self._reserve_fraction(rank)
+            ))
+        except Exception as e:
+            logger.error(f"Governor unavailable, allowing request: {e}")
+            return 0
+
+    @staticmethod
+    async def _sleep_until_woken(event: asyncio.Event, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Shared governor instance
+rate_governor = RateGovernor()
@@ -0,0 +1,200 @@
+# ai_context_v3
+"""
+🎯 main_goal: Tail-latency and failure protection for upstream AI calls
+⚡ critical_requirements:
+   - Hedge delay from p95 of recent successful latencies
+   - Circuit breaker that fails fast when upstream error rate spikes
+   - Global retry/hedge budget so extra attempts cannot amplify an outage
+   - In-process state, cheap enough to consult on every request
+📥 inputs_outputs: Call outcomes and latencies -> Hedge/retry/fail-fast decisions
+🔧 functions_list:
+   - LatencyTracker.hedge_delay: Delay before sending a hedged request
+   - CircuitBreaker.allow: Whether a call may go upstream
+   - RetryBudget.try_spend: Take one retry or hedge from the budget
+🚫 forbidden_changes: Do not retry or hedge without spending budget
+🧪 tests: test_resilience.py with breaker state transition tests
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import (
+    AI_CIRCUIT_REJECTIONS,
+    AI_CIRCUIT_STATE,
+    AI_RETRY_BUDGET_EXHAUSTED,
+)
+
+# Circuit states, exported as gauge values
+CLOSED = 0
+HALF_OPEN = 1
+OPEN = 2
+
+
+class CircuitOpenError(Exception):
+    """Raised when upstream calls are short-circuited"""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit open for {model}, retry in {retry_in:.0f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per model"""
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or settings.OPENAI_LATENCY_WINDOW
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = self._samples[model] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        """Latency percentile in seconds, None until enough samples exist"""
+        samples = self._samples.get(model)
+        if not samples or len(samples) < settings.OPENAI_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)
+        return ordered[index]
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, None if hedging should not happen"""
+        p95 = self.percentile(model, 0.95)
+        if p95 is None:
+            return None
+        return max(p95, settings.OPENAI_HEDGE_MIN_DELAY)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker per model"""
+
+    def __init__(self):
+        # model -> deque of (timestamp, failed)
+        self._outcomes: Dict[str, Deque[Tuple[float, bool]]] = {}
+        self._state: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        # Probe start times; a probe that never reports back expires
+        self._probe_started: Dict[str, float] = {}
+
+    def state(self, model: str) -> int:
+        return self._state.get(model, CLOSED)
+
+    def allow(self, model: str) -> bool:
+        """Whether a call may be sent now; half-open admits a single probe"""
+        state = self.state(model)
+        if state == CLOSED:
+            return True
+
+        if state == OPEN:
+            if time.monotonic() - self._opened_at[model] < settings.OPENAI_CIRCUIT_OPEN_SECONDS:
+                AI_CIRCUIT_REJECTIONS.labels(model=model).inc()
+                return False
+            self._set_state(model, HALF_OPEN)
+
+        now = time.monotonic()
+        probe_started = self._probe_started.get(model)
+        if probe_started is not None and now - probe_started < settings.OPENAI_REQUEST_TIMEOUT:
+            AI_CIRCUIT_REJECTIONS.labels(model=model).inc()
+            return False
+        self._probe_started[model] = now
+        return True
+
+    def check(self, model: str) -> None:
+        """Raise CircuitOpenError if the call must not go upstream"""
+        if not self.allow(model):
+            opened_at = self._opened_at.get(model, time.monotonic())
+            retry_in = settings.OPENAI_CIRCUIT_OPEN_SECONDS - (time.monotonic() - opened_at)
+            raise CircuitOpenError(model, max(0.0, retry_in))
+
+    def record_success(self, model: str) -> None:
+        if self.state(model) == HALF_OPEN:
+            logger.info(f"Circuit closed for {model}")
+            self._outcomes.pop(model, None)
+            self._set_state(model, CLOSED)
+        self._probe_started.pop(model, None)
+        self._record(model, failed=False)
+
+    def record_failure(self, model: str) -> None:
+        self._probe_started.pop(model, None)
+        if self.state(model) == HALF_OPEN:
+            self._open(model)
+            return
+        self._record(model, failed=True)
+
+        outcomes = self._outcomes[model]
+        if len(outcomes) < settings.OPENAI_CIRCUIT_MIN_REQUESTS:
+            return
+        failures = sum(1 for _, failed in outcomes if failed)
+        if failures / len(outcomes) >= settings.OPENAI_CIRCUIT_FAILURE_RATE:
+            self._open(model)
+
+    def _record(self, model: str, failed: bool) -> None:
+        now = time.monotonic()
+        outcomes = self._outcomes.setdefault(model, deque())
+        outcomes.append((now, failed))
+        horizon = now - settings.OPENAI_CIRCUIT_WINDOW
+        while outcomes and outcomes[0][0] < horizon:
+            outcomes.popleft()
+
+    def _open(self, model: str) -> None:
+        logger.warning(f"Circuit opened for {model}")
+        self._opened_at[model] = time.monotonic()
+        self._outcomes.pop(model, None)
+        self._set_state(model, OPEN)
+
+    def _set_state(self, model: str, state: int) -> None:
+        self._state[model] = state
+        AI_CIRCUIT_STATE.labels(model=model).set(state)
+
+
+class RetryBudget:
+    """
+    Token budget shared by retries and hedges.
+    Every original request deposits a fraction of a token and a small
+    per-second floor keeps retries possible at low traffic.
+    """
+
+    def __init__(self):
+        self._balance = float(settings.OPENAI_RETRY_BUDGET_MAX)
+        self._updated = time.monotonic()
+
+    def deposit(self) -> None:
+        """Credit the budget for one original request"""
+        self._refill()
+        self._balance = min(
+            settings.OPENAI_RETRY_BUDGET_MAX,
+            self._balance + settings.OPENAI_RETRY_BUDGET_RATIO
+        )
+
+    def try_spend(self, kind: str = "retry") -> bool:
+        """Take one token for a retry or hedge"""
+        self._refill()
+        if self._balance < 1:
+            AI_RETRY_BUDGET_EXHAUSTED.labels(kind=kind).inc()
+            return False
+        self._balance -= 1
+        return True
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._balance = min(
+            settings.OPENAI_RETRY_BUDGET_MAX,
+            self._balance + elapsed * settings.OPENAI_RETRY_BUDGET_MIN_PER_SECOND
+        )
+
+
+# Shared per-process instances
+latency_tracker = LatencyTracker()
+circuit_breaker = CircuitBreaker()
+retry_budget = RetryBudget()
@@ -0,0 +1,237 @@
+# ai_context_v3
+"""
+🎯 main_goal: Postgres-backed L2 tier for cached AI responses
+⚡ critical_requirements:
+   - Read-through lookup on Redis misses
+   - Write-behind batched upserts off the request path
+   - Bulk cleanup of expired rows
+   - Never fail the request because of cache errors
+📥 inputs_outputs: (prompt_hash, model) -> Cached response dict
+🔧 functions_list:
+   - AIResponseCacheStore.get: Read non-expired entry with remaining TTL
+   - AIResponseCacheStore.enqueue: Queue entry for batched write
+   - AIResponseCacheStore.cleanup_expired: Delete expired rows in chunks
+   - AIResponseCacheStore.start/stop: Background writer lifecycle
+🚫 forbidden_changes: Do not write to Postgres on the request path
+🧪 tests: test_response_cache.py with batching and expiry tests
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core import database
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.db import AIResponseCache
+
+
+class AIResponseCacheStore:
+    """Write-behind Postgres store for AI responses"""
+
+    CLEANUP_LOCK_KEY = "ai_cache:cleanup_lock"
+    CLEANUP_CHUNK_SIZE = 5000
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.AI_CACHE_DB_ENABLED and database.async_session_factory is not None
+
+    async def start(self) -> None:
+        """Start background writer"""
+        if not settings.AI_CACHE_DB_ENABLED or self._writer_task:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.AI_CACHE_WRITE_QUEUE_SIZE)
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info("AI response cache writer started")
+
+    async def stop(self) -> None:
+        """Stop background writer and flush pending entries"""
+        if not self._writer_task:
+            return
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
+
+        pending = self._drain(self._queue.qsize())
+        if pending:
+            await self._flush(pending)
+        logger.info("AI response cache writer stopped")
+
+    async def get(
+        self,
+        prompt_hash: str,
+        model: str
+    ) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Get non-expired response and its remaining TTL in seconds"""
+        if not self.enabled:
+            return None
+
+        try:
+            async with database.async_session_factory() as session:
+                result = await session.execute(
+                    select(
+                        AIResponseCache.response,
+                        func.extract("epoch", AIResponseCache.expires_at - func.now())
+                    ).where(
+                        AIResponseCache.prompt_hash == prompt_hash,
+                        AIResponseCache.model == model,
+                        AIResponseCache.expires_at > func.now()
+                    )
+                )
+                row = result.first()
+        except Exception as e:
+            logger.error(f"AI cache DB read error: {e}")
+            return None
+
+        if not row:
+            return None
+        return row[0], int(row[1])
+
+    def enqueue(
+        self,
+        prompt_hash: str,
+        model: str,
+        response: Dict[str, Any],
+        ttl_hours: Optional[int] = None
+    ) -> None:
+        """Queue response for the next batched write"""
+        if self._queue is None:
+            return
+
+        entry = AIResponseCache.create_cache_entry(
+            prompt_hash=prompt_hash,
+            response=response,
+            model=model,
+            ttl_hours=ttl_hours or settings.AI_CACHE_DB_TTL_HOURS
+        )
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            logger.warning("AI cache write queue full, dropping entry")
+
+    async def cleanup_expired(self) -> int:
+        """Delete expired rows in chunks, returns number of rows deleted"""
+        total = 0
+        async with database.async_session_factory() as session:
+            while True:
+                result = await session.execute(
+                    text("""
+                        DELETE FROM ai_response_cache
+                        WHERE id IN (
+                            SELECT id FROM ai_response_cache
+                            WHERE expires_at < now()
+                            LIMIT :chunk
+                        )
+                    """),
+                    {"chunk": self.CLEANUP_CHUNK_SIZE}
+                )
+                await session.commit()
+                total += result.rowcount
+                if result.rowcount < self.CLEANUP_CHUNK_SIZE:
+                    break
+
+        if total:
+            logger.info(f"Removed {total} expired AI cache entries")
+        return total
+
+    def _drain(self, limit: int) -> List[AIResponseCache]:
+        """Take up to limit queued entries without waiting"""
+        entries = []
+        while len(entries) < limit:
+            try:
+                entries.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return entries
+
+    async def _writer_loop(self) -> None:
+        """Collect entries into batches and periodically clean up"""
+        loop = asyncio.get_running_loop()
+        next_cleanup = loop.time() + settings.AI_CACHE_CLEANUP_INTERVAL
+
+        while True:
+            try:
+                timeout = max(0.0, next_cleanup - loop.time())
+                try:
+                    first = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    first = None
+
+                if first is not None:
+                    # Give concurrent writers a moment to fill the batch
+                    try:
+                        await asyncio.sleep(settings.AI_CACHE_FLUSH_INTERVAL)
+                    except asyncio.CancelledError:
+                        self._queue.put_nowait(first)
+                        raise
+                    batch = [first] + self._drain(settings.AI_CACHE_WRITE_BATCH_SIZE - 1)
+                    await self._flush(batch)
+
+                if loop.time() >= next_cleanup:
+                    next_cleanup = loop.time() + settings.AI_CACHE_CLEANUP_INTERVAL
+                    await self._cleanup_if_leader()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"AI cache writer error: {e}")
+
+    async def _flush(self, entries: List[AIResponseCache]) -> None:
+        """Upsert a batch of entries in one statement"""
+        # ON CONFLICT cannot touch the same row twice, keep the latest entry
+        rows = {}
+        for entry in entries:
+            rows[(entry.prompt_hash, entry.model)] = {
+                "prompt_hash": entry.prompt_hash,
+                "model": entry.model,
+                "response": entry.response,
+                "expires_at": entry.expires_at,
+            }
+
+        stmt = pg_insert(AIResponseCache.__table__).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["prompt_hash", "model"],
+            set_={
+                "response": stmt.excluded.response,
+                "expires_at": stmt.excluded.expires_at,
+            }
+        )
+
+        try:
+            async with database.async_session_factory() as session:
+                await session.execute(stmt)
+                await session.commit()
+            logger.debug(f"Flushed {len(rows)} AI cache entries to database")
+        except Exception as e:
+            logger.error(f"AI cache DB write error: {e}")
+
+    async def _cleanup_if_leader(self) -> None:
+        """Run cleanup in one worker per interval"""
+        try:
+            redis = get_redis()
+            acquired = await redis.set(
+                self.CLEANUP_LOCK_KEY,
+                "1",
+                nx=True,
+                ex=settings.AI_CACHE_CLEANUP_INTERVAL
+            )
+        except Exception as e:
+            logger.error(f"AI cache cleanup lock error: {e}")
+            return
+
+        if acquired:
+            await self.cleanup_expired()
+
+
+# Default store instance
+response_cache_store = AIResponseCacheStore()
@@ -0,0 +1,242 @@
+# ai_context_v3
+"""
+🎯 main_goal: Precomputed similarity context per dream, maintained off the request path
+⚡ critical_requirements:
+   - Reads are one lookup by dream_id, never a similarity search
+   - Computed in the background when a dream is embedded
+   - Incremental refresh: a changed dream is merged into its neighbours' top lists
+   - Removal only recomputes neighbours whose full list lost an entry
+   - Missing, stale or other-model rows are recomputed lazily after a read
+📥 inputs_outputs: Dream change events -> dream_similarity_contexts rows
+🔧 functions_list:
+   - SimilarityContextStore.get: Stored context of a dream (schedules refresh if outdated)
+   - SimilarityContextStore.dream_changed: Dream embedded or restored
+   - SimilarityContextStore.dream_removed: Dream deleted or soft-deleted
+   - SimilarityContextStore.start/stop: Background worker lifecycle
+🚫 forbidden_changes: Do not run similarity searches on the request path
+🧪 tests: test_similarity_context.py with merge and removal tests
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.models.db import Dream, DreamEmbedding, DreamInterpretation, DreamSimilarityContext
+from app.services.ai.embedding_registry import embedding_registry
+from app.services.ai.embedding_service import EmbeddingService
+
+# (kind, dream_id, user_id), kind is changed, removed or refresh
+ContextEvent = Tuple[str, UUID, UUID]
+
+
+class SimilarityContextStore:
+    """Background maintained similarity context of dreams"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._embedding_service: Optional[EmbeddingService] = None
+
+    @property
+    def size(self) -> int:
+        return settings.SIMILARITY_CONTEXT_SIZE
+
+    async def start(self) -> None:
+        """Start background worker"""
+        if not settings.SIMILARITY_CONTEXT_ENABLED or self._worker_task:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.SIMILARITY_CONTEXT_QUEUE_SIZE)
+        self._embedding_service = EmbeddingService()
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info("Similarity context worker started")
+
+    async def stop(self) -> None:
+        """Stop background worker; unprocessed dreams are recomputed when read"""
+        if not self._worker_task:
+            return
+        self._worker_task.cancel()
+        try:
+            await self._worker_task
+        except asyncio.CancelledError:
+            pass
+        self._worker_task = None
+        logger.info("Similarity context worker stopped")
+
+    def dream_changed(self, dream_id: UUID, user_id: UUID) -> None:
+        """Dream was embedded, re-embedded or restored"""
+        self._enqueue(("changed", dream_id, user_id))
+
+    def dream_removed(self, dream_id: UUID, user_id: UUID) -> None:
+        """Dream was deleted or soft-deleted"""
+        self._enqueue(("removed", dream_id, user_id))
+
+    async def get(
+        self,
+        session: AsyncSession,
+        dream_id: UUID,
+        user_id: UUID
+    ) -> Optional[DreamSimilarityContext]:
+        """Stored context; outdated or missing rows are refreshed in the background"""
+        context = await session.scalar(
+            select(DreamSimilarityContext).where(DreamSimilarityContext.dream_id == dream_id)
+        )
+        if context is None or context.is_stale:
+            self._enqueue(("refresh", dream_id, user_id))
+        elif context.model != (await embedding_registry.active()).name:
+            self._enqueue(("refresh", dream_id, user_id))
+        return context
+
+    def _enqueue(self, event: ContextEvent) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Row stays missing or stale and is scheduled again on read
+            logger.warning("Similarity context queue full, dropping event")
+
+    async def _worker_loop(self) -> None:
+        """Process events one by one so a user's changes apply in order"""
+        while True:
+            kind, dream_id, user_id = await self._queue.get()
+            try:
+                async with database.async_session_factory() as session:
+                    if kind == "removed":
+                        await self._remove(session, dream_id, user_id)
+                    elif kind == "changed":
+                        await self._change(session, dream_id, user_id)
+                    else:
+                        await self._compute(session, dream_id, user_id)
+                    await session.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Similarity context {kind} failed for dream {dream_id}: {e}")
+
+    async def _change(self, session: AsyncSession, dream_id: UUID, user_id: UUID) -> None:
+        # Old neighbours may no longer be similar after a text edit
+        await self._detach(session, dream_id, user_id)
+        computed = await self._compute(session, dream_id, user_id)
+        if computed is None:
+            return
+
+        # Similarity is symmetric: the dream's hits are the lists it can enter
+        model, own_entry, entries = computed
+        neighbours = await session.scalars(
+            select(DreamSimilarityContext).where(
+                DreamSimilarityContext.dream_id.in_([UUID(entry["id"]) for entry in entries])
+            )
+        )
+        similarity = {entry["id"]: entry["similarity"] for entry in entries}
+        for neighbour in neighbours:
+            if neighbour.model != model:
+                continue
+            merged = [entry for entry in neighbour.similar if entry["id"] != own_entry["id"]]
+            merged.append({**own_entry, "similarity": similarity[str(neighbour.dream_id)]})
+            merged.sort(key=lambda entry: entry["similarity"], reverse=True)
+            self._apply(neighbour, merged[:self.size])
+
+    async def _remove(self, session: AsyncSession, dream_id: UUID, user_id: UUID) -> None:
+        await self._detach(session, dream_id, user_id)
+        await session.execute(
+            delete(DreamSimilarityContext).where(DreamSimilarityContext.dream_id == dream_id)
+        )
+
+    async def _detach(self, session: AsyncSession, dream_id: UUID, user_id: UUID) -> None:
+        """Drop a dream from the lists that contain it"""
+        rows = await session.scalars(
+            select(DreamSimilarityContext).where(
+                DreamSimilarityContext.user_id == user_id,
+                DreamSimilarityContext.similar_dream_ids.contains([dream_id]),
+                DreamSimilarityContext.dream_id != dream_id
+            )
+        )
+        for row in rows:
+            # A full list may have had a next-best dream just below its cut-off
+            was_full = len(row.similar) >= self.size
+            self._apply(row, [entry for entry in row.similar if entry["id"] != str(dream_id)])
+            if was_full:
+                row.is_stale = True
+                self._enqueue(("refresh", row.dream_id, user_id))
+
+    async def _compute(
+        self,
+        session: AsyncSession,
+        dream_id: UUID,
+        user_id: UUID
+    ) -> Optional[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]:
+        """Full recompute of one dream; returns (model, the dream's own entry, its hits)"""
+        model = await embedding_registry.active()
+        result = await session.execute(
+            select(
+                Dream.is_deleted,
+                DreamEmbedding.embedding,
+                DreamInterpretation.main_symbol,
+                DreamInterpretation.emotions
+            )
+            .join(DreamEmbedding, DreamEmbedding.dream_id == Dream.id)
+            .outerjoin(DreamInterpretation, DreamInterpretation.dream_id == Dream.id)
+            .where(Dream.id == dream_id, DreamEmbedding.model == model.name)
+        )
+        dream = result.first()
+        if dream is None or dream.is_deleted:
+            return None
+
+        hits = await self._embedding_service.find_similar_dreams(
+            query_embedding=dream.embedding,
+            limit=self.size + 1,
+            user_id=user_id,
+            min_similarity=settings.SIMILARITY_CONTEXT_MIN_SIMILARITY,
+            db_session=session
+        )
+        entries = [
+            self._entry(hit.id, hit.similarity, hit.main_symbol, hit.emotions)
+            for hit in hits
+            if hit.id != dream_id
+        ][:self.size]
+
+        context = await session.scalar(
+            select(DreamSimilarityContext).where(DreamSimilarityContext.dream_id == dream_id)
+        )
+        if context is None:
+            context = DreamSimilarityContext(dream_id=dream_id, user_id=user_id, model=model.name)
+            session.add(context)
+        context.model = model.name
+        context.is_stale = False
+        self._apply(context, entries)
+
+        return model.name, self._entry(dream_id, 1.0, dream.main_symbol, dream.emotions), entries
+
+    @staticmethod
+    def _entry(dream_id: UUID, similarity: float, main_symbol: Optional[str], emotions) -> Dict[str, Any]:
+        return {
+            "id": str(dream_id),
+            "similarity": round(float(similarity), 4),
+            "main_symbol": main_symbol,
+            "emotions": emotions or []
+        }
+
+    def _apply(self, context: DreamSimilarityContext, entries: List[Dict[str, Any]]) -> None:
+        """Set the top list and re-derive aggregates from it"""
+        context.similar = entries
+        context.similar_dream_ids = [UUID(entry["id"]) for entry in entries]
+        context.similar_count = len(entries)
+        context.common_symbols = list(dict.fromkeys(
+            entry["main_symbol"] for entry in entries if entry["main_symbol"]
+        ))
+        context.recurring_emotions = self._embedding_service._aggregate_emotions(
+            [entry["emotions"] for entry in entries]
+        )
+        context.average_similarity = (
+            sum(entry["similarity"] for entry in entries) / len(entries) if entries else 0.0
+        )
+
+
+# Per-process store instance
+similarity_context_store = SimilarityContextStore()
@@ -0,0 +1,153 @@
+# ai_context_v3
+"""
+🎯 main_goal: Coalesce identical in-flight AI requests
+⚡ critical_requirements:
+   - One upstream call per key within a worker
+   - Redis lock + pub/sub notify across workers
+   - Caller cancellation must not cancel shared work
+   - Degrade to a direct call when Redis is unavailable
+📥 inputs_outputs: (key, producer, cache reader) -> Shared result
+🔧 functions_list:
+   - SingleFlight.do: Run producer once per key and share the result
+🚫 forbidden_changes: Do not hold the lock without a TTL
+🧪 tests: test_single_flight.py with concurrent caller tests
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# Delete lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Per-key request coalescing within and across workers"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: str,
+        producer: Callable[[], Awaitable[Any]],
+        fetch_result: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Any:
+        """
+        Run producer once for concurrent callers with the same key.
+        producer must store its result where fetch_result can read it,
+        so waiters in other workers can pick it up.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_distributed(key, producer, fetch_result))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        else:
+            logger.debug(f"Joining in-flight request for key: {key}")
+
+        # Shield so a disconnecting caller does not cancel other waiters
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark exception as retrieved when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def _run_distributed(
+        self,
+        key: str,
+        producer: Callable[[], Awaitable[Any]],
+        fetch_result: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Any:
+        lock_key = f"{self.prefix}:lock:{key}"
+        channel = f"{self.prefix}:done:{key}"
+        token = uuid4().hex
+
+        try:
+            redis = get_redis()
+            acquired = await redis.set(
+                lock_key,
+                token,
+                nx=True,
+                ex=settings.AI_SINGLE_FLIGHT_LOCK_TTL
+            )
+        except Exception as e:
+            logger.error(f"Single-flight lock error: {e}")
+            return await producer()
+
+        if acquired:
+            try:
+                return await producer()
+            finally:
+                try:
+                    await redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                    await redis.publish(channel, "1")
+                except Exception as e:
+                    logger.error(f"Single-flight release error: {e}")
+
+        # Another worker owns the request, wait for its notification
+        result = await self._wait_for_owner(redis, lock_key, channel, fetch_result)
+        if result is not None:
+            return result
+
+        logger.warning(f"Single-flight owner produced no result, calling upstream: {key}")
+        return await producer()
+
+    async def _wait_for_owner(
+        self,
+        redis,
+        lock_key: str,
+        channel: str,
+        fetch_result: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """Wait until the owner finishes, then read its stored result"""
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.AI_SINGLE_FLIGHT_WAIT_TIMEOUT
+
+            # Owner may have finished before we subscribed
+            result = await fetch_result()
+            if result is not None:
+                return result
+
+            while loop.time() < deadline:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0
+                )
+                if message is not None:
+                    return await fetch_result()
+                # Lock expired or released without a notification
+                if not await redis.exists(lock_key):
+                    return await fetch_result()
+            return None
+
+        except Exception as e:
+            logger.error(f"Single-flight wait error: {e}")
+            return None
+        finally:
+            try:
+                await pubsub.reset()
+            except Exception:
+                pass
+
+
+# Shared coalescer for chat completions
+completion_flights = SingleFlight("ai_inflight")
@@ -0,0 +1,262 @@
+# ai_context_v3
+"""
+🎯 main_goal: Answer short single-symbol dreams without an LLM call
+⚡ critical_requirements:
+   - Detection is pure CPU over a precomputed form -> symbol lexicon
+   - Only short dreams whose content is one dominant lexicon symbol match
+   - Curated interpretations first, then interpretations cached from GPT
+   - Enabled per subscription tier, hit rate exported as metrics
+   - Redis errors are misses, never request failures
+📥 inputs_outputs: Dream text + language -> DreamInterpretation or None
+🔧 functions_list:
+   - SymbolLexicon.enabled_for: Fast path allowed for a subscription type
+   - SymbolLexicon.match: Dominant lexicon symbol of a short dream
+   - SymbolLexicon.lookup: Curated or cached interpretation of a symbol
+   - SymbolLexicon.remember: Cache a GPT interpretation of a lexicon symbol
+🚫 forbidden_changes: Do not serve personalized interpretations from the shared cache
+🧪 tests: test_symbol_lexicon.py with detection and tier tests
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import SYMBOL_FAST_PATH_REQUESTS
+from app.core.redis import CacheManager, cache_key
+from app.models.schemas.dream import DreamInterpretation
+from app.services.symbol_stats import normalize_symbol
+
+CURATED_MODEL = "symbol-lexicon"
+CACHED_MODEL = "symbol-lexicon-cache"
+
+# Filler of "к чему снится X" style requests, matched after normalization
+_FILLER_WORDS = """
+    к чему что это значит значить означает означать толкование сонник
+    сон сны сне снится снятся снился снилась снилось снились приснился приснилась приснилось приснились
+    видел видела видели видеть вижу увидел увидела
+    я мне меня мой моя мое мои мою во в на с у по про и а но как очень много
+    большой большая большое большие большую маленький маленькая маленькую
+    what does do mean meaning dream dreams dreamed dreamt dreaming about of a an the i my me saw see
+"""
+
+# symbol -> emoji, surface forms and curated text per language
+_CURATED: Dict[str, Dict[str, Any]] = {
+    "Змея": {
+        "emoji": "🐍",
+        "forms": ("змея", "змеи", "змей", "змею", "змеей", "змеёй", "гадюка", "гадюку", "кобра", "кобру", "удав", "snake", "snakes"),
+        "ru": {
+            "interpretation": "Змея во сне часто связана с темой скрытой энергии и перемен. Она может указывать на "
+                              "ситуацию или человека, к которым вы относитесь настороженно, а может говорить о "
+                              "внутренней трансформации: как змея сбрасывает кожу, так и вы, возможно, перерастаете "
+                              "старые привычки или роли. Важно, что вы чувствовали во сне: страх чаще отражает "
+                              "тревогу наяву, спокойствие или интерес - готовность к обновлению.",
+            "emotions": [{"name": "настороженность", "intensity": "средняя", "meaning": "ощущение скрытой угрозы или неопределенности"}],
+            "advice": "Подумайте, какая область жизни сейчас вызывает у вас напряжение или требует перемен, "
+                      "и что вы готовы в ней отпустить.",
+        },
+    },
+    "Зубы": {
+        "emoji": "🦷",
+        "forms": ("зуб", "зубы", "зубов", "зубами", "зуба", "tooth", "teeth"),
+        "ru": {
+            "interpretation": "Сны о зубах, особенно о выпадающих, - один из самых распространенных сюжетов. Чаще всего "
+                              "они связаны с чувством уязвимости, страхом потерять контроль или беспокойством о том, "
+                              "как вас воспринимают окружающие. Иногда такой сон появляется в периоды перемен, когда "
+                              "привычная опора кажется ненадежной.",
+            "emotions": [{"name": "тревога", "intensity": "средняя", "meaning": "беспокойство о контроле и самооценке"}],
+            "advice": "Обратите внимание, где сейчас вы чувствуете себя неуверенно, и что могло бы вернуть вам "
+                      "ощущение опоры.",
+        },
+    },
+    "Вода": {
+        "emoji": "🌊",
+        "forms": ("вода", "воды", "воду", "водой", "море", "моря", "река", "реку", "реки", "океан", "water", "sea", "river"),
+        "ru": {
+            "interpretation": "Вода во сне обычно отражает эмоциональное состояние. Спокойная и чистая вода может "
+                              "говорить о внутреннем равновесии, мутная или бурная - о переживаниях, которые сложно "
+                              "упорядочить. Глубина воды нередко связана с тем, насколько глубоко вы сейчас погружены "
+                              "в свои чувства.",
+            "emotions": [{"name": "чувствительность", "intensity": "средняя", "meaning": "контакт с собственными эмоциями"}],
+            "advice": "Прислушайтесь к своим чувствам последних дней: какие из них просят внимания и выхода?",
+        },
+    },
+    "Падение": {
+        "emoji": "🕳️",
+        "forms": ("падение", "падать", "падал", "падала", "упал", "упала", "падаю", "fall", "falling", "fell"),
+        "ru": {
+            "interpretation": "Падение во сне часто связано с ощущением потери контроля или опоры. Такой сон может "
+                              "появляться, когда вы чувствуете неуверенность в какой-то ситуации, боитесь не "
+                              "справиться с ожиданиями или переживаете резкие перемены.",
+            "emotions": [{"name": "страх", "intensity": "высокая", "meaning": "ощущение потери почвы под ногами"}],
+            "advice": "Определите, в какой ситуации вам сейчас не хватает устойчивости, и сделайте один небольшой "
+                      "шаг, который вернет чувство контроля.",
+        },
+    },
+    "Полёт": {
+        "emoji": "🕊️",
+        "forms": ("полет", "полёт", "летать", "летал", "летала", "летаю", "лететь", "fly", "flying", "flew"),
+        "ru": {
+            "interpretation": "Полет во сне обычно связан со стремлением к свободе и ощущением собственных "
+                              "возможностей. Легкий полет может отражать подъем и уверенность, а трудный или "
+                              "прерывающийся - желание вырваться из ограничений, которые пока мешают.",
+            "emotions": [{"name": "воодушевление", "intensity": "высокая", "meaning": "ощущение свободы и потенциала"}],
+            "advice": "Подумайте, к чему вы сейчас стремитесь и что могло бы дать вам больше свободы наяву.",
+        },
+    },
+    "Дом": {
+        "emoji": "🏠",
+        "forms": ("дом", "дома", "доме", "домом", "house", "home"),
+        "ru": {
+            "interpretation": "Дом во сне часто символизирует вас самих: вашу личность, внутренний мир и чувство "
+                              "безопасности. Разные комнаты могут отражать разные стороны жизни, а состояние дома - "
+                              "то, насколько комфортно вы себя сейчас ощущаете.",
+            "emotions": [{"name": "потребность в безопасности", "intensity": "средняя", "meaning": "поиск опоры и защищенности"}],
+            "advice": "Спросите себя, где вы сейчас чувствуете себя по-настоящему дома и чего не хватает для "
+                      "ощущения защищенности.",
+        },
+    },
+    "Собака": {
+        "emoji": "🐕",
+        "forms": ("собака", "собаки", "собаку", "собакой", "пес", "пёс", "пса", "щенок", "щенка", "dog", "dogs", "puppy"),
+        "ru": {
+            "interpretation": "Собака во сне чаще всего связана с темами дружбы, верности и защиты. Дружелюбная "
+                              "собака может отражать поддержку близких, агрессивная - напряжение в отношениях или "
+                              "конфликт с собственными инстинктами.",
+            "emotions": [{"name": "привязанность", "intensity": "средняя", "meaning": "значимость близких связей"}],
+            "advice": "Обратите внимание на отношения с близкими: кому вы доверяете и кто нуждается в вашей поддержке.",
+        },
+    },
+    "Кошка": {
+        "emoji": "🐈",
+        "forms": ("кошка", "кошки", "кошку", "кот", "кота", "котенок", "котёнок", "котенка", "cat", "cats", "kitten"),
+        "ru": {
+            "interpretation": "Кошка во сне часто символизирует независимость, интуицию и женственное начало. "
+                              "Она может указывать на потребность в личном пространстве или на ситуацию, в которой "
+                              "стоит больше доверять своему чутью.",
+            "emotions": [{"name": "любопытство", "intensity": "средняя", "meaning": "внимание к интуиции"}],
+            "advice": "Прислушайтесь к интуиции в текущих делах и оставьте себе немного времени только для себя.",
+        },
+    },
+    "Деньги": {
+        "emoji": "💰",
+        "forms": ("деньги", "денег", "деньгами", "монеты", "монет", "купюры", "money", "coins"),
+        "ru": {
+            "interpretation": "Деньги во сне обычно связаны не столько с финансами, сколько с ощущением ценности: "
+                              "собственной энергии, времени, усилий. Находка денег может отражать новые возможности, "
+                              "потеря - опасение, что вы отдаете больше, чем получаете.",
+            "emotions": [{"name": "ожидание", "intensity": "средняя", "meaning": "вопрос ценности и обмена"}],
+            "advice": "Подумайте, во что вы сейчас вкладываете силы и получаете ли взамен то, что для вас важно.",
+        },
+    },
+    "Свадьба": {
+        "emoji": "💍",
+        "forms": ("свадьба", "свадьбу", "свадьбе", "свадьбы", "wedding"),
+        "ru": {
+            "interpretation": "Свадьба во сне часто символизирует союз и новое начало: соединение разных сторон "
+                              "личности, принятие важного решения или вступление в новый этап жизни. Это не "
+                              "обязательно связано с отношениями - речь может идти о работе, проекте или обязательстве.",
+            "emotions": [{"name": "волнение", "intensity": "средняя", "meaning": "ожидание перемен"}],
+            "advice": "Подумайте, к какому новому обязательству или этапу вы сейчас готовитесь.",
+        },
+    },
+}
+
+
+class SymbolLexicon:
+    """Precomputed lexicon of common symbols with shared interpretations"""
+
+    CACHE_PREFIX = "symbol_lexicon"
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.entries = entries or _CURATED
+        self.cache = CacheManager(default_ttl=settings.SYMBOL_FAST_PATH_CACHE_TTL)
+        # Forms go through the same normalizer as the text, so inflections still match
+        self._forms: Dict[str, str] = {}
+        for symbol, entry in self.entries.items():
+            for form in (symbol, *entry["forms"]):
+                self._forms[normalize_symbol(form)] = symbol
+        self._filler = set(self._normalize_words(_FILLER_WORDS.split())) - set(self._forms)
+
+    @staticmethod
+    def _normalize_words(words: Iterable[str]) -> Iterable[str]:
+        return (key for key in (normalize_symbol(word) for word in words) if key)
+
+    def enabled_for(self, subscription_type: Optional[str]) -> bool:
+        return (subscription_type or "free") in settings.SYMBOL_FAST_PATH_TIERS
+
+    def match(self, dream_text: str) -> Optional[str]:
+        """Lexicon symbol if the dream is short and about that symbol only"""
+        words = dream_text.split()
+        if len(words) > settings.SYMBOL_FAST_PATH_MAX_WORDS:
+            return None
+
+        symbols = set()
+        extra = 0
+        for key in self._normalize_words(words):
+            if key in self._forms:
+                symbols.add(self._forms[key])
+            elif key not in self._filler:
+                extra += 1
+
+        if len(symbols) != 1 or extra > settings.SYMBOL_FAST_PATH_MAX_EXTRA_WORDS:
+            return None
+        return symbols.pop()
+
+    async def lookup(
+        self,
+        symbol: str,
+        language: str,
+        subscription_type: Optional[str] = None
+    ) -> Optional[DreamInterpretation]:
+        """Curated text, else an interpretation cached from GPT"""
+        tier = subscription_type or "free"
+        entry = self.entries[symbol]
+        curated = entry.get(language)
+        if curated:
+            SYMBOL_FAST_PATH_REQUESTS.labels(tier=tier, result="curated").inc()
+            return DreamInterpretation(
+                dream_id=None,
+                main_symbol=symbol,
+                main_symbol_emoji=entry["emoji"],
+                interpretation=curated["interpretation"],
+                emotions=curated["emotions"],
+                advice=curated["advice"],
+                ai_model=CURATED_MODEL
+            )
+
+        try:
+            cached = await self.cache.get(cache_key(self.CACHE_PREFIX, language, symbol))
+        except Exception as e:
+            logger.error(f"Symbol lexicon cache read error: {e}")
+            cached = None
+        if not cached:
+            SYMBOL_FAST_PATH_REQUESTS.labels(tier=tier, result="no_entry").inc()
+            return None
+
+        SYMBOL_FAST_PATH_REQUESTS.labels(tier=tier, result="cached").inc()
+        return DreamInterpretation(dream_id=None, **cached, ai_model=CACHED_MODEL)
+
+    async def remember(self, symbol: str, language: str, interpretation: DreamInterpretation) -> None:
+        """Keep a GPT answer for the symbol, if GPT agrees on what the dream is about"""
+        if symbol in self.entries and self.entries[symbol].get(language):
+            return
+        if self.match(interpretation.main_symbol) != symbol:
+            return
+        try:
+            await self.cache.set(
+                cache_key(self.CACHE_PREFIX, language, symbol),
+                interpretation.model_dump(
+                    mode="json",
+                    include={"main_symbol", "main_symbol_emoji", "interpretation", "emotions", "advice"}
+                )
+            )
+        except Exception as e:
+            logger.error(f"Symbol lexicon cache write error: {e}")
+
+    def record_miss(self, subscription_type: Optional[str]) -> None:
+        SYMBOL_FAST_PATH_REQUESTS.labels(tier=subscription_type or "free", result="no_match").inc()
+
+
+# Shared lexicon instance
+symbol_lexicon = SymbolLexicon()
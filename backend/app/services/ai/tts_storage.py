@@ -0,0 +1,116 @@
+# ai_context_v3
+"""
+🎯 main_goal: Content-addressed storage of generated TTS audio
+⚡ critical_requirements:
+   - Key is a hash of text, voice, model and speed, so one file per rendition
+   - Audio is stored while it streams to the first listener
+   - Partial files are never visible (write to .part, then rename)
+   - Byte ranges are read without loading the file into memory
+📥 inputs_outputs: Interpretation text + voice settings -> MP3 file on disk
+🔧 functions_list:
+   - TTSAudioStorage.key: Content address of a rendition
+   - TTSAudioStorage.size: Stored size or None
+   - TTSAudioStorage.read: Stream a byte range of a stored file
+   - TTSAudioStorage.write_through: Pass chunks on while storing them
+🚫 forbidden_changes: Do not key by dream id, identical texts share audio
+🧪 tests: test_tts_storage.py with temporary directories
+"""
+
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+class TTSAudioStorage:
+    """MP3 files under TTS_STORAGE_DIR/ab/cd/<sha256>.mp3"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.TTS_STORAGE_DIR)
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, speed: float) -> str:
+        payload = "\0".join((model, voice, f"{speed:g}", text))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / f"{key}.mp3"
+
+    async def size(self, key: str) -> Optional[int]:
+        """Size of a stored rendition, None if it is not stored"""
+        try:
+            stat = await asyncio.to_thread(os.stat, self.path(key))
+        except FileNotFoundError:
+            return None
+        return stat.st_size
+
+    async def read(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Bytes start..end (inclusive) of a stored rendition in chunks"""
+        chunk_size = chunk_size or settings.TTS_STREAM_CHUNK_SIZE
+        file = await asyncio.to_thread(open, self.path(key), "rb")
+        try:
+            await asyncio.to_thread(file.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await asyncio.to_thread(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(file.close)
+
+    async def write_through(self, key: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Yield chunks unchanged and store them under key once the stream ends.
+        Nothing is stored if the stream fails or the listener disconnects.
+        """
+        path = self.path(key)
+        part = path.with_name(f"{path.name}.{uuid4().hex}.part")
+        file = None
+        try:
+            await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+            file = await asyncio.to_thread(open, part, "wb")
+        except OSError as e:
+            # Storage is an optimization, playback still works without it
+            logger.warning(f"TTS audio will not be stored: {e}")
+
+        completed = False
+        try:
+            async for chunk in chunks:
+                if file is not None:
+                    await asyncio.to_thread(file.write, chunk)
+                yield chunk
+            completed = True
+        finally:
+            if file is not None:
+                await asyncio.to_thread(file.close)
+                await asyncio.to_thread(self._finish, part, path, completed)
+
+    @staticmethod
+    def _finish(part: Path, path: Path, completed: bool) -> None:
+        try:
+            if completed:
+                os.replace(part, path)
+            else:
+                part.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to store TTS audio {path.name}: {e}")
+
+
+# Shared storage instance
+tts_storage = TTSAudioStorage()
@@ -0,0 +1,163 @@
+# ai_context_v3
+"""
+🎯 main_goal: In-process cache of per-user embedding matrices
+⚡ critical_requirements:
+   - One contiguous, pre-normalized float32 matrix per user
+   - Top-k cosine with one matrix-vector product and argpartition
+   - LRU eviction under a memory cap
+   - Cross-worker invalidation through a Redis version counter
+   - Matrices of a previously active embedding model are stale
+📥 inputs_outputs: (user_id, query vector) -> Top-k dream ids with similarity
+🔧 functions_list:
+   - UserVectorCache.get: Cached matrix if still current
+   - UserVectorCache.put: Store matrix loaded at a given version
+   - UserVectorCache.invalidate: Drop user matrix in every worker
+   - UserVectors.top_k: Most similar dreams above a threshold
+🚫 forbidden_changes: Do not invalidate before the database commit
+🧪 tests: test_user_vector_cache.py with eviction and staleness tests
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import (
+    AI_CACHE_REQUESTS,
+    USER_VECTOR_CACHE_BYTES,
+    USER_VECTOR_CACHE_EVICTIONS,
+)
+from app.core.redis import get_redis
+
+
+@dataclass(slots=True)
+class UserVectors:
+    """A user's dream vectors as a normalized matrix"""
+    dream_ids: List[UUID]
+    matrix: np.ndarray
+    version: int
+    model: str
+
+    @classmethod
+    def build(
+        cls,
+        dream_ids: List[UUID],
+        vectors: Sequence,
+        version: int,
+        model: str
+    ) -> "UserVectors":
+        # Copy so normalizing in place never touches the caller's arrays
+        matrix = np.array(vectors, dtype=np.float32, order="C", ndmin=2)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        return cls(dream_ids=dream_ids, matrix=matrix, version=version, model=model)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def top_k(
+        self,
+        query: Sequence[float],
+        k: int,
+        min_similarity: float
+    ) -> List[Tuple[UUID, float]]:
+        """Most similar dreams by cosine similarity, best first"""
+        if not self.dream_ids or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        similarities = self.matrix @ (q / norm)
+
+        k = min(k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [
+            (self.dream_ids[i], float(similarities[i]))
+            for i in top
+            if similarities[i] >= min_similarity
+        ]
+
+
+class UserVectorCache:
+    """LRU of user matrices bounded by total bytes"""
+
+    VERSION_PREFIX = "user_vectors:version"
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or settings.USER_VECTOR_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[UUID, UserVectors]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.USER_VECTOR_CACHE_ENABLED
+
+    async def version(self, user_id: UUID) -> Optional[int]:
+        """Current data version for user, None if Redis is unavailable"""
+        try:
+            redis = get_redis()
+            value = await redis.get(f"{self.VERSION_PREFIX}:{user_id}")
+            return int(value) if value else 0
+        except Exception as e:
+            logger.error(f"User vector version read error: {e}")
+            return None
+
+    async def get(
+        self,
+        user_id: UUID,
+        version: Optional[int],
+        model: str
+    ) -> Optional[UserVectors]:
+        """Cached matrix for user if it was loaded at the current version and model"""
+        entry = self._entries.get(user_id)
+        if entry is None or version is None:
+            AI_CACHE_REQUESTS.labels(cache="user_vectors", result="miss").inc()
+            return None
+        if entry.version != version or entry.model != model:
+            AI_CACHE_REQUESTS.labels(cache="user_vectors", result="stale").inc()
+            self._remove(user_id)
+            return None
+
+        self._entries.move_to_end(user_id)
+        AI_CACHE_REQUESTS.labels(cache="user_vectors", result="hit").inc()
+        return entry
+
+    def put(self, user_id: UUID, entry: UserVectors) -> None:
+        """Store matrix, evicting least recently used users over the cap"""
+        if entry.nbytes > self.max_bytes:
+            return
+        self._remove(user_id)
+        self._entries[user_id] = entry
+        self._bytes += entry.nbytes
+
+        while self._bytes > self.max_bytes:
+            evicted_id, _ = next(iter(self._entries.items()))
+            self._remove(evicted_id)
+            USER_VECTOR_CACHE_EVICTIONS.inc()
+        USER_VECTOR_CACHE_BYTES.set(self._bytes)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Drop user matrix here and make other workers' copies stale"""
+        self._remove(user_id)
+        USER_VECTOR_CACHE_BYTES.set(self._bytes)
+        try:
+            redis = get_redis()
+            await redis.incr(f"{self.VERSION_PREFIX}:{user_id}")
+        except Exception as e:
+            logger.error(f"User vector invalidation error: {e}")
+
+    def _remove(self, user_id: UUID) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+
+# Per-process cache instance
+user_vector_cache = UserVectorCache()
@@ -0,0 +1,202 @@
+# ai_context_v3
+"""
+🎯 main_goal: Dream journal persistence shared by interpretation flows
+⚡ critical_requirements:
+   - Same persistence for blocking and streaming interpretation
+   - User context from recent dreams
+   - Caller controls transaction boundaries
+   - Journal pages by keyset, deep pages cost the same as the first
+📥 inputs_outputs: Dream text + interpretation -> Stored Dream rows
+🔧 functions_list:
+   - get_user_context: Recent themes for personalized prompts
+   - save_interpretation: Store dream with its interpretation
+   - get_with_interpretation: One dream with its interpretation loaded
+   - list_dreams: One journal page by cursor or offset
+   - journal_total: Cached number of live dreams of a user
+   - forget_journal_total: Drop the cached total after adds and deletes
+   - encode_cursor / decode_cursor: Opaque (created_at, id) page cursors
+🚫 forbidden_changes: Do not commit inside helpers
+🧪 tests: test_dream_service.py
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.redis import cache_key, get_redis
+from app.models.db import Dream, DreamInterpretation as DreamInterpretationDB
+from app.models.schemas.dream import DreamInterpretation
+
+
+def encode_cursor(dream: Dream) -> str:
+    """Cursor pointing just after dream in journal order"""
+    payload = json.dumps([dream.created_at.isoformat(), str(dream.id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """(created_at, id) of a cursor; ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, dream_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(dream_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class DreamService:
+    """Service for storing dreams and their interpretations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_context(
+        self,
+        user_id: UUID,
+        recent_limit: int = 5
+    ) -> Optional[Dict[str, Any]]:
+        """Get user's recent dream themes for better interpretation"""
+        recent_dreams = await self.db.execute(
+            select(Dream)
+            .options(selectinload(Dream.interpretation))
+            .where(and_(
+                Dream.user_id == user_id,
+                Dream.is_deleted == False
+            ))
+            .order_by(Dream.created_at.desc())
+            .limit(recent_limit)
+        )
+        recent_themes = []
+        for dream in recent_dreams.scalars():
+            if dream.interpretation and dream.interpretation.main_symbol:
+                recent_themes.append(dream.interpretation.main_symbol)
+
+        if not recent_themes:
+            return None
+
+        return {
+            "recent_themes": list(set(recent_themes)),
+            "total_dreams": len(recent_themes)
+        }
+
+    async def get_with_interpretation(self, dream_id: UUID) -> Optional[Dream]:
+        """Dream with its interpretation loaded, None if it does not exist"""
+        result = await self.db.execute(
+            select(Dream)
+            .options(selectinload(Dream.interpretation))
+            .where(Dream.id == dream_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def save_interpretation(
+        self,
+        user_id: UUID,
+        dream_text: str,
+        language: str,
+        interpretation: DreamInterpretation,
+        dream_id: Optional[UUID] = None
+    ) -> Dream:
+        """Create dream record with its interpretation (flushed, not committed)"""
+        dream = Dream(
+            user_id=user_id,
+            text=dream_text,
+            language=language
+        )
+        if dream_id is not None:
+            dream.id = dream_id
+        self.db.add(dream)
+        await self.db.flush()  # Get the ID
+
+        interpretation.dream_id = dream.id
+        interpretation_db = DreamInterpretationDB(
+            dream_id=dream.id,
+            main_symbol=interpretation.main_symbol,
+            main_symbol_emoji=interpretation.main_symbol_emoji,
+            interpretation=interpretation.interpretation,
+            emotions=interpretation.emotions,
+            advice=interpretation.advice,
+            ai_model=interpretation.ai_model,
+            prompt_version=interpretation.prompt_version,
+            processing_time_ms=interpretation.processing_time_ms
+        )
+        self.db.add(interpretation_db)
+
+        return dream
+
+    async def list_dreams(
+        self,
+        user_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        search: Optional[str] = None
+    ) -> Tuple[List[Dream], Optional[str]]:
+        """
+        Live dreams newest first, with the cursor of the next page (None on the last).
+        Order is (created_at DESC, id) to match idx_dreams_user_journal, so a cursor
+        page is an index range scan; offset is only used when no cursor is given.
+        """
+        query = (
+            select(Dream)
+            .options(selectinload(Dream.interpretation))
+            .where(and_(
+                Dream.user_id == user_id,
+                Dream.is_deleted == False
+            ))
+        )
+        if search:
+            query = query.where(Dream.text.ilike(f"%{search}%"))
+
+        if cursor:
+            created_at, dream_id = decode_cursor(cursor)
+            # created_at bounds the index range, ties on created_at continue by id
+            query = query.where(and_(
+                Dream.created_at <= created_at,
+                or_(Dream.created_at < created_at, Dream.id > dream_id)
+            ))
+        elif offset:
+            query = query.offset(offset)
+
+        # One extra row tells whether there is a next page
+        query = query.order_by(Dream.created_at.desc(), Dream.id).limit(limit + 1)
+        result = await self.db.execute(query)
+        dreams = list(result.scalars().all())
+
+        next_cursor = encode_cursor(dreams[limit - 1]) if len(dreams) > limit else None
+        return dreams[:limit], next_cursor
+
+    async def count_dreams(self, user_id: UUID, search: Optional[str] = None) -> int:
+        """Exact number of live dreams, optionally matching a search"""
+        query = select(func.count()).select_from(Dream).where(and_(
+            Dream.user_id == user_id,
+            Dream.is_deleted == False
+        ))
+        if search:
+            query = query.where(Dream.text.ilike(f"%{search}%"))
+        result = await self.db.execute(query)
+        return result.scalar_one()
+
+    async def journal_total(self, user_id: UUID) -> int:
+        """Number of live dreams, cached for DREAM_JOURNAL_TOTAL_TTL"""
+        redis = get_redis()
+        key = cache_key("dream_total", user_id)
+        cached = await redis.get(key)
+        if cached is not None:
+            return int(cached)
+
+        total = await self.count_dreams(user_id)
+        await redis.setex(key, settings.DREAM_JOURNAL_TOTAL_TTL, total)
+        return total
+
+    @staticmethod
+    async def forget_journal_total(user_id: UUID) -> None:
+        """Call after a commit that adds or removes live dreams"""
+        await get_redis().delete(cache_key("dream_total", user_id))
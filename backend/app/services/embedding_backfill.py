@@ -0,0 +1,312 @@
+# ai_context_v3
+"""
+🎯 main_goal: Bulk (re)embedding of the dreams table for a registered model
+⚡ critical_requirements:
+   - Dream id keyset iteration, only dreams missing a vector unless re-embedding
+   - Read, embed and write stages overlap; API concurrency is bounded
+   - Binary COPY into a temp table, then one upsert per batch
+   - Checkpoint (cursor on the embedding_models row) commits with each batch
+   - Throughput reporting (rows/s, tokens/s, ETA)
+   - Model becomes ready (eligible for activation) once complete
+📥 inputs_outputs: Registered model name -> Vectors for all dreams, status ready
+🔧 functions_list:
+   - EmbeddingBackfill.run: Stream, embed and write remaining dreams
+   - BackfillProgress: Throughput counters and report line
+   - CLI: status, register, backfill, activate, rollback, retire
+🚫 forbidden_changes: Do not move the cursor past a batch that is not written
+🧪 tests: test_embedding_backfill.py with resume tests
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import asyncpg
+from loguru import logger
+from pgvector.asyncpg import register_vector
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.ai_clients import close_ai_clients, init_ai_clients
+from app.core.config import settings
+from app.core.redis import close_redis, init_redis
+from app.models.db import Dream, DreamEmbedding, EmbeddingModel
+from app.services.ai.embedding_registry import EmbeddingModelSpec, embedding_registry
+from app.services.ai.embedding_service import EmbeddingService
+
+# (dream id, text, tokens)
+BatchRow = Tuple[UUID, str, int]
+
+_STAGE_TABLE = "embedding_backfill_stage"
+_QUEUE_DEPTH = 2  # Batches buffered between stages
+
+
+@dataclass(slots=True)
+class BackfillProgress:
+    """Counters for throughput reporting"""
+    total: Optional[int] = None
+    rows: int = 0
+    tokens: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, rows: int, tokens: int) -> None:
+        self.rows += rows
+        self.tokens += tokens
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rows_per_second = self.rows / elapsed
+        line = f"{self.rows:,} rows, {rows_per_second:,.0f} rows/s, {self.tokens / elapsed:,.0f} tokens/s"
+        if self.total:
+            line += f", {min(self.rows / self.total, 1):.1%}"
+            if rows_per_second > 0:
+                line += f", ETA {max(self.total - self.rows, 0) / rows_per_second / 60:.0f} min"
+        return line
+
+
+class EmbeddingBackfill:
+    """Embed every dream for one model, resuming where the last run stopped"""
+
+    def __init__(self, embedding_service: Optional[EmbeddingService] = None):
+        self.embedding_service = embedding_service or EmbeddingService()
+
+    async def run(
+        self,
+        model_name: str,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        reembed: bool = False
+    ) -> BackfillProgress:
+        """
+        Backfill until the keyset is exhausted.
+        reembed also replaces existing vectors (e.g. after a text preprocessing change);
+        it resumes from the cursor too, so reset it to start over.
+        """
+        batch_size = batch_size or settings.EMBEDDING_BACKFILL_BATCH_SIZE
+        concurrency = concurrency or settings.EMBEDDING_MAX_CONCURRENT_BATCHES
+
+        async with database.async_session_factory() as session:
+            model = await self._get_model(session, model_name)
+            spec = EmbeddingModelSpec.from_row(model)
+            cursor = model.backfill_cursor
+            progress = BackfillProgress(total=await self._count_remaining(session, spec, cursor, reembed))
+            logger.info(
+                f"Backfilling {spec.name} from {cursor or 'the start'}: "
+                f"{progress.total:,} dreams, batches of {batch_size}, concurrency {concurrency}"
+            )
+
+            to_embed: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_DEPTH)
+            to_write: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_DEPTH)
+            writer_conn = await asyncpg.connect(str(settings.DATABASE_URL).replace("+asyncpg", ""))
+            try:
+                await self._prepare_writer(writer_conn)
+                stages = [
+                    asyncio.create_task(self._read(session, spec, cursor, batch_size, reembed, to_embed)),
+                    asyncio.create_task(self._embed(spec, concurrency, to_embed, to_write)),
+                    asyncio.create_task(self._write(writer_conn, spec, reembed, progress, to_write)),
+                ]
+                try:
+                    await asyncio.gather(*stages)
+                except BaseException:
+                    for stage in stages:
+                        stage.cancel()
+                    raise
+            finally:
+                await writer_conn.close()
+
+            await session.refresh(model)
+            if model.status == "backfilling":
+                model.status = "ready"
+                await session.commit()
+                embedding_registry.invalidate()
+
+        logger.info(
+            f"Backfill of {spec.name} complete: {progress.report()}. Build its index with "
+            f"`python -m app.services.vector_index rebuild --model {spec.name}` before activating"
+        )
+        return progress
+
+    async def _get_model(self, session: AsyncSession, name: str) -> EmbeddingModel:
+        model = await session.scalar(select(EmbeddingModel).where(EmbeddingModel.name == name))
+        if model is None:
+            raise ValueError(f"Unknown embedding model {name}")
+        if model.status == "retired":
+            raise ValueError(f"Embedding model {name} is retired")
+        return model
+
+    def _pending(self, spec: EmbeddingModelSpec, cursor: Optional[UUID], reembed: bool):
+        """Dreams still to process, in keyset order"""
+        query = select(Dream.id, Dream.text).where(Dream.is_deleted == False)
+        if not reembed:
+            query = query.where(~exists().where(
+                DreamEmbedding.dream_id == Dream.id,
+                DreamEmbedding.model == spec.name
+            ))
+        if cursor is not None:
+            query = query.where(Dream.id > cursor)
+        return query
+
+    async def _count_remaining(
+        self,
+        session: AsyncSession,
+        spec: EmbeddingModelSpec,
+        cursor: Optional[UUID],
+        reembed: bool
+    ) -> int:
+        pending = self._pending(spec, cursor, reembed).subquery()
+        return await session.scalar(select(func.count()).select_from(pending))
+
+    async def _read(
+        self,
+        session: AsyncSession,
+        spec: EmbeddingModelSpec,
+        cursor: Optional[UUID],
+        batch_size: int,
+        reembed: bool,
+        out: asyncio.Queue
+    ) -> None:
+        """Keyset pages of dreams; None marks the end"""
+        while True:
+            result = await session.execute(
+                self._pending(spec, cursor, reembed).order_by(Dream.id).limit(batch_size)
+            )
+            rows = result.all()
+            # No transaction stays open across the whole run
+            await session.commit()
+            if not rows:
+                break
+            batch: List[BatchRow] = [
+                (row.id, row.text, self.embedding_service.openai.count_tokens(row.text))
+                for row in rows
+            ]
+            cursor = batch[-1][0]
+            await out.put(batch)
+        await out.put(None)
+
+    async def _embed(
+        self,
+        spec: EmbeddingModelSpec,
+        concurrency: int,
+        source: asyncio.Queue,
+        out: asyncio.Queue
+    ) -> None:
+        """One page at a time; the page is split into API batches run concurrently"""
+        while (batch := await source.get()) is not None:
+            embeddings = await self.embedding_service.batch_create_embeddings(
+                [text for _, text, _ in batch],
+                max_concurrency=concurrency,
+                model=spec,
+                use_cache=False
+            )
+            await out.put((batch, embeddings))
+        await out.put(None)
+
+    async def _prepare_writer(self, conn: asyncpg.Connection) -> None:
+        await register_vector(conn)
+        await conn.execute(
+            f"CREATE TEMP TABLE {_STAGE_TABLE} "
+            f"(dream_id uuid, embedding vector, text_length integer) ON COMMIT DELETE ROWS"
+        )
+
+    async def _write(
+        self,
+        conn: asyncpg.Connection,
+        spec: EmbeddingModelSpec,
+        reembed: bool,
+        progress: BackfillProgress,
+        source: asyncio.Queue
+    ) -> None:
+        """COPY each page into the stage table, upsert it and move the cursor, atomically"""
+        conflict = (
+            "DO UPDATE SET embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata"
+            if reembed
+            # Vectors written by the request path meanwhile are at least as new
+            else "DO NOTHING"
+        )
+        while (item := await source.get()) is not None:
+            batch, embeddings = item
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    _STAGE_TABLE,
+                    records=[
+                        (dream_id, embedding, len(text))
+                        for (dream_id, text, _), embedding in zip(batch, embeddings)
+                    ],
+                    columns=["dream_id", "embedding", "text_length"]
+                )
+                await conn.execute(
+                    "INSERT INTO vector_store.dream_embeddings (dream_id, embedding, model, metadata) "
+                    "SELECT dream_id, embedding, $1, jsonb_build_object('text_length', text_length) "
+                    f"FROM {_STAGE_TABLE} ON CONFLICT (dream_id, model) {conflict}",
+                    spec.name
+                )
+                await conn.execute(
+                    "UPDATE vector_store.embedding_models SET backfill_cursor = $1 WHERE name = $2",
+                    batch[-1][0],
+                    spec.name
+                )
+            progress.add(len(batch), sum(tokens for _, _, tokens in batch))
+            logger.info(f"Backfill {spec.name}: {progress.report()}, cursor {batch[-1][0]}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await database.init_db()
+    await init_redis()
+    await init_ai_clients()
+    try:
+        if args.command == "backfill":
+            await EmbeddingBackfill().run(
+                args.model,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                reembed=args.reembed
+            )
+            return
+
+        async with database.async_session_factory() as session:
+            if args.command == "register":
+                await embedding_registry.register(
+                    session,
+                    name=args.model,
+                    provider_model=args.provider_model or args.model,
+                    dimensions=args.dimensions
+                )
+            elif args.command == "activate":
+                await embedding_registry.activate(session, args.model, force=args.force)
+            elif args.command == "rollback":
+                model = await embedding_registry.rollback(session)
+                print(f"Rolled back to {model.name}")
+            elif args.command == "retire":
+                await embedding_registry.retire(session, args.model)
+
+            for model in await embedding_registry.models(session):
+                print(
+                    f"{'*' if model.is_active else ' '} {model.name:<40} {model.dimensions:>5} dims  "
+                    f"{model.status:<12} provider={model.provider_model} cursor={model.backfill_cursor}"
+                )
+    finally:
+        await close_ai_clients()
+        await close_redis()
+        await database.close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage embedding models and backfills")
+    parser.add_argument("command", choices=["status", "register", "backfill", "activate", "rollback", "retire"])
+    parser.add_argument("--model", help="Registered model name (dream_embeddings.model)")
+    parser.add_argument("--provider-model", help="Embeddings API model, defaults to --model")
+    parser.add_argument("--dimensions", type=int, help="Vector dimensions for register")
+    parser.add_argument("--batch-size", type=int, help="Dreams per page, defaults to EMBEDDING_BACKFILL_BATCH_SIZE")
+    parser.add_argument("--concurrency", type=int, help="Embedding requests in flight, defaults to EMBEDDING_MAX_CONCURRENT_BATCHES")
+    parser.add_argument("--reembed", action="store_true", help="Also replace existing vectors")
+    parser.add_argument("--force", action="store_true", help="Activate a model that is still backfilling")
+    cli_args = parser.parse_args()
+    if cli_args.command in ("register", "backfill", "activate", "retire") and not cli_args.model:
+        parser.error(f"{cli_args.command} needs --model")
+    if cli_args.command == "register" and not cli_args.dimensions:
+        parser.error("register needs --dimensions")
+    asyncio.run(_main(cli_args))
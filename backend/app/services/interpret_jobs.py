@@ -0,0 +1,241 @@
+# ai_context_v3
+"""
+🎯 main_goal: Asynchronous dream interpretation jobs (state, execution, waiting)
+⚡ critical_requirements:
+   - Job state in Redis with a TTL, readable only by its owner
+   - Quota is reserved when the job is accepted and released if it fails
+   - Completion is published so waiters need no polling
+   - A job fails after INTERPRET_JOB_TIME_LIMIT on any worker pool
+   - A redelivered job that already finished is not run again
+   - The dream id is fixed at acceptance, so a job whose dream was saved
+     before its worker died is finished from that dream, not saved twice
+📥 inputs_outputs: Accepted dream -> Job id -> Interpretation result
+🔧 functions_list:
+   - InterpretJobStore.create: Record a queued job
+   - InterpretJobStore.get: Job state for its owner
+   - InterpretJobStore.wait: Job state once finished or after a timeout
+   - run_interpret_job: Worker side of a job
+   - _finish_saved: Complete a redelivered job from its saved dream
+🚫 forbidden_changes: Do not keep an API worker busy for the LLM call in job mode
+🧪 tests: tests/test_interpret_jobs.py with state transition and redelivery tests
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from loguru import logger
+
+from app.core import database
+from app.core.config import settings
+from app.core.redis import cache_key, get_redis
+from app.models.schemas.dream import DreamInterpretation, DreamInterpretResponse
+from app.services.ai.openai_service import OpenAIService
+from app.services.ai.rate_governor import UpstreamBudgetTimeout
+from app.services.dream_service import DreamService
+from app.services.interpretation_flow import interpret_and_save, store_dream_embedding
+
+FINISHED = ("done", "failed")
+
+
+class InterpretJobStore:
+    """Job records under dream_job:{id}, completion on channel dream_job:{id}:events"""
+
+    KEY_PREFIX = "dream_job"
+
+    def _key(self, job_id: UUID) -> str:
+        return cache_key(self.KEY_PREFIX, job_id)
+
+    def _channel(self, job_id: UUID) -> str:
+        return cache_key(self.KEY_PREFIX, job_id, "events")
+
+    async def create(
+        self,
+        user_id: UUID,
+        quota_key: str,
+        daily_limit_remaining: int
+    ) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "job_id": str(uuid4()),
+            "user_id": str(user_id),
+            "dream_id": str(uuid4()),  # Id the dream is saved under
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "quota_key": quota_key,
+            "daily_limit_remaining": daily_limit_remaining,
+            "result": None,
+            "error": None,
+        }
+        await get_redis().setex(self._key(job["job_id"]), settings.INTERPRET_JOB_TTL, json.dumps(job))
+        return job
+
+    async def get(self, job_id: UUID, user_id: Optional[UUID] = None) -> Optional[Dict[str, Any]]:
+        """Job state; None if unknown, expired or owned by someone else"""
+        raw = await get_redis().get(self._key(job_id))
+        if not raw:
+            return None
+        job = json.loads(raw)
+        if user_id is not None and job["user_id"] != str(user_id):
+            return None
+        return job
+
+    async def update(self, job_id: UUID, **fields) -> Optional[Dict[str, Any]]:
+        """Change a job; finished states are published to waiters"""
+        job = await self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=datetime.now(timezone.utc).isoformat())
+        redis = get_redis()
+        await redis.setex(self._key(job_id), settings.INTERPRET_JOB_TTL, json.dumps(job, default=str))
+        if job["status"] in FINISHED:
+            await redis.publish(self._channel(job_id), job["status"])
+        return job
+
+    async def wait(
+        self,
+        job_id: UUID,
+        user_id: UUID,
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Job state as soon as it finishes, or the current state after timeout"""
+        pubsub = get_redis().pubsub()
+        # Subscribe before reading, so a completion in between is not missed
+        await pubsub.subscribe(self._channel(job_id))
+        try:
+            job = await self.get(job_id, user_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + (timeout or settings.INTERPRET_JOB_WAIT_TIMEOUT)
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is not None:
+                    break
+            return await self.get(job_id, user_id)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+
+
+async def run_interpret_job(
+    job_id: UUID,
+    user_id: UUID,
+    dream_text: str,
+    language: str,
+    include_similar: bool,
+    subscription_type: Optional[str],
+    final_attempt: bool = True
+) -> None:
+    """Interpret and persist; UpstreamBudgetTimeout is re-raised unless final_attempt"""
+    job = await interpret_job_store.get(job_id)
+    if job is not None and job["status"] in FINISHED:
+        logger.info(f"Interpretation job {job_id} already {job['status']}, skipping")
+        return
+    
+    dream_id = UUID(job["dream_id"]) if job and job.get("dream_id") else None
+    if dream_id and await _finish_saved(job_id, job, dream_id, include_similar):
+        return
+    await interpret_job_store.update(job_id, status="running")
+
+    try:
+        async with database.async_session_factory() as session:
+            try:
+                # The threads pool enforces no Celery time limit, so the job
+                # bounds itself on the worker loop
+                result = await asyncio.wait_for(
+                    interpret_and_save(
+                        session,
+                        OpenAIService(),
+                        user_id=user_id,
+                        dream_text=dream_text,
+                        language=language,
+                        include_similar=include_similar,
+                        subscription_type=subscription_type,
+                        dream_id=dream_id
+                    ),
+                    timeout=settings.INTERPRET_JOB_TIME_LIMIT
+                )
+            except Exception:
+                await session.rollback()
+                raise
+
+    except UpstreamBudgetTimeout as e:
+        if not final_attempt:
+            logger.warning(f"Interpretation job {job_id} throttled, retrying: {e}")
+            await interpret_job_store.update(job_id, status="queued")
+            raise
+        await _fail(job_id, job, "AI service is busy, please try again shortly")
+        return
+
+    except Exception as e:
+        # A parallel delivery of the same job may have saved the dream first
+        if dream_id and await _finish_saved(job_id, job, dream_id, include_similar):
+            return
+        if isinstance(e, asyncio.TimeoutError):
+            logger.error(f"Interpretation job {job_id} timed out after {settings.INTERPRET_JOB_TIME_LIMIT}s")
+            await _fail(job_id, job, "Interpretation timed out, please try again")
+            return
+        logger.error(f"Interpretation job {job_id} failed: {e}")
+        await _fail(job_id, job, "Failed to interpret dream")
+        return
+
+    await _complete(job_id, job, result.dream.id, result.interpretation, result.similar_dreams)
+    if result.deferred:
+        await result.deferred()
+
+
+async def _finish_saved(
+    job_id: UUID,
+    job: Dict[str, Any],
+    dream_id: UUID,
+    include_similar: bool
+) -> bool:
+    """Complete the job from its already saved dream; False if it was not saved"""
+    async with database.async_session_factory() as session:
+        dream = await DreamService(session).get_with_interpretation(dream_id)
+    if dream is None or dream.interpretation is None:
+        return False
+    
+    logger.info(f"Interpretation job {job_id} was already saved as dream {dream_id}, finishing it")
+    await _complete(job_id, job, dream.id, DreamInterpretation.model_validate(dream.interpretation), [])
+    if include_similar:
+        # The previous run may have died before its deferred embedding write
+        await store_dream_embedding(OpenAIService(), dream.id, dream.user_id, dream.text)
+    return True
+
+
+async def _complete(
+    job_id: UUID,
+    job: Optional[Dict[str, Any]],
+    dream_id: UUID,
+    interpretation: DreamInterpretation,
+    similar_dreams: List[Dict[str, Any]]
+) -> None:
+    response = DreamInterpretResponse(
+        dream_id=dream_id,
+        interpretation=interpretation,
+        similar_dreams=similar_dreams,
+        daily_limit_remaining=job["daily_limit_remaining"] if job else 0,
+        is_saved=True
+    )
+    await interpret_job_store.update(job_id, status="done", result=response.model_dump(mode="json"))
+    logger.info(f"Interpretation job {job_id} done, dream {dream_id}")
+
+
+async def _fail(job_id: UUID, job: Optional[Dict[str, Any]], error: str) -> None:
+    """Mark failed and give the reserved daily quota back"""
+    if job is not None:
+        try:
+            await get_redis().decr(job["quota_key"])
+        except Exception as e:
+            logger.error(f"Failed to release dream quota of job {job_id}: {e}")
+    await interpret_job_store.update(job_id, status="failed", error=error)
+
+
+# Shared job store instance
+interpret_job_store = InterpretJobStore()
@@ -0,0 +1,188 @@
+# ai_context_v3
+"""
+🎯 main_goal: Interpret a dream and store it, shared by the API and job workers
+⚡ critical_requirements:
+   - Same steps for blocking requests and background jobs
+   - Context + LLM run concurrently with embedding + similarity search
+   - Embedding rows are written after the response (deferred)
+   - Post-commit events (symbol statistics, similarity context)
+📥 inputs_outputs: Dream text + user -> Saved dream, interpretation, similar dreams
+🔧 functions_list:
+   - interpret_and_save: Context, interpretation, persistence, similar dreams
+   - store_dream_embedding: Deferred embedding write for all write-target models
+   - InterpretationResult: Outcome of one interpretation
+🚫 forbidden_changes: Do not touch daily quota here, callers own it
+🧪 tests: test_interpretation_flow.py with AI mock tests
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.metrics import track_stage
+from app.models.db import Dream
+from app.models.schemas.dream import DreamInterpretation
+from app.services.ai.dream_interpreter import DreamInterpreter
+from app.services.ai.embedding_registry import embedding_registry
+from app.services.ai.embedding_service import EmbeddingService, SimilarDream
+from app.services.ai.openai_service import OpenAIService
+from app.services.ai.similarity_context import similarity_context_store
+from app.services.dream_service import DreamService
+from app.services.symbol_stats import symbol_stats_store
+
+
+@dataclass(slots=True)
+class InterpretationResult:
+    """Saved dream with its interpretation and similar dreams for the response"""
+    dream: Dream
+    interpretation: DreamInterpretation
+    similar_dreams: List[Dict[str, Any]] = field(default_factory=list)
+    # Non-critical writes to run after the response (e.g. FastAPI BackgroundTasks)
+    deferred: Optional[Callable[[], Awaitable[None]]] = None
+
+
+async def interpret_and_save(
+    db: AsyncSession,
+    openai_service: OpenAIService,
+    user_id: UUID,
+    dream_text: str,
+    language: str,
+    include_similar: bool,
+    subscription_type: Optional[str] = None,
+    dream_id: Optional[UUID] = None
+) -> InterpretationResult:
+    """
+    Interpret, store and commit a dream; the caller rolls back on errors.
+    The context query and LLM call run alongside embedding and similarity
+    search, so latency is that of the LLM; the embedding rows are written
+    by result.deferred, which the caller must run. A given dream_id makes the
+    save idempotent: a second save of the same dream fails on the primary key.
+    """
+    interpreter = DreamInterpreter(openai_service)
+    embedding_service = EmbeddingService(openai_service)
+    dream_service = DreamService(db)
+
+    async def interpret() -> DreamInterpretation:
+        # Get user context for better interpretation
+        user_context = None
+        if include_similar:
+            with track_stage("context_query"):
+                user_context = await dream_service.get_user_context(user_id)
+        return await interpreter.interpret_dream(
+            dream_text=dream_text,
+            user_context=user_context,
+            language=language,
+            include_similar=include_similar,
+            subscription_type=subscription_type
+        )
+
+    similar_task = (
+        asyncio.create_task(_embed_and_search(embedding_service, user_id, dream_text))
+        if include_similar else None
+    )
+    try:
+        interpretation = await interpret()
+    except BaseException:
+        if similar_task:
+            similar_task.cancel()
+        raise
+    embedded, similar_results = await similar_task if similar_task else (None, [])
+
+    # Create dream record with interpretation
+    with track_stage("db_write"):
+        dream = await dream_service.save_interpretation(
+            user_id=user_id,
+            dream_text=dream_text,
+            language=language,
+            interpretation=interpretation,
+            dream_id=dream_id
+        )
+        await db.commit()
+    symbol_stats_store.interpretation_written(dream.id)
+    await DreamService.forget_journal_total(user_id)
+
+    deferred = None
+    if include_similar:
+        deferred = partial(
+            store_dream_embedding,
+            openai_service,
+            dream.id,
+            user_id,
+            dream_text,
+            embedded
+        )
+
+    similar_dreams = [
+        {
+            "id": str(similar_dream.id),
+            "text": similar_dream.text[:200] + "...",
+            "main_symbol": similar_dream.main_symbol,
+            "similarity": round(similar_dream.similarity, 2),
+            "created_at": similar_dream.created_at.isoformat()
+        }
+        for similar_dream in similar_results
+    ]
+    return InterpretationResult(
+        dream=dream,
+        interpretation=interpretation,
+        similar_dreams=similar_dreams[:3],  # Top 3 similar
+        deferred=deferred
+    )
+
+
+async def _embed_and_search(
+    embedding_service: EmbeddingService,
+    user_id: UUID,
+    dream_text: str
+) -> Tuple[Optional[Dict[str, List[float]]], List[SimilarDream]]:
+    """Active-model vector of the text and the user's dreams closest to it; never raises"""
+    try:
+        model = await embedding_registry.active()
+        with track_stage("embedding"):
+            embedding = await embedding_service.create_embedding(dream_text, model=model)
+        # The request session is busy with the context query and later the insert
+        async with database.async_session_factory() as session:
+            with track_stage("similarity_search"):
+                similar = await embedding_service.find_similar_dreams(
+                    query_embedding=embedding,
+                    limit=5,
+                    user_id=user_id,
+                    min_similarity=0.75,
+                    db_session=session
+                )
+        return {model.name: embedding}, similar
+    except Exception as e:
+        # Similar dreams are optional, the interpretation is not
+        logger.warning(f"Similar dream search skipped: {e}")
+        return None, []
+
+
+async def store_dream_embedding(
+    openai_service: OpenAIService,
+    dream_id: UUID,
+    user_id: UUID,
+    dream_text: str,
+    embeddings: Optional[Dict[str, List[float]]] = None
+) -> None:
+    """Write the dream's vectors for every write-target model, then refresh its similarity context"""
+    try:
+        async with database.async_session_factory() as session:
+            with track_stage("embedding_write"):
+                await EmbeddingService(openai_service).update_dream_embedding(
+                    dream_id=dream_id,
+                    dream_text=dream_text,
+                    db_session=session,
+                    user_id=user_id,
+                    embeddings=embeddings
+                )
+    except Exception as e:
+        # The dream is saved; a missing vector is filled by the next backfill run
+        logger.error(f"Deferred embedding write failed for dream {dream_id}: {e}")
+        return
+    similarity_context_store.dream_changed(dream_id, user_id)
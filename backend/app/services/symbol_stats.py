@@ -0,0 +1,466 @@
+# ai_context_v3
+"""
+🎯 main_goal: Global dream symbol statistics maintained incrementally
+⚡ critical_requirements:
+   - Symbols keyed by a case-folded, lemmatized form of main_symbol
+   - Counts, co-occurrences and per-day counts updated per written interpretation
+   - Batched write-behind: one upsert per table per batch, keys in sorted order
+   - Periodic compaction in one worker (old daily rows, idle rare pairs, orphans)
+   - Top-N and related-symbol reads are index scans, never dream_interpretations scans
+📥 inputs_outputs: Written dream ids -> symbols, symbol_cooccurrences, symbol_daily_counts
+🔧 functions_list:
+   - normalize_symbol: Lookup key of a symbol
+   - SymbolStatsStore.interpretation_written: Queue a committed interpretation
+   - SymbolStatsStore.popular: Top symbols, all time or over recent days
+   - SymbolStatsStore.lookup: One symbol with its related symbols
+   - SymbolStatsStore.compact: Prune old and low-value rows
+   - SymbolStatsStore.rebuild: Recount from the dreams table
+   - SymbolStatsStore.start/stop: Background writer lifecycle
+   - CLI: rebuild, compact
+🚫 forbidden_changes: Do not update statistics rows on the request path
+🧪 tests: test_symbol_stats.py with normalization and batching tests
+"""
+
+import argparse
+import asyncio
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import exists, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.core.redis import close_redis, get_redis, init_redis
+from app.models.db import Dream, DreamInterpretation, Symbol, SymbolCooccurrence, SymbolDailyCount
+
+_WORD = re.compile(r"[^\W\d_]+")
+_CYRILLIC = re.compile(r"[а-я]")
+_MIN_STEM = 3
+
+# Inflectional endings, longest first; a crude stemmer is enough to merge
+# "Змея", "змеи" and "змею" without a morphology dictionary
+_RU_ENDINGS = (
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "иях", "ией",
+    "ях", "ах", "ов", "ев", "ей", "ом", "ем", "ой", "ый", "ий", "ая", "яя",
+    "ое", "ее", "ую", "юю", "ия", "ие", "ы", "и", "а", "я", "о", "е", "у", "ю", "ь", "й",
+)
+
+
+def _stem(word: str) -> str:
+    if _CYRILLIC.search(word):
+        for ending in _RU_ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+                return word[:-len(ending)]
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Lookup key: case-folded words without punctuation or emoji, each stemmed"""
+    words = _WORD.findall(symbol.casefold().replace("ё", "е"))
+    return " ".join(_stem(word) for word in words)[:255]
+
+
+class SymbolStatsStore:
+    """Write-behind maintenance and index-backed reads of symbol statistics"""
+
+    COMPACT_LOCK_KEY = "symbol_stats:compact_lock"
+    COMPACT_CHUNK_SIZE = 5000
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start background writer"""
+        if not settings.SYMBOL_STATS_ENABLED or self._writer_task:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.SYMBOL_STATS_QUEUE_SIZE)
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info("Symbol statistics writer started")
+
+    async def stop(self) -> None:
+        """Stop background writer and flush pending dreams"""
+        if not self._writer_task:
+            return
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
+
+        pending = self._drain(self._queue.qsize())
+        if pending:
+            await self._flush_batch(pending)
+        logger.info("Symbol statistics writer stopped")
+
+    def interpretation_written(self, dream_id: UUID) -> None:
+        """Count a committed interpretation in the next batch"""
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(dream_id)
+        except asyncio.QueueFull:
+            # Counts drift until the next rebuild
+            logger.warning("Symbol statistics queue full, dropping dream")
+
+    async def popular(
+        self,
+        session: AsyncSession,
+        limit: int = 10,
+        days: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Most frequent symbols; with days, counted over the recent daily rows only"""
+        if days is None:
+            result = await session.execute(
+                select(Symbol.display, Symbol.emoji, Symbol.count)
+                .where(Symbol.count > 0)
+                .order_by(Symbol.count.desc())
+                .limit(limit)
+            )
+        else:
+            since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+            recent = func.sum(SymbolDailyCount.count).label("count")
+            result = await session.execute(
+                select(Symbol.display, Symbol.emoji, recent)
+                .join(SymbolDailyCount, SymbolDailyCount.symbol_id == Symbol.id)
+                .where(SymbolDailyCount.day >= since)
+                .group_by(Symbol.id)
+                .order_by(recent.desc())
+                .limit(limit)
+            )
+        return [
+            {"symbol": row.display, "emoji": row.emoji, "count": int(row.count)}
+            for row in result
+        ]
+
+    async def lookup(
+        self,
+        session: AsyncSession,
+        symbol: str,
+        related_limit: int = 5
+    ) -> Optional[Dict[str, Any]]:
+        """Symbol by any spelling, with the symbols most often seen next to it"""
+        row = await session.scalar(select(Symbol).where(Symbol.name == normalize_symbol(symbol)))
+        if row is None or row.count == 0:
+            return None
+
+        related = await session.scalars(
+            select(Symbol.display)
+            .join(SymbolCooccurrence, SymbolCooccurrence.related_symbol_id == Symbol.id)
+            .where(SymbolCooccurrence.symbol_id == row.id)
+            .order_by(SymbolCooccurrence.count.desc())
+            .limit(related_limit)
+        )
+        return {
+            "symbol": row.display,
+            "emoji": row.emoji,
+            "count": row.count,
+            "related_symbols": list(related)
+        }
+
+    async def compact(self) -> Dict[str, int]:
+        """Delete daily rows past retention, idle rare pairs and unused symbols"""
+        cutoff_day = datetime.now(timezone.utc).date() - timedelta(days=settings.SYMBOL_DAILY_RETENTION_DAYS)
+        idle_since = datetime.now(timezone.utc) - timedelta(days=settings.SYMBOL_COOCCURRENCE_IDLE_DAYS)
+        removed = {
+            "daily": await self._delete_chunked(
+                "symbol_daily_counts",
+                "day < :cutoff",
+                {"cutoff": cutoff_day}
+            ),
+            "pairs": await self._delete_chunked(
+                "symbol_cooccurrences",
+                "count < :min_count AND last_seen_at < :idle_since",
+                {"min_count": settings.SYMBOL_COOCCURRENCE_MIN_COUNT, "idle_since": idle_since}
+            ),
+            # Symbols only ever seen as a partner of pruned pairs
+            "symbols": await self._delete_chunked(
+                "symbols",
+                "count = 0 AND NOT EXISTS ("
+                "SELECT 1 FROM symbol_cooccurrences c "
+                "WHERE c.symbol_id = symbols.id OR c.related_symbol_id = symbols.id)",
+                {}
+            ),
+        }
+        if any(removed.values()):
+            logger.info(f"Compacted symbol statistics: {removed}")
+        return removed
+
+    async def rebuild(self, batch_size: int = 1000) -> int:
+        """Recount every journal dream, e.g. after the first deploy or a normalizer change"""
+        total = 0
+        cursor: Optional[UUID] = None
+        async with database.async_session_factory() as session:
+            await session.execute(text("TRUNCATE symbols, symbol_cooccurrences, symbol_daily_counts"))
+            await session.commit()
+
+            while True:
+                query = (
+                    select(Dream.id)
+                    .where(
+                        Dream.is_deleted == False,
+                        exists().where(DreamInterpretation.dream_id == Dream.id)
+                    )
+                    .order_by(Dream.id)
+                    .limit(batch_size)
+                )
+                if cursor is not None:
+                    query = query.where(Dream.id > cursor)
+                dream_ids = list(await session.scalars(query))
+                if not dream_ids:
+                    break
+                await self._apply(session, dream_ids)
+                await session.commit()
+                cursor = dream_ids[-1]
+                total += len(dream_ids)
+                logger.info(f"Symbol statistics rebuild: {total:,} dreams")
+        return total
+
+    async def _delete_chunked(self, table: str, condition: str, params: Dict[str, Any]) -> int:
+        total = 0
+        async with database.async_session_factory() as session:
+            while True:
+                result = await session.execute(
+                    text(f"""
+                        DELETE FROM {table}
+                        WHERE id IN (
+                            SELECT id FROM {table}
+                            WHERE {condition}
+                            LIMIT :chunk
+                        )
+                    """),
+                    {**params, "chunk": self.COMPACT_CHUNK_SIZE}
+                )
+                await session.commit()
+                total += result.rowcount
+                if result.rowcount < self.COMPACT_CHUNK_SIZE:
+                    break
+        return total
+
+    def _drain(self, limit: int) -> List[UUID]:
+        """Take up to limit queued dream ids without waiting"""
+        dream_ids = []
+        while len(dream_ids) < limit:
+            try:
+                dream_ids.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return dream_ids
+
+    async def _writer_loop(self) -> None:
+        """Collect dream ids into batches and periodically compact"""
+        loop = asyncio.get_running_loop()
+        next_compaction = loop.time() + settings.SYMBOL_STATS_COMPACT_INTERVAL
+
+        while True:
+            try:
+                timeout = max(0.0, next_compaction - loop.time())
+                try:
+                    first = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    first = None
+
+                if first is not None:
+                    # Popular symbols are hot rows; larger batches mean fewer updates of them
+                    try:
+                        await asyncio.sleep(settings.SYMBOL_STATS_FLUSH_INTERVAL)
+                    except asyncio.CancelledError:
+                        self._queue.put_nowait(first)
+                        raise
+                    batch = [first] + self._drain(settings.SYMBOL_STATS_WRITE_BATCH_SIZE - 1)
+                    await self._flush_batch(batch)
+
+                if loop.time() >= next_compaction:
+                    next_compaction = loop.time() + settings.SYMBOL_STATS_COMPACT_INTERVAL
+                    await self._compact_if_leader()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Symbol statistics writer error: {e}")
+
+    async def _flush_batch(self, dream_ids: List[UUID]) -> None:
+        try:
+            async with database.async_session_factory() as session:
+                await self._apply(session, dream_ids)
+                await session.commit()
+            logger.debug(f"Counted symbols of {len(dream_ids)} dreams")
+        except Exception as e:
+            logger.error(f"Symbol statistics DB write error: {e}")
+
+    async def _apply(self, session: AsyncSession, dream_ids: Sequence[UUID]) -> None:
+        """Add the dreams' symbols, pairs with earlier journal symbols and day counts"""
+        # Only earlier dreams are paired, so a batch holding several dreams
+        # of one user still counts each pair once
+        result = await session.execute(
+            text("""
+                SELECT d.id, d.created_at, i.main_symbol, i.main_symbol_emoji,
+                       previous.main_symbol AS previous_symbol
+                FROM dreams d
+                JOIN dream_interpretations i ON i.dream_id = d.id
+                LEFT JOIN LATERAL (
+                    SELECT pi.main_symbol
+                    FROM dreams p
+                    JOIN dream_interpretations pi ON pi.dream_id = p.id
+                    WHERE p.user_id = d.user_id
+                      AND p.created_at < d.created_at
+                      AND p.is_deleted = false
+                    ORDER BY p.created_at DESC
+                    LIMIT :window
+                ) previous ON true
+                WHERE d.id = ANY(:dream_ids)
+            """),
+            {"dream_ids": list(dream_ids), "window": settings.SYMBOL_COOCCURRENCE_WINDOW}
+        )
+
+        dreams: Dict[UUID, Tuple[str, str, Optional[str], datetime]] = {}
+        previous: Dict[UUID, Set[str]] = defaultdict(set)
+        displays: Dict[str, str] = {}
+        for row in result:
+            dreams[row.id] = (normalize_symbol(row.main_symbol), row.main_symbol, row.main_symbol_emoji, row.created_at)
+            if row.previous_symbol:
+                name = normalize_symbol(row.previous_symbol)
+                previous[row.id].add(name)
+                displays.setdefault(name, row.previous_symbol)
+
+        symbols: Dict[str, Dict[str, Any]] = {}
+        daily: Counter = Counter()
+        pairs: Counter = Counter()
+        pair_seen: Dict[Tuple[str, str], datetime] = {}
+        for dream_id, (name, display, emoji, created_at) in dreams.items():
+            if not name:
+                continue
+            entry = symbols.setdefault(name, {"display": display, "emoji": None, "count": 0, "last_seen_at": None})
+            entry["count"] += 1
+            entry["emoji"] = entry["emoji"] or emoji
+            entry["last_seen_at"] = max(entry["last_seen_at"] or created_at, created_at)
+            daily[(name, created_at.astimezone(timezone.utc).date())] += 1
+
+            for related in previous[dream_id] - {name, ""}:
+                symbols.setdefault(
+                    related,
+                    {"display": displays[related], "emoji": None, "count": 0, "last_seen_at": None}
+                )
+                # Stored both ways so related(symbol) is a single index range
+                for pair in ((name, related), (related, name)):
+                    pairs[pair] += 1
+                    pair_seen[pair] = max(pair_seen.get(pair, created_at), created_at)
+
+        if not symbols:
+            return
+
+        symbol_ids = await self._upsert_symbols(session, symbols)
+        await self._upsert_daily(session, symbol_ids, daily)
+        if pairs:
+            await self._upsert_pairs(session, symbol_ids, pairs, pair_seen)
+
+    async def _upsert_symbols(self, session: AsyncSession, symbols: Dict[str, Dict[str, Any]]) -> Dict[str, UUID]:
+        table = Symbol.__table__
+        # Same key order in every worker, so concurrent batches cannot deadlock
+        stmt = pg_insert(table).values([{"name": name, **symbols[name]} for name in sorted(symbols)])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                "count": table.c.count + stmt.excluded.count,
+                "emoji": func.coalesce(table.c.emoji, stmt.excluded.emoji),
+                "last_seen_at": func.greatest(table.c.last_seen_at, stmt.excluded.last_seen_at),
+                "updated_at": func.now(),
+            }
+        ).returning(table.c.name, table.c.id)
+        result = await session.execute(stmt)
+        return {row.name: row.id for row in result}
+
+    async def _upsert_daily(self, session: AsyncSession, symbol_ids: Dict[str, UUID], daily: Counter) -> None:
+        table = SymbolDailyCount.__table__
+        stmt = pg_insert(table).values([
+            {"symbol_id": symbol_ids[name], "day": day, "count": count}
+            for (name, day), count in sorted(daily.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol_id", "day"],
+            set_={"count": table.c.count + stmt.excluded.count, "updated_at": func.now()}
+        )
+        await session.execute(stmt)
+
+    async def _upsert_pairs(
+        self,
+        session: AsyncSession,
+        symbol_ids: Dict[str, UUID],
+        pairs: Counter,
+        pair_seen: Dict[Tuple[str, str], datetime]
+    ) -> None:
+        table = SymbolCooccurrence.__table__
+        stmt = pg_insert(table).values([
+            {
+                "symbol_id": symbol_ids[name],
+                "related_symbol_id": symbol_ids[related],
+                "count": count,
+                "last_seen_at": pair_seen[(name, related)],
+            }
+            for (name, related), count in sorted(pairs.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol_id", "related_symbol_id"],
+            set_={
+                "count": table.c.count + stmt.excluded.count,
+                "last_seen_at": func.greatest(table.c.last_seen_at, stmt.excluded.last_seen_at),
+                "updated_at": func.now(),
+            }
+        )
+        await session.execute(stmt)
+
+    async def _compact_if_leader(self) -> None:
+        """Run compaction in one worker per interval"""
+        try:
+            redis = get_redis()
+            acquired = await redis.set(
+                self.COMPACT_LOCK_KEY,
+                "1",
+                nx=True,
+                ex=settings.SYMBOL_STATS_COMPACT_INTERVAL
+            )
+        except Exception as e:
+            logger.error(f"Symbol statistics compaction lock error: {e}")
+            return
+
+        if acquired:
+            await self.compact()
+
+
+# Per-process store instance
+symbol_stats_store = SymbolStatsStore()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await database.init_db()
+    await init_redis()
+    try:
+        if args.command == "rebuild":
+            total = await symbol_stats_store.rebuild(batch_size=args.batch_size)
+            print(f"Counted symbols of {total:,} dreams")
+        else:
+            print(await symbol_stats_store.compact())
+    finally:
+        await close_redis()
+        await database.close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain global symbol statistics")
+    parser.add_argument("command", choices=["rebuild", "compact"])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Dreams per rebuild batch")
+    asyncio.run(_main(parser.parse_args()))
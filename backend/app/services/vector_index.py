@@ -0,0 +1,201 @@
+# ai_context_v3
+"""
+🎯 main_goal: Configurable ANN index for dream embeddings
+⚡ critical_requirements:
+   - One partial index per embedding model (WHERE model = ...), cast to its dimension
+   - ivfflat or HNSW with parameters from settings
+   - Full precision or halfvec expression index (half the index memory)
+   - Online rebuild: build new index concurrently, then swap names
+   - Same DDL for migrations, the CLI and benchmarks
+📥 inputs_outputs: Index type + parameters -> pgvector index on dream_embeddings
+🔧 functions_list:
+   - index_name: Index name of an embedding model
+   - index_ddl: CREATE INDEX statement for an index configuration
+   - VectorIndexManager.current_definition: Index definition in the database
+   - VectorIndexManager.rebuild: Replace the index without blocking writes
+🚫 forbidden_changes: Do not drop the old index before the new one is valid
+🧪 tests: test_vector_index.py with DDL generation tests
+"""
+
+import argparse
+import asyncio
+import re
+from typing import Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import settings
+
+INDEX_TYPES = ("ivfflat", "hnsw")
+PRECISIONS = ("full", "half")
+EMBEDDINGS_TABLE = "vector_store.dream_embeddings"
+INDEX_NAME = "dream_embeddings_vector_idx"  # Single index used before the model registry
+
+
+def index_name(model: str) -> str:
+    """Index of one model's vectors; short enough for the _new suffix"""
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")[:38]
+    return f"dream_embeddings_{slug}_idx"
+
+
+def index_ddl(
+    name: str,
+    table: str = EMBEDDINGS_TABLE,
+    index_type: Optional[str] = None,
+    lists: Optional[int] = None,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    precision: Optional[str] = None,
+    dim: int = 1536,
+    model: Optional[str] = None,
+    column: str = "embedding",
+    concurrently: bool = True
+) -> str:
+    """
+    CREATE INDEX statement, parameters default to settings.
+    With a model the index is partial and casts the untyped column to dim.
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    precision = precision or settings.VECTOR_INDEX_PRECISION
+    if precision == "full" and model:
+        key = f"(({column})::vector({int(dim)})) vector_cosine_ops"
+    elif precision == "full":
+        key = f"{column} vector_cosine_ops"
+    elif precision == "half":
+        # Must match the cast used by queries for the planner to pick it
+        key = f"(({column})::halfvec({int(dim)})) halfvec_cosine_ops"
+    else:
+        raise ValueError(f"Unknown vector index precision: {precision}")
+    
+    if index_type == "ivfflat":
+        params = f"lists = {int(lists or settings.VECTOR_IVFFLAT_LISTS)}"
+    elif index_type == "hnsw":
+        params = (
+            f"m = {int(m or settings.VECTOR_HNSW_M)}, "
+            f"ef_construction = {int(ef_construction or settings.VECTOR_HNSW_EF_CONSTRUCTION)}"
+        )
+    else:
+        raise ValueError(f"Unknown vector index type: {index_type}")
+
+    where = f" WHERE model = '{model.replace(chr(39), chr(39) * 2)}'" if model else ""
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} "
+        f"ON {table} USING {index_type} ({key}) WITH ({params}){where}"
+    )
+
+
+class VectorIndexManager:
+    """Inspect and rebuild the ANN index of one embedding model"""
+
+    def __init__(self, model: str, dimensions: int, table: str = EMBEDDINGS_TABLE):
+        self.model = model
+        self.dimensions = dimensions
+        self.table = table
+        self.name = index_name(model)
+        self.schema = table.split(".")[0] if "." in table else "public"
+
+    async def current_definition(self, conn: AsyncConnection) -> Optional[str]:
+        """Index definition as reported by pg_indexes"""
+        result = await conn.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE schemaname = :schema AND indexname = :name"
+            ),
+            {"schema": self.schema, "name": self.name}
+        )
+        return result.scalar_one_or_none()
+
+    async def rebuild(
+        self,
+        conn: AsyncConnection,
+        index_type: Optional[str] = None,
+        lists: Optional[int] = None,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        precision: Optional[str] = None,
+        maintenance_work_mem: Optional[str] = None
+    ) -> str:
+        """
+        Build the configured index next to the old one and swap it in.
+        conn must be in autocommit mode (CONCURRENTLY cannot run in a transaction).
+        """
+        new_name = f"{self.name}_new"
+        ddl = index_ddl(
+            new_name,
+            table=self.table,
+            index_type=index_type,
+            lists=lists,
+            m=m,
+            ef_construction=ef_construction,
+            precision=precision,
+            dim=self.dimensions,
+            model=self.model
+        )
+
+        # Leftover from an interrupted rebuild is invalid, start over
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.schema}.{new_name}"))
+        if maintenance_work_mem:
+            await conn.execute(
+                text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                {"value": maintenance_work_mem}
+            )
+
+        logger.info(f"Building vector index: {ddl}")
+        await conn.execute(text(ddl))
+
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.schema}.{self.name}"))
+        await conn.execute(text(f"ALTER INDEX {self.schema}.{new_name} RENAME TO {self.name}"))
+
+        definition = await self.current_definition(conn)
+        logger.info(f"Vector index rebuilt: {definition}")
+        return definition
+
+
+async def _registered_model(conn: AsyncConnection, name: Optional[str]) -> Tuple[str, int]:
+    """Name and dimensions of a registered model, the active one by default"""
+    query = "SELECT name, dimensions FROM vector_store.embedding_models WHERE "
+    if name:
+        result = await conn.execute(text(query + "name = :name"), {"name": name})
+    else:
+        result = await conn.execute(text(query + "is_active"))
+    row = result.first()
+    if row is None:
+        raise SystemExit(f"Embedding model not registered: {name or 'no active model'}")
+    return row.name, row.dimensions
+
+
+async def _main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(str(settings.DATABASE_URL))
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            manager = VectorIndexManager(*await _registered_model(conn, args.model))
+            if args.command == "show":
+                print(await manager.current_definition(conn))
+                return
+            await manager.rebuild(
+                conn,
+                index_type=args.type,
+                lists=args.lists,
+                m=args.m,
+                ef_construction=args.ef_construction,
+                precision=args.precision,
+                maintenance_work_mem=args.maintenance_work_mem
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the dream embeddings vector index")
+    parser.add_argument("command", choices=["show", "rebuild"])
+    parser.add_argument("--model", help="Registered embedding model, defaults to the active one")
+    parser.add_argument("--type", choices=INDEX_TYPES, help="Defaults to VECTOR_INDEX_TYPE")
+    parser.add_argument("--lists", type=int, help="ivfflat lists")
+    parser.add_argument("--m", type=int, help="HNSW m")
+    parser.add_argument("--ef-construction", type=int, help="HNSW ef_construction")
+    parser.add_argument("--precision", choices=PRECISIONS, help="Defaults to VECTOR_INDEX_PRECISION")
+    parser.add_argument("--maintenance-work-mem", help="e.g. 2GB, speeds up index builds")
+    asyncio.run(_main(parser.parse_args()))
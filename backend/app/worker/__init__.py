@@ -0,0 +1,13 @@
+# ai_context_v3
+"""
+🎯 main_goal: Celery worker package
+⚡ critical_requirements: Run with `celery -A app.worker worker`
+📥 inputs_outputs: None -> Celery app with registered tasks
+🔧 functions_list: Module exports only
+🚫 forbidden_changes: Do not import the FastAPI app here
+🧪 tests: Import verification
+"""
+
+from app.core.celery_app import celery_app
+
+__all__ = ["celery_app"]
@@ -0,0 +1,110 @@
+# ai_context_v3
+"""
+🎯 main_goal: Celery tasks running async services on a per-process event loop
+⚡ critical_requirements:
+   - One event loop thread per worker process, shared by all task threads
+   - Database, Redis, OpenAI pools and background stores started once per process
+   - Many jobs in flight per process with the threads pool (I/O bound on the LLM)
+   - Throttled jobs are retried with backoff, quota released on final failure
+📥 inputs_outputs: Job arguments -> Stored interpretation and job state
+🔧 functions_list:
+   - interpret_dream_job: Run one interpretation job
+   - run_async: Execute a coroutine on the worker loop
+🚫 forbidden_changes: Do not create a new event loop per task (pools are loop-bound)
+🧪 tests: tests/test_worker_tasks.py with eager mode retry tests
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+from uuid import UUID
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from loguru import logger
+
+from app.core.ai_clients import close_ai_clients, init_ai_clients
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import close_db, init_db
+from app.core.redis import close_redis, init_redis
+from app.services.ai.rate_governor import UpstreamBudgetTimeout
+from app.services.ai.response_cache import response_cache_store
+from app.services.ai.similarity_context import similarity_context_store
+from app.services.interpret_jobs import run_interpret_job
+from app.services.symbol_stats import symbol_stats_store
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+async def _startup() -> None:
+    await init_db()
+    await init_redis()
+    await init_ai_clients()
+    await response_cache_store.start()
+    await similarity_context_store.start()
+    await symbol_stats_store.start()
+
+
+async def _shutdown() -> None:
+    await symbol_stats_store.stop()
+    await similarity_context_store.stop()
+    await response_cache_store.stop()
+    await close_ai_clients()
+    await close_db()
+    await close_redis()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start the process loop lazily, i.e. after prefork"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="worker-event-loop", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(_startup(), loop).result()
+            _loop = loop
+            logger.info("Worker event loop started")
+    return _loop
+
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine on the worker loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_loop(**kwargs) -> None:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(_shutdown(), _loop).result()
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop = None
+
+
+@celery_app.task(bind=True, name="dreams.interpret", max_retries=settings.INTERPRET_JOB_MAX_RETRIES)
+def interpret_dream_job(
+    self,
+    job_id: str,
+    user_id: str,
+    dream_text: str,
+    language: str,
+    include_similar: bool,
+    subscription_type: Optional[str]
+) -> None:
+    """Interpret and save a dream accepted by POST /dreams/interpret?async=true"""
+    try:
+        run_async(run_interpret_job(
+            UUID(job_id),
+            UUID(user_id),
+            dream_text=dream_text,
+            language=language,
+            include_similar=include_similar,
+            subscription_type=subscription_type,
+            final_attempt=self.request.retries >= self.max_retries
+        ))
+    except UpstreamBudgetTimeout as e:
+        raise self.retry(exc=e, countdown=10 * 2 ** self.request.retries)
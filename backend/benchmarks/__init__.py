@@ -0,0 +1,9 @@
+# ai_context_v3
+"""
+🎯 main_goal: Reproducible performance benchmarks for the backend
+⚡ critical_requirements: Run against local services only, never production
+📥 inputs_outputs: None
+🔧 functions_list: Package initialization
+🚫 forbidden_changes: Do not import benchmarks from application code
+🧪 tests: Benchmarks are run manually
+"""
@@ -0,0 +1,26 @@
+"""Build the dream embeddings vector index from settings
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The ivfflat index from docker/init-db.sql (lists = 100) is the default
+    # configuration, so there is nothing to build here. Other VECTOR_INDEX_*
+    # settings are applied online with `python -m app.services.vector_index rebuild`;
+    # revisions must not depend on settings or application code.
+    pass
+
+
+def downgrade() -> None:
+    pass
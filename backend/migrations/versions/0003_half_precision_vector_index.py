@@ -0,0 +1,25 @@
+"""Half-precision (halfvec) dream embeddings vector index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 13:00:00
+
+"""
+from typing import Sequence, Union
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The halfvec copy lives only in the index (an expression over the float32
+    # column), so the schema does not change. The index is built per model by
+    # revision 0009 when run with `-x vector_precision=half`.
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,127 @@
+"""Embedding model registry with one vector index per model
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 14:00:00
+
+"""
+import re
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY_MODEL = "text-embedding-ada-002"
+LEGACY_DIMENSIONS = 1536
+LEGACY_INDEX = "dream_embeddings_vector_idx"
+
+# Bootstrap SQL function bound to vector(1536), unused by the application
+LEGACY_SEARCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION find_similar_dreams(
+    query_embedding vector(1536),
+    limit_count INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    dream_id UUID,
+    similarity FLOAT,
+    dream_text TEXT,
+    interpretation TEXT
+)
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        de.dream_id,
+        1 - (de.embedding <=> query_embedding) as similarity,
+        d.text as dream_text,
+        di.interpretation
+    FROM vector_store.dream_embeddings de
+    JOIN dreams d ON d.id = de.dream_id
+    LEFT JOIN dream_interpretations di ON di.dream_id = d.id
+    WHERE d.is_deleted = false
+    ORDER BY de.embedding <=> query_embedding
+    LIMIT limit_count;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _index_name(model: str) -> str:
+    # Frozen copy of app.services.vector_index.index_name
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")[:38]
+    return f"dream_embeddings_{slug}_idx"
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: the API creates model tables on startup, possibly before this runs
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vector_store.embedding_models (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            name VARCHAR(50) NOT NULL UNIQUE,
+            provider_model VARCHAR(50) NOT NULL,
+            dimensions INTEGER NOT NULL,
+            is_active BOOLEAN NOT NULL DEFAULT false,
+            status VARCHAR(20) NOT NULL DEFAULT 'backfilling',
+            backfill_cursor UUID,
+            activated_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_embedding_models_active "
+        "ON vector_store.embedding_models (is_active) WHERE is_active"
+    )
+    # Every existing vector is ada-002, so it is complete and active
+    op.execute(
+        "INSERT INTO vector_store.embedding_models "
+        "(name, provider_model, dimensions, is_active, status, activated_at) "
+        f"VALUES ('{LEGACY_MODEL}', '{LEGACY_MODEL}', {LEGACY_DIMENSIONS}, true, 'ready', now()) "
+        "ON CONFLICT (name) DO NOTHING"
+    )
+
+    # It would break as soon as a model of another dimension is active
+    op.execute("DROP FUNCTION IF EXISTS find_similar_dreams(vector, INTEGER)")
+
+    with op.get_context().autocommit_block():
+        # Untyped column so models of different dimensions share the table;
+        # indexes on the column itself would need a fixed dimension
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS vector_store.{LEGACY_INDEX}")
+        op.execute("ALTER TABLE vector_store.dream_embeddings ALTER COLUMN embedding TYPE vector")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS vector_store.{_index_name(LEGACY_MODEL)}")
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY {_index_name(LEGACY_MODEL)} "
+            "ON vector_store.dream_embeddings USING ivfflat "
+            f"((embedding::vector({LEGACY_DIMENSIONS})) vector_cosine_ops) WITH (lists = 100) "
+            f"WHERE model = '{LEGACY_MODEL}'"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    models = bind.execute(sa.text("SELECT name FROM vector_store.embedding_models")).scalars().all()
+
+    with op.get_context().autocommit_block():
+        for model in models:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS vector_store.{_index_name(model)}")
+        # Only the legacy model fits the fixed-dimension column
+        op.execute(f"DELETE FROM vector_store.dream_embeddings WHERE model <> '{LEGACY_MODEL}'")
+        op.execute(
+            f"ALTER TABLE vector_store.dream_embeddings "
+            f"ALTER COLUMN embedding TYPE vector({LEGACY_DIMENSIONS})"
+        )
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY {LEGACY_INDEX} "
+            "ON vector_store.dream_embeddings USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"
+        )
+
+    op.execute(LEGACY_SEARCH_FUNCTION)
+    op.execute("DROP TABLE IF EXISTS vector_store.embedding_models")
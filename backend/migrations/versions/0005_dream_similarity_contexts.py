@@ -0,0 +1,48 @@
+"""Precomputed similarity context per dream
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are filled lazily: the first read of a dream schedules its computation.
+    # IF NOT EXISTS: the API creates model tables on startup, possibly before this runs
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dream_similarity_contexts (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            dream_id UUID NOT NULL UNIQUE REFERENCES dreams(id) ON DELETE CASCADE,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            model VARCHAR(50) NOT NULL,
+            similar_count INTEGER NOT NULL DEFAULT 0,
+            similar_dream_ids UUID[] NOT NULL DEFAULT '{}',
+            similar JSONB NOT NULL DEFAULT '[]',
+            common_symbols JSONB NOT NULL DEFAULT '[]',
+            recurring_emotions JSONB NOT NULL DEFAULT '[]',
+            average_similarity DOUBLE PRECISION NOT NULL DEFAULT 0,
+            is_stale BOOLEAN NOT NULL DEFAULT false,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_similarity_contexts_similar_ids "
+        "ON dream_similarity_contexts USING gin (similar_dream_ids)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS dream_similarity_contexts")
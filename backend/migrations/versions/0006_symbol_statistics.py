@@ -0,0 +1,80 @@
+"""Global symbol statistics tables
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing interpretations are counted by
+    # `python -m app.services.symbol_stats rebuild` (normalization lives in Python).
+    # IF NOT EXISTS: the API creates model tables on startup, possibly before this runs
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbols (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            name VARCHAR(255) NOT NULL UNIQUE,
+            display VARCHAR(255) NOT NULL,
+            emoji VARCHAR(10),
+            count INTEGER NOT NULL DEFAULT 0,
+            last_seen_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS idx_symbols_count ON symbols (count DESC)")
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbol_cooccurrences (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            symbol_id UUID NOT NULL REFERENCES symbols(id) ON DELETE CASCADE,
+            related_symbol_id UUID NOT NULL REFERENCES symbols(id) ON DELETE CASCADE,
+            count INTEGER NOT NULL DEFAULT 0,
+            last_seen_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_symbol_cooccurrences_pair UNIQUE (symbol_id, related_symbol_id)
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_symbol_cooccurrences_top "
+        "ON symbol_cooccurrences (symbol_id, count DESC)"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbol_daily_counts (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            symbol_id UUID NOT NULL REFERENCES symbols(id) ON DELETE CASCADE,
+            day DATE NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_symbol_daily_counts_day UNIQUE (symbol_id, day)
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_symbol_daily_counts_day "
+        "ON symbol_daily_counts (day, symbol_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS symbol_daily_counts")
+    op.execute("DROP TABLE IF EXISTS symbol_cooccurrences")
+    op.execute("DROP TABLE IF EXISTS symbols")
@@ -0,0 +1,30 @@
+"""Keyset index for dream journal pages
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 17:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Journal pages and their cursors are one range scan of a user's live dreams
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_dreams_user_journal "
+            "ON dreams (user_id, created_at DESC, id) WHERE is_deleted = false"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_dreams_user_journal")
@@ -0,0 +1,91 @@
+"""Opt-in halfvec ANN index for dream embeddings
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 19:00:00
+
+Only the index is half precision: dream_embeddings.embedding stays float32,
+since candidates are rescored from it. This saves index memory, not table
+storage. Run with `alembic -x vector_precision=half upgrade head` together
+with VECTOR_INDEX_PRECISION=half; without the flag the revision changes nothing.
+"""
+import re
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "vector_store"
+TABLE = "vector_store.dream_embeddings"
+LISTS = 100
+
+
+def _index_name(model: str) -> str:
+    # Frozen copy of app.services.vector_index.index_name
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")[:38]
+    return f"dream_embeddings_{slug}_idx"
+
+
+def _opted_in() -> bool:
+    return context.get_x_argument(as_dictionary=True).get("vector_precision") == "half"
+
+
+def _models():
+    return op.get_bind().execute(
+        sa.text(f"SELECT name, dimensions FROM {SCHEMA}.embedding_models ORDER BY name")
+    ).all()
+
+
+def _is_half(name: str) -> bool:
+    indexdef = op.get_bind().execute(
+        sa.text("SELECT indexdef FROM pg_indexes WHERE schemaname = :schema AND indexname = :name"),
+        {"schema": SCHEMA, "name": name}
+    ).scalar_one_or_none()
+    return bool(indexdef) and "halfvec" in indexdef
+
+
+def _swap_index(model: str, key: str) -> None:
+    """Build next to the current index, then replace it by name (as the CLI does)"""
+    name = _index_name(model)
+    escaped = model.replace("'", "''")
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {SCHEMA}.{name}_new")
+    op.execute(
+        f"CREATE INDEX CONCURRENTLY {name}_new ON {TABLE} USING ivfflat ({key}) "
+        f"WITH (lists = {LISTS}) WHERE model = '{escaped}'"
+    )
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {SCHEMA}.{name}")
+    op.execute(f"ALTER INDEX {SCHEMA}.{name}_new RENAME TO {name}")
+
+
+def upgrade() -> None:
+    if not _opted_in():
+        return
+    has_halfvec = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_type WHERE typname = 'halfvec'")
+    ).scalar_one_or_none()
+    if not has_halfvec:
+        raise RuntimeError("vector_precision=half needs pgvector 0.7.0 or newer (halfvec type)")
+
+    models = _models()
+    with op.get_context().autocommit_block():
+        for name, dimensions in models:
+            if _is_half(_index_name(name)):
+                continue
+            _swap_index(name, f"((embedding)::halfvec({int(dimensions)})) halfvec_cosine_ops")
+
+
+def downgrade() -> None:
+    if not _opted_in():
+        return
+    models = _models()
+    with op.get_context().autocommit_block():
+        for name, dimensions in models:
+            if not _is_half(_index_name(name)):
+                continue
+            _swap_index(name, f"((embedding)::vector({int(dimensions)})) vector_cosine_ops")
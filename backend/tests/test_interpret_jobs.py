@@ -0,0 +1,297 @@
+"""State transitions of asynchronous interpretation jobs, including redelivery"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.models.schemas.dream import DreamInterpretation
+from app.services import interpret_jobs
+from app.services.ai.rate_governor import UpstreamBudgetTimeout
+from app.services.interpret_jobs import interpret_job_store, run_interpret_job
+from app.services.interpretation_flow import InterpretationResult
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakePubSub:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.channels: List[str] = []
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.append(channel)
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages: bool = True, timeout: float = 0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def unsubscribe(self) -> None:
+        for channel in self.channels:
+            self.redis.subscribers[channel].remove(self.queue)
+        self.channels = []
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeRedis:
+    """The few string commands the job store uses"""
+
+    def __init__(self):
+        self.data: Dict[str, str] = {}
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.data.get(key)
+
+    async def setex(self, key: str, ttl: int, value: Any) -> None:
+        self.data[key] = str(value)
+
+    async def decr(self, key: str) -> int:
+        self.data[key] = str(int(self.data.get(key, 0)) - 1)
+        return int(self.data[key])
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "data": message})
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+
+def _interpretation(dream_id: UUID) -> DreamInterpretation:
+    return DreamInterpretation(
+        dream_id=dream_id,
+        main_symbol="Змея",
+        main_symbol_emoji="🐍",
+        interpretation="Змея во сне означает скрытые страхи и перемены.",
+        emotions=[{"name": "тревога", "intensity": 0.7}],
+        advice="Присмотритесь к тому, что вас тревожит."
+    )
+
+
+class FakeFlow:
+    """Stands in for interpret_and_save and the dreams it saved"""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self.saved: Dict[UUID, SimpleNamespace] = {}
+        self.error: Optional[BaseException] = None
+        self.save_before_error = False
+        self.delay = 0.0
+        self.embeddings: List[UUID] = []
+
+    def save(self, dream_id: UUID, user_id: UUID, text: str) -> None:
+        interpretation = _interpretation(dream_id)
+        self.saved[dream_id] = SimpleNamespace(
+            id=dream_id,
+            user_id=user_id,
+            text=text,
+            interpretation=SimpleNamespace(**interpretation.model_dump())
+        )
+
+    async def interpret_and_save(self, db, openai_service, **kwargs) -> InterpretationResult:
+        self.calls.append(kwargs)
+        await asyncio.sleep(self.delay)
+        dream_id = kwargs["dream_id"] or uuid4()
+        if self.error is not None:
+            if self.save_before_error:
+                # Another delivery of the job committed this dream meanwhile
+                self.save(dream_id, kwargs["user_id"], kwargs["dream_text"])
+            raise self.error
+        self.save(dream_id, kwargs["user_id"], kwargs["dream_text"])
+        return InterpretationResult(
+            dream=SimpleNamespace(id=dream_id),
+            interpretation=_interpretation(dream_id),
+            similar_dreams=[{"id": str(uuid4()), "similarity": 0.9}]
+        )
+
+    def dream_service(self, session):
+        flow = self
+
+        class _DreamService:
+            async def get_with_interpretation(self, dream_id: UUID):
+                return flow.saved.get(dream_id)
+
+        return _DreamService()
+
+    async def store_dream_embedding(self, openai_service, dream_id, user_id, dream_text, embeddings=None):
+        self.embeddings.append(dream_id)
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    fake = FakeRedis()
+    monkeypatch.setattr(interpret_jobs, "get_redis", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def flow(monkeypatch) -> FakeFlow:
+    fake = FakeFlow()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield SimpleNamespace(rollback=_noop)
+
+    monkeypatch.setattr(interpret_jobs, "interpret_and_save", fake.interpret_and_save)
+    monkeypatch.setattr(interpret_jobs, "DreamService", fake.dream_service)
+    monkeypatch.setattr(interpret_jobs, "store_dream_embedding", fake.store_dream_embedding)
+    monkeypatch.setattr(interpret_jobs, "OpenAIService", lambda: None)
+    monkeypatch.setattr(interpret_jobs, "database", SimpleNamespace(async_session_factory=session_factory))
+    return fake
+
+
+async def _noop() -> None:
+    pass
+
+
+async def _accepted_job(redis: FakeRedis, user_id: UUID) -> Dict[str, Any]:
+    quota_key = f"dream_count:{user_id}:today"
+    redis.data[quota_key] = "1"  # Reserved by the API on acceptance
+    return await interpret_job_store.create(user_id, quota_key=quota_key, daily_limit_remaining=2)
+
+
+async def _run(job: Dict[str, Any], final_attempt: bool = True) -> None:
+    await run_interpret_job(
+        UUID(job["job_id"]),
+        UUID(job["user_id"]),
+        dream_text="Мне снилась огромная змея в старом доме",
+        language="ru",
+        include_similar=True,
+        subscription_type="free",
+        final_attempt=final_attempt
+    )
+
+
+async def test_created_job_is_queued_and_owner_only(redis):
+    user_id = uuid4()
+    job = await _accepted_job(redis, user_id)
+
+    assert job["status"] == "queued"
+    assert job["dream_id"]
+    assert (await interpret_job_store.get(UUID(job["job_id"]), user_id))["status"] == "queued"
+    assert await interpret_job_store.get(UUID(job["job_id"]), uuid4()) is None
+
+
+async def test_successful_run_saves_under_preassigned_dream_id(redis, flow):
+    job = await _accepted_job(redis, uuid4())
+
+    await _run(job)
+
+    stored = await interpret_job_store.get(UUID(job["job_id"]))
+    assert stored["status"] == "done"
+    assert stored["result"]["dream_id"] == job["dream_id"]
+    assert stored["result"]["daily_limit_remaining"] == 2
+    assert flow.calls[0]["dream_id"] == UUID(job["dream_id"])
+    assert redis.data[job["quota_key"]] == "1"
+
+
+async def test_finished_job_is_not_run_again(redis, flow):
+    job = await _accepted_job(redis, uuid4())
+    await _run(job)
+
+    await _run(job)
+
+    assert len(flow.calls) == 1
+
+
+async def test_redelivery_after_save_finishes_from_saved_dream(redis, flow):
+    job = await _accepted_job(redis, uuid4())
+    # The first worker saved the dream and died before marking the job done
+    await interpret_job_store.update(UUID(job["job_id"]), status="running")
+    flow.save(UUID(job["dream_id"]), UUID(job["user_id"]), "Мне снилась огромная змея в старом доме")
+
+    await _run(job)
+
+    stored = await interpret_job_store.get(UUID(job["job_id"]))
+    assert stored["status"] == "done"
+    assert stored["result"]["dream_id"] == job["dream_id"]
+    assert stored["result"]["interpretation"]["main_symbol"] == "Змея"
+    assert flow.calls == []
+    assert flow.embeddings == [UUID(job["dream_id"])]
+    assert redis.data[job["quota_key"]] == "1"
+
+
+async def test_parallel_delivery_that_lost_the_insert_is_not_failed(redis, flow):
+    job = await _accepted_job(redis, uuid4())
+    flow.error = RuntimeError("duplicate key value violates unique constraint")
+    flow.save_before_error = True
+
+    await _run(job)
+
+    stored = await interpret_job_store.get(UUID(job["job_id"]))
+    assert stored["status"] == "done"
+    assert redis.data[job["quota_key"]] == "1"
+
+
+async def test_failure_marks_failed_and_releases_quota(redis, flow):
+    job = await _accepted_job(redis, uuid4())
+    flow.error = RuntimeError("upstream returned invalid JSON")
+
+    await _run(job)
+
+    stored = await interpret_job_store.get(UUID(job["job_id"]))
+    assert stored["status"] == "failed"
+    assert stored["error"] == "Failed to interpret dream"
+    assert redis.data[job["quota_key"]] == "0"
+
+
+async def test_throttled_job_is_requeued_until_final_attempt(redis, flow):
+    job = await _accepted_job(redis, uuid4())
+    flow.error = UpstreamBudgetTimeout("budget exhausted")
+
+    with pytest.raises(UpstreamBudgetTimeout):
+        await _run(job, final_attempt=False)
+    assert (await interpret_job_store.get(UUID(job["job_id"])))["status"] == "queued"
+    assert redis.data[job["quota_key"]] == "1"
+
+    await _run(job, final_attempt=True)
+    stored = await interpret_job_store.get(UUID(job["job_id"]))
+    assert stored["status"] == "failed"
+    assert redis.data[job["quota_key"]] == "0"
+
+
+async def test_hung_job_times_out_and_releases_quota(redis, flow, monkeypatch):
+    monkeypatch.setattr(interpret_jobs.settings, "INTERPRET_JOB_TIME_LIMIT", 0.01)
+    job = await _accepted_job(redis, uuid4())
+    flow.delay = 1.0
+
+    await _run(job)
+
+    stored = await interpret_job_store.get(UUID(job["job_id"]))
+    assert stored["status"] == "failed"
+    assert stored["error"] == "Interpretation timed out, please try again"
+    assert redis.data[job["quota_key"]] == "0"
+    assert flow.saved == {}
+
+
+async def test_wait_returns_once_the_job_finishes(redis, flow):
+    user_id = uuid4()
+    job = await _accepted_job(redis, user_id)
+
+    waiter = asyncio.create_task(interpret_job_store.wait(UUID(job["job_id"]), user_id, timeout=5))
+    await asyncio.sleep(0)
+    await _run(job)
+    finished = await asyncio.wait_for(waiter, 1)
+
+    assert finished["status"] == "done"
+
+
+async def test_wait_times_out_with_current_state(redis):
+    user_id = uuid4()
+    job = await _accepted_job(redis, user_id)
+
+    current = await interpret_job_store.wait(UUID(job["job_id"]), user_id, timeout=0.05)
+
+    assert current["status"] == "queued"
+    assert json.loads(redis.data[f"dream_job:{job['job_id']}"])["status"] == "queued"
@@ -0,0 +1,56 @@
+"""Retries of the interpretation task, run eagerly without a broker"""
+
+import asyncio
+from typing import List
+from uuid import uuid4
+
+import pytest
+
+from app.services.ai.rate_governor import UpstreamBudgetTimeout
+from app.worker import tasks
+from app.worker.tasks import interpret_dream_job
+
+
+@pytest.fixture
+def attempts(monkeypatch) -> List[bool]:
+    """final_attempt of every run; throttled on all but the final one"""
+    seen: List[bool] = []
+
+    async def run_interpret_job(job_id, user_id, final_attempt=True, **kwargs) -> None:
+        seen.append(final_attempt)
+        if not final_attempt:
+            raise UpstreamBudgetTimeout("budget exhausted")
+
+    monkeypatch.setattr(tasks, "run_interpret_job", run_interpret_job)
+    monkeypatch.setattr(tasks, "run_async", asyncio.run)
+    return seen
+
+
+def _apply():
+    return interpret_dream_job.apply(kwargs={
+        "job_id": str(uuid4()),
+        "user_id": str(uuid4()),
+        "dream_text": "Мне снилась огромная змея в старом доме",
+        "language": "ru",
+        "include_similar": True,
+        "subscription_type": "free",
+    })
+
+
+def test_throttled_job_is_retried_until_final_attempt(attempts):
+    _apply()
+
+    assert attempts == [False] * interpret_dream_job.max_retries + [True]
+
+
+def test_job_is_not_retried_when_it_runs(monkeypatch):
+    seen: List[bool] = []
+
+    async def run_interpret_job(job_id, user_id, final_attempt=True, **kwargs) -> None:
+        seen.append(final_attempt)
+
+    monkeypatch.setattr(tasks, "run_interpret_job", run_interpret_job)
+    monkeypatch.setattr(tasks, "run_async", asyncio.run)
+
+    assert _apply().successful()
+    assert len(seen) == 1
@@ -162,34 +162,6 @@ CREATE TRIGGER update_subscriptions_updated_at BEFORE UPDATE ON subscriptions
 CREATE TRIGGER update_user_stats_updated_at BEFORE UPDATE ON user_stats
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- Create function to find similar dreams
-CREATE OR REPLACE FUNCTION find_similar_dreams(
-    query_embedding vector(1536),
-    limit_count INTEGER DEFAULT 10
-)
-RETURNS TABLE (
-    dream_id UUID,
-    similarity FLOAT,
-    dream_text TEXT,
-    interpretation TEXT
-)
-AS $$
-BEGIN
-    RETURN QUERY
-    SELECT 
-        de.dream_id,
-        1 - (de.embedding <=> query_embedding) as similarity,
-        d.text as dream_text,
-        di.interpretation
-    FROM vector_store.dream_embeddings de
-    JOIN dreams d ON d.id = de.dream_id
-    LEFT JOIN dream_interpretations di ON di.dream_id = d.id
-    WHERE d.is_deleted = false
-    ORDER BY de.embedding <=> query_embedding
-    LIMIT limit_count;
-END;
-$$ LANGUAGE plpgsql;
-
 -- Insert default free subscription for new users trigger
 CREATE OR REPLACE FUNCTION create_default_subscription()
 RETURNS TRIGGER AS $$
@@ -72,17 +72,17 @@ export default function DreamResultPage() {
     }
 
     try {
-      const result = await generateTTS.mutateAsync({ 
+      const audioBlob = await generateTTS.mutateAsync({ 
         dreamId, 
         voice: 'nova' 
       });
       
-      // Create audio URL from base64
-      const blob = new Blob(
-        [Uint8Array.from(atob(result.audio), c => c.charCodeAt(0))],
-        { type: 'audio/mp3' }
-      );
-      const url = URL.createObjectURL(blob);
+      // The endpoint returns audio/mpeg and needs the Bearer header,
+      // so it is played from a blob URL rather than <audio src>
+      if (audioUrl) {
+        URL.revokeObjectURL(audioUrl);
+      }
+      const url = URL.createObjectURL(audioBlob);
       setAudioUrl(url);
       
       // Auto-play
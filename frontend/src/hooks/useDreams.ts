@@ -23,7 +23,8 @@ import type {
   DreamInterpretRequest,
   DreamInterpretResponse,
   DreamListParams,
-  DreamUpdateRequest
+  DreamUpdateRequest,
+  TTSResponse
 } from '@/types/dream';
 
 // Query keys
@@ -209,7 +210,7 @@ export function useDeleteDream() {
  */
 export function useGenerateTTS() {
   return useMutation({
-    mutationFn: ({ dreamId, voice }: { dreamId: string; voice?: string }) =>
+    mutationFn: ({ dreamId, voice }: { dreamId: string; voice?: string }): Promise<TTSResponse> =>
       dreamService.generateTTS(dreamId, voice as any),
   });
 }
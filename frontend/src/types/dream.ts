@@ -84,11 +84,8 @@ export interface TTSRequest {
   voice?: 'nova' | 'alloy' | 'echo' | 'fable' | 'onyx' | 'shimmer';
 }
 
-export interface TTSResponse {
-  audio: string; // Base64 encoded audio
-  format: string;
-  voice: string;
-}
+// Binary audio/mpeg body, read with responseType 'blob' (not JSON)
+export type TTSResponse = Blob;
 
 // Query parameters
 export interface DreamListParams {